@@ -1,13 +1,20 @@
 from dotenv import load_dotenv
 import os
+import sys
 
 # Load .env file
 load_dotenv()
 
-from src.gui.app import App
-
 
 def main():
+    # Có tham số dòng lệnh: chạy batch không cần GUI/pygame
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from src.gui.app import App
+
     app = App()
     app.run()
 
@@ -0,0 +1,400 @@
+"""Chạy chuyển đổi không cần GUI (server, cron)
+
+Ví dụ:
+    python main.py docs/*.txt --voice nova --output-dir output/batch
+    cat script.txt | python main.py - --speed 1.2
+    python main.py --jobs jobs.jsonl --summary output/summary.json
+    python main.py docs/*.txt --metrics-dir output/metrics
+    python main.py book.txt --trace output/trace.json  # mở bằng ui.perfetto.dev
+    python main.py docs/*.txt --estimate --window 3600  # chỉ dự đoán, không chạy
+    python main.py book.txt --format wav --output-format opus
+    python main.py book.txt --format wav --postprocess  # cắt lặng, chuẩn hóa LUFS
+
+Mỗi dòng của file JSONL là một job, ví dụ:
+    {"input": "chapter1.txt", "voice": "onyx", "speed": 1.1, "output": "ch1.mp3"}
+    {"text": "Xin chào", "name": "greeting"}
+    {"input": "book.txt", "format": "wav", "output_format": "opus"}
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from src.config import settings as config
+from src.core.audio_formats import EXTENSIONS
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="Batch text-to-speech conversion"
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="Text files, glob patterns, or - for stdin"
+    )
+    parser.add_argument("--jobs", help="JSONL file, one job per line")
+    parser.add_argument(
+        "--voice",
+        default="echo",
+        choices=sorted(config.SUPPORTED_VOICES.values()),
+        help="Default voice (default: echo)",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Default speed (default: 1.0)"
+    )
+    parser.add_argument(
+        "--output-dir", default="output", help="Directory for merged outputs"
+    )
+    parser.add_argument(
+        "--format",
+        default=config.TTS_RESPONSE_FORMAT,
+        choices=sorted(EXTENSIONS),
+        help="Audio format requested from the backend (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output-format",
+        default=config.TTS_OUTPUT_FORMAT or None,
+        choices=sorted(EXTENSIONS),
+        help="Convert chunks to this format while the rest are synthesized",
+    )
+    parser.add_argument(
+        "--parallel-jobs",
+        type=int,
+        default=4,
+        help="Documents converted at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=config.MAX_WORKERS,
+        help="Shared upper limit of in-flight API requests",
+    )
+    parser.add_argument(
+        "--min-workers",
+        type=int,
+        default=config.MIN_WORKERS,
+        help="Lower limit when the in-flight limit adapts to load",
+    )
+    parser.add_argument(
+        "--target-latency",
+        type=float,
+        default=config.TARGET_LATENCY,
+        help="Back off when p95 request latency exceeds this many seconds",
+    )
+    parser.add_argument(
+        "--adaptive-workers",
+        action=argparse.BooleanOptionalAction,
+        default=config.ADAPTIVE_CONCURRENCY,
+        help="Adapt in-flight requests between --min-workers and --max-workers",
+    )
+    # Tên cũ của --no-adaptive-workers
+    parser.add_argument(
+        "--fixed-workers",
+        dest="adaptive_workers",
+        action="store_false",
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--postprocess",
+        action=argparse.BooleanOptionalAction,
+        default=config.POSTPROCESS,
+        help="Trim silence, normalize loudness and crossfade chunks (needs NumPy)",
+    )
+    parser.add_argument(
+        "--summary", help="Write JSON summary to this path (default: stdout)"
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        help="Write metrics.json and metrics.prom (Prometheus text) here",
+    )
+    parser.add_argument(
+        "--trace", help="Write a Chrome/Perfetto trace JSON of the run to this path"
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Only predict wall time and cost from measured throughput",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        help="With --estimate: processing window in seconds to check against",
+    )
+    return parser.parse_args(argv)
+
+
+def job_name(path, index):
+    name = os.path.splitext(os.path.basename(path))[0] if path else f"job{index}"
+    return re.sub(r"[^\w.-]+", "_", name) or f"job{index}"
+
+
+def validate_job(job):
+    """Lỗi của một job (chuỗi mô tả) hoặc None nếu job hợp lệ"""
+    if not isinstance(job, dict):
+        return "job must be a JSON object"
+    if "text" not in job and "input" not in job:
+        return "job needs 'input' or 'text'"
+    voices = sorted(config.SUPPORTED_VOICES.values())
+    if job["voice"] not in voices:
+        return f"unknown voice {job['voice']!r} (choose from {', '.join(voices)})"
+    for key in ("format", "output_format"):
+        if job[key] not in EXTENSIONS:
+            return (
+                f"unknown {key} {job[key]!r} "
+                f"(choose from {', '.join(sorted(EXTENSIONS))})"
+            )
+    try:
+        job["speed"] = float(job["speed"])
+    except (TypeError, ValueError):
+        return f"invalid speed {job['speed']!r}"
+    return None
+
+
+def load_jobs(args):
+    """Tạo danh sách job từ file/glob/stdin và file JSONL
+
+    Job không hợp lệ (voice, định dạng lạ...) hoặc hai job cùng file đầu ra
+    làm dừng cả batch với SystemExit nêu rõ dòng bị lỗi.
+    """
+    jobs = []
+
+    for pattern in args.inputs:
+        if pattern == "-":
+            jobs.append(({"name": "stdin", "text": sys.stdin.read()}, "stdin"))
+            continue
+        paths = sorted(glob.glob(pattern)) or [pattern]
+        for path in paths:
+            jobs.append(({"input": path}, path))
+
+    if args.jobs:
+        with open(args.jobs, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                origin = f"{args.jobs}:{line_number}"
+                try:
+                    jobs.append((json.loads(line), origin))
+                except json.JSONDecodeError as e:
+                    raise SystemExit(f"{origin}: {e}")
+
+    outputs = {}
+    for index, (job, origin) in enumerate(jobs):
+        if isinstance(job, dict):
+            job.setdefault("voice", args.voice)
+            job.setdefault("speed", args.speed)
+            job.setdefault("format", args.format)
+            job.setdefault("output_format", args.output_format or job["format"])
+        error = validate_job(job)
+        if error:
+            raise SystemExit(f"{origin}: {error}")
+        job.setdefault("name", job_name(job.get("input"), index))
+        output_name = f"{job['name']}.{EXTENSIONS[job['output_format']]}"
+        job.setdefault("output", os.path.join(args.output_dir, output_name))
+
+        output = os.path.abspath(job["output"])
+        if output in outputs:
+            raise SystemExit(
+                f"{origin}: output {job['output']} is already used by "
+                f"{outputs[output]}"
+            )
+        outputs[output] = origin
+    return [job for job, _ in jobs]
+
+
+def run_job(engine, job, index):
+    """Chuyển một document, trả về dict kết quả cho summary"""
+    result = {
+        "name": job["name"],
+        "input": job.get("input"),
+        "output": job["output"],
+        "voice": job["voice"],
+        "speed": job["speed"],
+        "format": job["output_format"],
+        "status": "failed",
+    }
+    start_time = time.time()
+
+    try:
+        text = read_job_text(job)
+        result["chars"] = len(text)
+        if not text:
+            raise ValueError("Empty input")
+
+        chunks = engine.optimize_chunk_size(text)
+        expected = len(chunks)
+        result["dedup"] = engine.get_dedup_savings(chunks, job["voice"])
+        audio_files = engine.generate_speech_parallel(
+            text,
+            job["voice"],
+            {
+                "pitch": job["speed"],
+                "response_format": job["format"],
+                "output_format": job["output_format"],
+                # Hai job cùng text và tham số vẫn có journal/segment riêng
+                "job_key": os.path.abspath(job["output"]),
+            },
+            prefix=f"job{index:03d}_{job['name']}",
+        )
+        result["chunks"] = expected
+        result["failed_chunks"] = expected - len(audio_files)
+        if result["failed_chunks"]:
+            raise RuntimeError(f"{result['failed_chunks']} chunk(s) failed")
+
+        output_dir = os.path.dirname(os.path.abspath(job["output"]))
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        engine.combine_audio_files(audio_files, job["output"])
+        result["status"] = "ok"
+
+    except Exception as e:
+        result["error"] = str(e)
+
+    wall_time = time.time() - start_time
+    result["wall_time"] = round(wall_time, 3)
+    result["chars_per_sec"] = (
+        round(result.get("chars", 0) / wall_time, 1) if wall_time else 0.0
+    )
+    return result
+
+
+def read_job_text(job):
+    if "text" in job:
+        text = job["text"]
+    else:
+        with open(job["input"], encoding="utf-8") as f:
+            text = f.read()
+    return text.strip()
+
+
+def estimate_jobs(engine, jobs, window=None):
+    """Dự đoán thời gian/chi phí của từng job và của cả batch
+
+    Các job dùng chung giới hạn worker nên thời gian của batch được mô phỏng
+    trên toàn bộ chunk, không phải tổng thời gian của từng job.
+    """
+    results = []
+    all_chunks = []
+    for job in jobs:
+        # Chunk lặp lại trong document chỉ được tổng hợp một lần
+        texts = engine.optimize_chunk_size(read_job_text(job))
+        chunks = [len(chunk) for chunk in dict.fromkeys(texts)]
+        all_chunks.extend(chunks)
+        estimate = engine.estimate_chunks(chunks, job["voice"])
+        results.append(
+            {
+                "name": job["name"],
+                "chars": sum(chunks),
+                "chunks": len(chunks),
+                "repeated_chunks": len(texts) - len(chunks),
+                "seconds": round(estimate.seconds, 1),
+                "low": round(estimate.low, 1),
+                "high": round(estimate.high, 1),
+                "cost": round(estimate.cost, 4),
+            }
+        )
+
+    total = engine.estimate_chunks(all_chunks)
+    summary = {
+        "jobs": results,
+        "total_chars": sum(all_chunks),
+        "total_chunks": len(all_chunks),
+        "seconds": round(total.seconds, 1),
+        "low": round(total.low, 1),
+        "high": round(total.high, 1),
+        "cost": round(total.cost, 4),
+        "workers": engine.scheduler.max_in_flight,
+        "history_samples": total.samples,
+    }
+    if window is not None:
+        summary["window"] = window
+        # Dùng cận trên p90 để quyết định có vừa khung thời gian không
+        summary["fits_window"] = total.high <= window
+    return summary
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    jobs = load_jobs(args)
+    if not jobs:
+        print("No input. Pass text files, globs, - or --jobs FILE", file=sys.stderr)
+        return 2
+
+    # Import ở đây để --help không cần OpenAI client
+    from src.core.tts_engine import TTSEngine
+    from src.utils.logger import tracer
+
+    if args.trace:
+        tracer.enable()
+
+    engine = TTSEngine(
+        max_workers=args.max_workers,
+        min_workers=args.min_workers,
+        target_latency=args.target_latency,
+        adaptive=args.adaptive_workers,
+        postprocess=args.postprocess,
+    )
+
+    if args.estimate:
+        summary = estimate_jobs(engine, jobs, args.window)
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return 0 if summary.get("fits_window", True) else 1
+
+    start_time = time.time()
+    results = [None] * len(jobs)
+    # Mọi job dùng chung scheduler (và connection pool) của engine
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, args.parallel_jobs)
+    ) as executor:
+        futures = {
+            executor.submit(run_job, engine, job, i): i for i, job in enumerate(jobs)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = result["status"]
+            detail = result.get("error") or result["output"]
+            print(
+                f"[{status}] {result['name']} ({result['wall_time']}s): {detail}",
+                file=sys.stderr,
+            )
+
+    wall_time = time.time() - start_time
+    total_chars = sum(r.get("chars", 0) for r in results)
+    summary = {
+        "jobs": results,
+        "total_jobs": len(results),
+        "failed_jobs": sum(1 for r in results if r["status"] != "ok"),
+        "total_chars": total_chars,
+        "wall_time": round(wall_time, 3),
+        "chars_per_sec": round(total_chars / wall_time, 1) if wall_time else 0.0,
+        "cache": engine.get_cache_stats(),
+        "concurrency": engine.get_concurrency_stats(),
+        "hedging": engine.get_hedge_stats(),
+        "dedup_saved_chars": sum(
+            r.get("dedup", {}).get("saved_chars", 0) for r in results
+        ),
+    }
+
+    if args.metrics_dir:
+        engine.export_metrics(args.metrics_dir)
+    if args.trace:
+        engine.export_trace(args.trace)
+
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+
+    return 1 if summary["failed_jobs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,3 +22,65 @@ SUPPORTED_VOICES = {
 # GUI Configuration
 WINDOW_TITLE = "Text To Speech Converter"
 WINDOW_SIZE = "600x500"
+
+# TTS Configuration
+TTS_BACKEND = os.getenv("TTS_BACKEND", "openai")  # openai | offline
+TTS_MODEL = "tts-1"
+# Định dạng yêu cầu từ backend: mp3 | opus | aac | flac | wav | pcm
+TTS_RESPONSE_FORMAT = os.getenv("TTS_RESPONSE_FORMAT", "mp3")
+# Định dạng đầu ra nếu khác TTS_RESPONSE_FORMAT (ví dụ tải wav, lưu opus): chunk
+# được chuyển bằng ffmpeg trong thread pool TTS_TRANSCODE_WORKERS (0: số core)
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "")
+TRANSCODE_WORKERS = int(os.getenv("TTS_TRANSCODE_WORKERS", 0))
+TRANSCODE_BITRATE = os.getenv("TTS_TRANSCODE_BITRATE") or None
+
+# Hậu xử lý khi ghép (cần NumPy): cắt khoảng lặng dưới SILENCE_THRESHOLD_DB ở
+# đầu/cuối chunk (giữ SILENCE_PAD giây), chuẩn hóa từng chunk về TARGET_LUFS và
+# crossfade CROSSFADE_MS ở chỗ nối
+POSTPROCESS = os.getenv("TTS_POSTPROCESS", "0") == "1"
+TARGET_LUFS = float(os.getenv("TTS_TARGET_LUFS", -16.0))
+TRIM_SILENCE = os.getenv("TTS_TRIM_SILENCE", "1") == "1"
+SILENCE_THRESHOLD_DB = float(os.getenv("TTS_SILENCE_THRESHOLD_DB", -50.0))
+SILENCE_PAD = float(os.getenv("TTS_SILENCE_PAD", 0.15))
+CROSSFADE_MS = float(os.getenv("TTS_CROSSFADE_MS", 20))
+# Giá USD cho 1.000 ký tự theo backend/model (backend không có trong bảng: miễn phí)
+PRICE_PER_1K_CHARS = {"openai/tts-1": 0.015, "openai/tts-1-hd": 0.030}
+
+# Cache Configuration
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", "output/cache")
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+
+# Rate limit Configuration
+MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", 15))
+REQUESTS_PER_MINUTE = int(os.getenv("TTS_REQUESTS_PER_MINUTE", 500))
+CHARS_PER_MINUTE = int(os.getenv("TTS_CHARS_PER_MINUTE", 1000000))
+USE_ASYNCIO = os.getenv("TTS_USE_ASYNCIO", "0") == "1"
+# Tự điều chỉnh số request đồng thời (AIMD) trong [MIN_WORKERS, MAX_WORKERS].
+# Tắt mặc định để giữ đúng MAX_WORKERS request đồng thời như trước
+ADAPTIVE_CONCURRENCY = os.getenv("TTS_ADAPTIVE_CONCURRENCY", "0") == "1"
+MIN_WORKERS = int(os.getenv("TTS_MIN_WORKERS", 2))
+# Hedged request: gửi lại chunk chạy lâu hơn phân vị HEDGE_PERCENTILE của latency
+# dự đoán, tốn thêm tối đa HEDGE_BUDGET × số ký tự đã gửi. Tắt mặc định vì
+# request dự phòng bị tính tiền
+HEDGE_REQUESTS = os.getenv("TTS_HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("TTS_HEDGE_PERCENTILE", 95))
+HEDGE_BUDGET = float(os.getenv("TTS_HEDGE_BUDGET", 0.05))
+HEDGE_MIN_DELAY = float(os.getenv("TTS_HEDGE_MIN_DELAY", 2.0))
+HEDGE_MIN_SAMPLES = int(os.getenv("TTS_HEDGE_MIN_SAMPLES", 20))
+# p95 latency mục tiêu (giây/request), 0 = chỉ theo dõi mức tăng so với bình thường
+TARGET_LATENCY = float(os.getenv("TTS_TARGET_LATENCY", 0))
+
+# Chunking Configuration
+CHUNK_SIZE = int(os.getenv("TTS_CHUNK_SIZE", 3500))
+# Tách các dãy câu lặp lại thành chunk riêng để chỉ tổng hợp một lần. Tắt mặc
+# định vì đổi ranh giới chunk (và do đó cache key) của văn bản cũ
+DEDUP_CHUNKS = os.getenv("TTS_DEDUP_CHUNKS", "0") == "1"
+DEDUP_MIN_CHARS = int(os.getenv("TTS_DEDUP_MIN_CHARS", 200))
+
+# Job journal (resume job bị gián đoạn)
+JOURNAL_PATH = os.getenv("TTS_JOURNAL_PATH", "output/jobs.sqlite3")
+
+# Giữ audio chunk trong bộ nhớ thay vì file tạm, spill xuống đĩa khi vượt budget
+IN_MEMORY_AUDIO = os.getenv("TTS_IN_MEMORY_AUDIO", "0") == "1"
+AUDIO_MEMORY_BUDGET = int(os.getenv("TTS_AUDIO_MEMORY_BUDGET", 256 * 1024 * 1024))
+AUDIO_SPILL_DIR = os.getenv("TTS_AUDIO_SPILL_DIR", "output/spill")
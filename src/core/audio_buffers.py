@@ -0,0 +1,229 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class AudioBuffer:
+    """Audio của một chunk giữ trong bộ nhớ, có thể bị đẩy xuống file khi hết budget
+
+    name là đường dẫn mà chunk sẽ có nếu được ghi ra đĩa (dùng để hiển thị,
+    ghi journal). data trả về bytes gốc, không copy; khi đã spill thì trả về
+    mmap của file spill.
+    """
+
+    def __init__(self, name, data, store=None):
+        self.name = name
+        self.size = len(data)
+        self.metadata = None
+        self._data = data
+        self._spill_path = None
+        self._store = store
+
+    def __fspath__(self):
+        # Cho phép dùng ở chỗ cần đường dẫn (ffmpeg, os.path...): spill nếu cần
+        return self.ensure_file()
+
+    def __repr__(self):
+        return f"AudioBuffer({self.name!r}, {self.size} bytes)"
+
+    @property
+    def in_memory(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        """bytes (trong bộ nhớ) hoặc mmap chỉ đọc (đã spill)
+
+        mmap trả về thuộc về người gọi và phải được close(); để đọc an toàn
+        cho cả hai trường hợp dùng audio_formats.open_audio_data.
+        """
+        if self._data is not None:
+            return self._data
+        with open(self._spill_path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def open(self):
+        """File object đọc được; BytesIO từ bytes dùng chung buffer, không copy"""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self._spill_path, "rb")
+
+    def ensure_file(self):
+        """Đường dẫn file chứa audio, spill xuống đĩa nếu chưa có"""
+        if self._spill_path is None:
+            if self._store is not None:
+                self._store.discard(self)
+                spill_dir = self._store.spill_dir
+            else:
+                spill_dir = os.path.dirname(os.path.abspath(self.name))
+            self.spill(spill_dir)
+        return self._spill_path
+
+    def spill(self, spill_dir):
+        """Ghi audio ra file trong spill_dir rồi giải phóng bộ nhớ"""
+        if self._data is None:
+            return 0
+        os.makedirs(spill_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=spill_dir, prefix=".spill_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._data)
+        self._spill_path = path
+        self._data = None
+        return self.size
+
+    def write_to(self, output_path):
+        """Ghi audio ra output_path (ghi atomic: file tạm + rename)"""
+        out_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".export_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if self._data is not None:
+                    f.write(self._data)
+                else:
+                    with open(self._spill_path, "rb") as src:
+                        shutil.copyfileobj(src, f)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
+
+    def release(self):
+        """Bỏ buffer khỏi store và xóa file spill (nếu có)"""
+        if self._store is not None:
+            self._store.discard(self)
+        self._data = None
+        if self._spill_path is not None:
+            try:
+                os.remove(self._spill_path)
+            except OSError:
+                pass
+            self._spill_path = None
+
+
+class AudioBufferStore:
+    """Quản lý AudioBuffer với giới hạn bộ nhớ
+
+    Khi tổng dung lượng trong bộ nhớ vượt budget_bytes, buffer cũ nhất bị
+    spill xuống spill_dir. Buffer nhỏ hơn budget luôn được giữ trong bộ nhớ
+    lúc vừa tạo để phát/ghép ngay.
+    """
+
+    def __init__(self, budget_bytes, spill_dir):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self._buffers = OrderedDict()  # id -> AudioBuffer còn trong bộ nhớ
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.spilled = 0
+        self.spilled_bytes = 0
+
+    def put(self, name, data):
+        buffer = AudioBuffer(name, data, store=self)
+        to_spill = []
+        with self._lock:
+            self._buffers[id(buffer)] = buffer
+            self._memory_bytes += buffer.size
+            while self._memory_bytes > self.budget_bytes and len(self._buffers) > 1:
+                _, oldest = self._buffers.popitem(last=False)
+                self._memory_bytes -= oldest.size
+                to_spill.append(oldest)
+
+        for oldest in to_spill:
+            size = oldest.spill(self.spill_dir)
+            with self._lock:
+                self.spilled += 1
+                self.spilled_bytes += size
+        return buffer
+
+    def discard(self, buffer):
+        with self._lock:
+            if self._buffers.pop(id(buffer), None) is not None:
+                self._memory_bytes -= buffer.size
+
+    @property
+    def memory_bytes(self):
+        return self._memory_bytes
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "buffers": len(self._buffers),
+                "memory_bytes": self._memory_bytes,
+                "budget_bytes": self.budget_bytes,
+                "spilled": self.spilled,
+                "spilled_bytes": self.spilled_bytes,
+            }
+
+
+class GrowingBuffer:
+    """Audio đang được tải: writer thêm bytes, reader đọc phần đã tới (thread-safe)
+
+    abandoned=True nghĩa là luồng bị bỏ giữa chừng (ví dụ request được thử
+    lại), reader nên dừng và dùng audio hoàn chỉnh khi chunk xong.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.complete = False
+        self.abandoned = False
+        self._data = bytearray()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return len(self._data)
+
+    def write(self, data):
+        with self._lock:
+            if not self.complete:
+                self._data.extend(data)
+
+    def close(self):
+        with self._lock:
+            self.complete = True
+
+    def abandon(self):
+        with self._lock:
+            self.abandoned = True
+            self._data = bytearray()
+
+    def read_from(self, start):
+        """(bytes từ vị trí start tới hiện tại, đã tải xong chưa)"""
+        with self._lock:
+            return bytes(self._data[start:]), self.complete
+
+
+def audio_name(source):
+    """Tên hiển thị của một nguồn audio (đường dẫn hoặc AudioBuffer)"""
+    return os.path.basename(getattr(source, "name", source) or "")
+
+
+def audio_path(source):
+    """Đường dẫn (dự kiến) của một nguồn audio, không spill AudioBuffer"""
+    if isinstance(source, AudioBuffer):
+        return source.name
+    return source
+
+
+def open_audio(source):
+    """Đối số cho pygame: đường dẫn giữ nguyên, AudioBuffer thành file object"""
+    if isinstance(source, AudioBuffer):
+        return source.open()
+    return source
+
+
+def release_audio(source):
+    """Giải phóng một nguồn audio tạm: xóa file hoặc bỏ buffer"""
+    if isinstance(source, AudioBuffer):
+        source.release()
+    else:
+        try:
+            os.remove(source)
+        except OSError:
+            pass
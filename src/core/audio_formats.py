@@ -0,0 +1,195 @@
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+
+# Định dạng "pcm" của OpenAI: 24kHz, 16-bit signed little-endian, mono
+PCM_SAMPLE_RATE = 24000
+PCM_CHANNELS = 1
+PCM_BITS = 16
+
+# Phần mở rộng file theo response_format
+EXTENSIONS = {
+    "mp3": "mp3",
+    "opus": "opus",
+    "aac": "aac",
+    "flac": "flac",
+    "wav": "wav",
+    "pcm": "pcm",
+}
+
+# Định dạng ghép được bằng cách nối bytes: PCM thô và AAC dạng ADTS (mỗi
+# frame tự mang header)
+RAW_FORMATS = ("pcm", "aac")
+
+WavInfo = namedtuple(
+    "WavInfo", ["channels", "sample_rate", "bits", "data_offset", "data_size"]
+)
+
+
+class AudioFormatError(ValueError):
+    """File không đúng định dạng mong đợi hoặc các file không cùng thông số"""
+
+
+def format_of(path, default="mp3"):
+    """response_format suy ra từ phần mở rộng của path"""
+    ext = os.path.splitext(os.fspath(path))[1].lstrip(".").lower()
+    for name, extension in EXTENSIONS.items():
+        if ext == extension:
+            return name
+    return default
+
+
+def with_format(path, response_format):
+    """path với phần mở rộng của response_format"""
+    root, _ = os.path.splitext(path)
+    return f"{root}.{EXTENSIONS[response_format]}"
+
+
+def wav_header(
+    data_size, sample_rate=PCM_SAMPLE_RATE, channels=PCM_CHANNELS, bits=PCM_BITS
+):
+    """Header RIFF/WAVE 44 byte cho data_size byte PCM"""
+    block_align = channels * bits // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        min(0xFFFFFFFF, 36 + data_size),
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits,
+        b"data",
+        min(0xFFFFFFFF, data_size),
+    )
+
+
+def parse_wav(data):
+    """Đọc thông số và vị trí phần data của một file WAV PCM
+
+    WAV tải dạng streaming (ví dụ từ OpenAI) ghi kích thước 0xFFFFFFFF vì
+    chưa biết trước độ dài: khi đó data kéo dài tới hết file.
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise AudioFormatError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        (size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            codec, channels, sample_rate = struct.unpack_from("<HHI", data, body)
+            (bits,) = struct.unpack_from("<H", data, body + 14)
+            if codec not in (1, 0xFFFE):
+                raise AudioFormatError(f"Unsupported WAV codec: {codec}")
+            fmt = (channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioFormatError("WAV data before fmt chunk")
+            size = min(size, len(data) - body)
+            return WavInfo(*fmt, body, size)
+        # Chunk có độ dài lẻ được đệm thêm một byte
+        offset = body + size + (size & 1)
+    raise AudioFormatError("No data chunk in WAV file")
+
+
+@contextlib.contextmanager
+def open_audio_data(source):
+    """Context manager trả về data của một nguồn audio
+
+    Buffer trong bộ nhớ dùng trực tiếp, file thì mmap và được đóng khi ra khỏi
+    khối.
+    """
+    if getattr(source, "in_memory", False):
+        yield source.data
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+def _write_atomic(output_path, write, suffix):
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".merge_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb", buffering=1024 * 1024) as out:
+            write(out)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
+
+
+def _copy_range(out, data, start, end):
+    # Slice cũng giữ buffer của mmap: release cả hai kể cả khi ghi lỗi
+    with memoryview(data) as view, view[start:end] as part:
+        out.write(part)
+
+
+def concat_wav(input_paths, output_path):
+    """Ghép các file WAV PCM cùng thông số thành một file với header mới
+
+    Lượt đầu chỉ đọc header của từng nguồn rồi đóng, lượt sau mở lại lần lượt
+    để chép phần data, nên mỗi lúc chỉ có một file nguồn đang mở.
+    """
+    if not input_paths:
+        raise AudioFormatError("No input files")
+
+    sources = []
+    template = None
+    for path in input_paths:
+        with open_audio_data(path) as data:
+            info = parse_wav(data)
+        params = (info.channels, info.sample_rate, info.bits)
+        if template is None:
+            template = params
+        elif params != template:
+            raise AudioFormatError(f"Format mismatch in {os.fspath(path)}")
+        sources.append((path, info))
+
+    total = sum(info.data_size for _, info in sources)
+    channels, sample_rate, bits = template
+
+    def write(out):
+        out.write(wav_header(total, sample_rate, channels, bits))
+        for path, info in sources:
+            with open_audio_data(path) as data:
+                end = info.data_offset + info.data_size
+                if len(data) < end:
+                    raise AudioFormatError(
+                        f"File changed while merging: {os.fspath(path)}"
+                    )
+                _copy_range(out, data, info.data_offset, end)
+
+    return _write_atomic(output_path, write, ".wav")
+
+
+def concat_raw(input_paths, output_path):
+    """Nối bytes của các file (PCM thô, AAC ADTS) theo thứ tự"""
+    if not input_paths:
+        raise AudioFormatError("No input files")
+
+    def write(out):
+        for path in input_paths:
+            with open_audio_data(path) as data:
+                _copy_range(out, data, 0, len(data))
+
+    return _write_atomic(output_path, write, os.path.splitext(output_path)[1])
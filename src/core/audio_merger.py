@@ -1,5 +1,69 @@
 import subprocess
 import os
+import tempfile
+from src.core.audio_formats import (
+    RAW_FORMATS,
+    AudioFormatError,
+    concat_raw,
+    concat_wav,
+    format_of,
+)
+from src.core.mp3_frames import Mp3FormatError, concat_mp3
+
+
+def ffmpeg_concat(audio_files, output_path):
+    """Ghép bằng ffmpeg concat demuxer (fallback khi không ghép frame được)"""
+    # List file riêng cho mỗi lần ghép để các lần ghép song song không đè nhau
+    fd, list_file = tempfile.mkstemp(prefix="concat_", suffix=".txt")
+    try:
+        with os.fdopen(fd, "w") as f:
+            for audio_file in audio_files:
+                abs_path = os.path.abspath(audio_file)
+                f.write(f"file '{abs_path}'\n")
+
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_file,
+                "-c",
+                "copy",
+                output_path,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    finally:
+        os.remove(list_file)
+    return output_path
+
+
+def merge_files(audio_files, output_path, response_format=None):
+    """Ghép các chunk cùng định dạng, mặc định suy ra từ đuôi của output_path
+
+    MP3 ghép ở mức frame, WAV viết lại header, PCM/AAC (ADTS) nối bytes, đều
+    trong Python; Opus (Ogg) và FLAC cần container mới nên dùng ffmpeg.
+    """
+    response_format = response_format or format_of(output_path)
+    if response_format == "wav":
+        return concat_wav(audio_files, output_path)
+    if response_format in RAW_FORMATS:
+        return concat_raw(audio_files, output_path)
+    if response_format == "mp3":
+        try:
+            return concat_mp3(audio_files, output_path)
+        except Mp3FormatError:
+            pass
+    return ffmpeg_concat(audio_files, output_path)
+
 
 class AudioMerger:
     def __init__(self):
@@ -11,28 +75,10 @@ class AudioMerger:
     def merge_audio_files(self, output_path):
         if not self.audio_files:
             return False
-            
-        # Create file list
-        with open('file_list.txt', 'w') as f:
-            for audio_file in self.audio_files:
-                f.write(f"file '{audio_file}'\n")
-        
-        # Merge using ffmpeg
+
         try:
-            subprocess.run([
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', 'file_list.txt',
-                '-c', 'copy',
-                output_path
-            ], check=True)
-            
-            # Clean up
-            os.remove('file_list.txt')
+            merge_files(self.audio_files, output_path)
             return True
-            
-        except subprocess.CalledProcessError:
-            if os.path.exists('file_list.txt'):
-                os.remove('file_list.txt')
-            return False 
\ No newline at end of file
+
+        except (subprocess.CalledProcessError, OSError, AudioFormatError):
+            return False
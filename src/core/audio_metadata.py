@@ -0,0 +1,219 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from src.core.audio_buffers import AudioBuffer
+from src.core.audio_formats import (
+    AudioFormatError,
+    format_of,
+    open_audio_data,
+    parse_wav,
+)
+from src.core.mp3_frames import scan_frames
+
+
+class AudioMetadata:
+    """Thông tin của một file audio, parse một lần từ header các frame
+
+    Với MP3, frame_offsets là array offset byte của từng frame audio; mọi frame
+    cùng số sample nên đổi qua lại giữa thời gian và frame là O(1).
+    """
+
+    __slots__ = (
+        "path",
+        "mtime",
+        "size",
+        "duration",
+        "bitrate",
+        "sample_rate",
+        "samples_per_frame",
+        "frame_offsets",
+    )
+
+    def __init__(
+        self,
+        path,
+        mtime,
+        size,
+        duration,
+        bitrate=0,
+        sample_rate=0,
+        samples_per_frame=0,
+        frame_offsets=None,
+    ):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.duration = duration
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.frame_offsets = frame_offsets
+
+    @property
+    def frame_count(self):
+        return len(self.frame_offsets) if self.frame_offsets is not None else 0
+
+    @property
+    def frame_duration(self):
+        if not self.sample_rate:
+            return 0.0
+        return self.samples_per_frame / self.sample_rate
+
+    def frame_at(self, seconds):
+        """Index frame chứa thời điểm seconds (kẹp trong phạm vi file)"""
+        if not self.frame_count:
+            return 0
+        index = int(seconds * self.sample_rate // self.samples_per_frame)
+        return max(0, min(index, self.frame_count - 1))
+
+    def frame_time(self, index):
+        """Thời điểm bắt đầu của frame index, đúng tới từng sample"""
+        if not self.sample_rate:
+            return 0.0
+        return index * self.samples_per_frame / self.sample_rate
+
+    def seek_point(self, seconds):
+        """(thời điểm đã căn theo frame, offset byte) gần nhất trước seconds"""
+        if not self.frame_count:
+            return max(0.0, min(seconds, self.duration)), 0
+        index = self.frame_at(seconds)
+        return self.frame_time(index), self.frame_offsets[index]
+
+
+def wav_metadata_from_data(data, path, mtime, size):
+    try:
+        info = parse_wav(data)
+    except (AudioFormatError, struct.error):
+        return None
+    byte_rate = info.sample_rate * info.channels * info.bits // 8
+    duration = info.data_size / byte_rate if byte_rate else 0.0
+    return AudioMetadata(
+        path, mtime, size, duration, byte_rate * 8, info.sample_rate, 1
+    )
+
+
+def mp3_metadata_from_data(data, path, mtime, size):
+    scan = scan_frames(data)
+    if scan.first is None or not scan.offsets:
+        return None
+
+    first = scan.first
+    frame_count = len(scan.offsets)
+    duration = frame_count * first.samples / first.sample_rate
+    audio_bytes = sum(end - start for start, end in scan.runs)
+    bitrate = int(audio_bytes * 8 / duration) if duration else first.bitrate
+    return AudioMetadata(
+        path,
+        mtime,
+        size,
+        duration,
+        bitrate,
+        first.sample_rate,
+        first.samples,
+        scan.offsets,
+    )
+
+
+# Parser theo định dạng; định dạng không có ở đây (opus, aac, flac...) dùng
+# mutagen. Không quét frame MP3 trên định dạng khác: bytes ngẫu nhiên cũng có
+# thể trông giống header frame và cho ra thời lượng sai.
+PARSERS = {
+    "mp3": mp3_metadata_from_data,
+    "wav": wav_metadata_from_data,
+}
+
+
+def mutagen_metadata(path, mtime, size):
+    import mutagen
+
+    audio = mutagen.File(path)
+    duration = audio.info.length if audio is not None else 0.0
+    bitrate = getattr(getattr(audio, "info", None), "bitrate", 0) or 0
+    return AudioMetadata(path, mtime, size, duration, bitrate)
+
+
+def read_metadata(path):
+    """Parse metadata của file (MP3, WAV; định dạng khác dùng mutagen)"""
+    stat = os.stat(path)
+    if stat.st_size == 0:
+        return AudioMetadata(path, stat.st_mtime_ns, 0, 0.0)
+
+    metadata = None
+    parser = PARSERS.get(format_of(path, default=None))
+    if parser is not None:
+        with open_audio_data(path) as data:
+            metadata = parser(data, path, stat.st_mtime_ns, stat.st_size)
+    if metadata is None:
+        metadata = mutagen_metadata(path, stat.st_mtime_ns, stat.st_size)
+    return metadata
+
+
+def buffer_metadata(buffer):
+    """Metadata của AudioBuffer, parse từ bộ nhớ một lần rồi giữ trên buffer
+
+    Parser chọn theo định dạng của buffer.name; buffer đã spill được mmap và
+    đóng lại ngay sau khi parse.
+    """
+    if buffer.metadata is None:
+        metadata = None
+        parser = PARSERS.get(format_of(buffer.name, default=None))
+        if parser is not None and buffer.size:
+            with open_audio_data(buffer) as data:
+                metadata = parser(data, buffer.name, 0, buffer.size)
+        if metadata is None:
+            metadata = mutagen_metadata(buffer.ensure_file(), 0, buffer.size)
+            metadata.path = buffer.name
+        buffer.metadata = metadata
+    return buffer.metadata
+
+
+class MetadataCache:
+    """Cache LRU metadata theo đường dẫn, tự parse lại khi mtime/size đổi"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        if isinstance(path, AudioBuffer):
+            return buffer_metadata(path)
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            metadata = self._entries.get(path)
+            if (
+                metadata is not None
+                and metadata.mtime == stat.st_mtime_ns
+                and metadata.size == stat.st_size
+            ):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return metadata
+
+        metadata = read_metadata(path)
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = metadata
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return metadata
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+metadata_cache = MetadataCache()
+
+
+def get_metadata(path):
+    return metadata_cache.get(path)
@@ -1,5 +1,52 @@
+import bisect
+import concurrent.futures
+import os
+import time
+
 import pygame
-from mutagen.mp3 import MP3
+
+from src.core.audio_buffers import AudioBuffer, audio_name, open_audio
+from src.core.audio_metadata import get_metadata
+from src.core.mp3_frames import playable_prefix
+from src.utils.logger import tracer
+
+
+class SegmentTimeline:
+    """Timeline chung cho nhiều segment nối tiếp nhau
+
+    starts[i] là thời điểm bắt đầu của segment i trên timeline, nên đổi thời
+    điểm toàn cục sang (segment, offset) chỉ cần bisect.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.starts = []
+        self.durations = []
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def duration(self):
+        if not self.paths:
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def append(self, path, duration):
+        self.starts.append(self.duration)
+        self.paths.append(path)
+        self.durations.append(duration)
+
+    def locate(self, seconds):
+        """(index segment, offset trong segment) của thời điểm seconds"""
+        if not self.paths:
+            return 0, 0.0
+        seconds = max(0.0, min(seconds, self.duration))
+        index = max(0, bisect.bisect_right(self.starts, seconds) - 1)
+        return index, seconds - self.starts[index]
+
+    def clear(self):
+        self.__init__()
 
 
 class AudioPlayer:
@@ -7,33 +54,330 @@ class AudioPlayer:
         pygame.mixer.init()
         self.is_playing = False
         self.current_file = None
+        self.metadata = None
+        # Vị trí (giây) trong file lúc bắt đầu phát, get_pos cộng thêm phần đã phát
+        self.start_offset = 0.0
+
+        # Chế độ playlist: các segment đã giải mã được phát liền nhau trên
+        # một Channel riêng, segment kế tiếp được giải mã trước ở background
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self.timeline = SegmentTimeline()
+        self.segment_index = None
+        self.segment_started = 0.0  # time.monotonic() ứng với offset 0 của segment
+        self.paused_at = None
+        self._queued_index = None
+        self._pending = None  # (index, offset) chờ giải mã xong rồi mới phát
+        self._decoded = {}  # index -> Future[pygame.mixer.Sound]
+        self._decoder = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="audio-decode"
+        )
+
+        # Chunk đang tải (GrowingBuffer) được phát dần theo từng đoạn
+        self._progressive = None
+        self._progressive_pos = 0
+        self._progressive_parts = 0
+        self.first_seconds = 0.5
+        self.part_seconds = 2.0
 
     def load(self, audio_file):
-        pygame.mixer.music.load(audio_file)
+        self.stop_playlist()
+        # AudioBuffer được đọc thẳng từ bộ nhớ qua file object
+        namehint = os.path.splitext(audio_name(audio_file))[1].lstrip(".")
+        pygame.mixer.music.load(open_audio(audio_file), namehint)
         self.current_file = audio_file
+        self.metadata = get_metadata(audio_file)
+        self.start_offset = 0.0
 
-    def play(self):
+    def play(self, start=0.0):
+        if start:
+            self.seek(start)
+            return
         pygame.mixer.music.play()
+        self.start_offset = 0.0
+        self.is_playing = True
+
+    def seek(self, seconds):
+        """Phát từ thời điểm seconds, căn theo ranh giới frame của file"""
+        if self.current_file is None:
+            return 0.0
+        position, _ = self.metadata.seek_point(max(0.0, seconds))
+        pygame.mixer.music.play(start=position)
+        self.start_offset = position
         self.is_playing = True
+        return position
 
     def pause(self):
-        pygame.mixer.music.pause()
+        if self._pending is not None:
+            pass  # Sẽ dừng ngay khi segment giải mã xong và bắt đầu phát
+        elif self.segment_index is not None:
+            self.channel.pause()
+            self.paused_at = time.monotonic()
+        else:
+            pygame.mixer.music.pause()
         self.is_playing = False
 
+    def resume(self):
+        if self._pending is not None:
+            pass
+        elif self.segment_index is not None:
+            self.channel.unpause()
+            if self.paused_at is not None:
+                self.segment_started += time.monotonic() - self.paused_at
+                self.paused_at = None
+        else:
+            pygame.mixer.music.unpause()
+        self.is_playing = True
+
     def stop(self):
         pygame.mixer.music.stop()
+        self.stop_playlist()
+        self._progressive = None
         self.is_playing = False
 
+    def enqueue(self, audio_file):
+        """Thêm segment vào cuối playlist, bắt đầu phát nếu đang rảnh"""
+        # Phần còn lại của chunk đang phát dần phải đứng trước segment mới
+        self._feed_progressive()
+        self._enqueue(audio_file)
+
+    def _enqueue(self, audio_file):
+        self.add_segment(audio_file)
+        if self.segment_index is None:
+            # play_playlist dừng file đơn đang phát (nếu có) rồi mới phát playlist
+            self.play_playlist(self.timeline.starts[-1])
+
+    def play_progressive(self, stream, first_seconds=0.5, part_seconds=2.0):
+        """Phát MP3 đang tải (GrowingBuffer) trước khi tải xong
+
+        Phần đã tới được cắt tại ranh giới frame giải mã độc lập thành các
+        đoạn nhỏ trong bộ nhớ và nối vào playlist liền mạch. Trả về False nếu
+        định dạng không hỗ trợ (audio sẽ được phát khi tải xong).
+        """
+        if not audio_name(stream).lower().endswith(".mp3"):
+            return False
+        self._feed_progressive()
+        self._progressive = stream
+        self._progressive_pos = 0
+        self._progressive_parts = 0
+        self.first_seconds = first_seconds
+        self.part_seconds = part_seconds
+        self._feed_progressive()
+        return True
+
+    def _feed_progressive(self):
+        stream = self._progressive
+        if stream is None:
+            return
+        if stream.abandoned:
+            self._progressive = None
+            return
+        data, complete = stream.read_from(self._progressive_pos)
+        if not data:
+            if complete:
+                self._progressive = None
+            return
+
+        if self._progressive_parts:
+            min_duration = self.part_seconds
+        else:
+            min_duration = self.first_seconds
+        cut = playable_prefix(
+            data,
+            min_duration,
+            final=complete,
+            start=None if self._progressive_pos == 0 else 0,
+        )
+        if not cut:
+            return
+        self._progressive_parts += 1
+        self._progressive_pos += cut
+        part = AudioBuffer(f"{stream.name}#{self._progressive_parts}", data[:cut])
+        if complete and cut == len(data):
+            self._progressive = None
+        self._enqueue(part)
+
+    # --- Playlist liền mạch ---
+
+    def set_playlist(self, audio_files):
+        """Thay playlist bằng danh sách segment mới (chưa phát)"""
+        self.stop()
+        self.timeline.clear()
+        for audio_file in audio_files:
+            self.add_segment(audio_file)
+
+    def add_segment(self, audio_file):
+        self.timeline.append(audio_file, get_metadata(audio_file).duration)
+        if self.segment_index is not None:
+            self._prefetch(self.segment_index + 1)
+
+    def play_playlist(self, start=0.0):
+        """Phát playlist từ thời điểm start (giây) trên timeline chung
+
+        Không chờ giải mã trên thread gọi (main thread của Tk): nếu segment
+        chưa giải mã xong thì update() phát nó ngay khi Future hoàn tất.
+        """
+        if not len(self.timeline):
+            return
+        pygame.mixer.music.stop()
+        self.current_file = None
+        index, offset = self.timeline.locate(start)
+
+        self.channel.stop()
+        self.segment_index = index
+        # Timeline đứng yên tại start cho tới khi segment thật sự được phát
+        self.paused_at = time.monotonic()
+        self.segment_started = self.paused_at - offset
+        self._queued_index = None
+        self._pending = (index, offset)
+        self.is_playing = True
+        self._drop_decoded(keep=(index,))
+        self._decode(index)
+        self._start_pending()
+
+    def _start_pending(self):
+        """Phát segment đang chờ nếu đã giải mã xong, trả về True nếu đã phát"""
+        index, offset = self._pending
+        future = self._decode(index)
+        if not future.done():
+            return False
+        self._pending = None
+        try:
+            sound = future.result()
+        except Exception:
+            self.stop_playlist()
+            self.is_playing = False
+            return False
+        if offset > 0:
+            sound = self._slice_sound(sound, offset)
+
+        self.channel.play(sound)
+        self.segment_started = time.monotonic() - offset
+        self.paused_at = None
+        if not self.is_playing:
+            # Người dùng đã pause trong lúc chờ giải mã
+            self.channel.pause()
+            self.paused_at = time.monotonic()
+        self._prefetch(index + 1)
+        return True
+
+    def seek_global(self, seconds):
+        """Seek tới thời điểm trên timeline chung, chính xác tới từng sample"""
+        was_paused = self.segment_index is not None and not self.is_playing
+        self.play_playlist(seconds)
+        if was_paused:
+            self.pause()
+
+    def get_global_pos(self):
+        if self.segment_index is None:
+            return 0.0
+        now = self.paused_at or time.monotonic()
+        start = self.timeline.starts[self.segment_index]
+        position = start + now - self.segment_started
+        return max(0.0, min(position, self.timeline.duration))
+
+    def get_total_duration(self):
+        return self.timeline.duration
+
+    def stop_playlist(self):
+        self.channel.stop()
+        self.segment_index = None
+        self._queued_index = None
+        self._pending = None
+        self.paused_at = None
+        self._drop_decoded()
+
+    def update(self):
+        """Gọi định kỳ: xếp segment kế tiếp vào hàng đợi của Channel trước khi
+        segment hiện tại hết, để SDL nối chúng mà không có khoảng lặng"""
+        self._feed_progressive()
+        if self._pending is not None and not self._start_pending():
+            return
+        if self.segment_index is None:
+            if self.is_playing and not pygame.mixer.music.get_busy():
+                self.is_playing = False
+            return
+        if not self.is_playing:
+            return
+
+        # Channel đã chuyển sang segment đang xếp hàng
+        if self._queued_index is not None and self.channel.get_queue() is None:
+            previous = self.segment_index
+            self.segment_started += self._decoded_length(previous)
+            self.segment_index = self._queued_index
+            self._queued_index = None
+            self._drop_decoded(keep=(self.segment_index,))
+
+        next_index = self.segment_index + 1
+        if self._queued_index is None and next_index < len(self.timeline):
+            future = self._prefetch(next_index)
+            if not future.done():
+                return
+            if self.channel.get_busy():
+                self.channel.queue(future.result())
+                self._queued_index = next_index
+            else:
+                # Giải mã không kịp: phát tiếp ngay khi segment sẵn sàng
+                self.play_playlist(self.timeline.starts[next_index])
+            return
+
+        if self._queued_index is None and not self.channel.get_busy():
+            self.stop_playlist()
+            self.is_playing = False
+
+    def _decode(self, index):
+        future = self._decoded.get(index)
+        if future is None:
+            future = self._decoder.submit(
+                self._decode_sound, self.timeline.paths[index], index
+            )
+            self._decoded[index] = future
+        return future
+
+    @staticmethod
+    def _decode_sound(source, index):
+        with tracer.span("preload", cat="playback", segment=index):
+            return pygame.mixer.Sound(open_audio(source))
+
+    def _prefetch(self, index):
+        if index < len(self.timeline):
+            return self._decode(index)
+        return None
+
+    def _drop_decoded(self, keep=()):
+        for index in list(self._decoded):
+            if index not in keep:
+                self._decoded.pop(index).cancel()
+
+    def _decoded_length(self, index):
+        future = self._decoded.get(index)
+        if future is not None and future.done():
+            return future.result().get_length()
+        return self.timeline.durations[index]
+
+    def _slice_sound(self, sound, offset):
+        """Sound mới bắt đầu từ offset giây, cắt đúng ranh giới sample"""
+        frequency, size, channels = pygame.mixer.get_init()
+        frame_bytes = abs(size) // 8 * channels
+        start = int(offset * frequency) * frame_bytes
+        return pygame.mixer.Sound(buffer=sound.get_raw()[start:])
+
     def set_volume(self, volume):
         pygame.mixer.music.set_volume(volume)
+        self.channel.set_volume(volume)
 
     def get_pos(self):
+        """Vị trí hiện tại (giây) tính từ đầu file, kể cả sau khi seek"""
         if not self.is_playing:
             return 0
-        return pygame.mixer.music.get_pos() / 1000.0
+        elapsed = max(0, pygame.mixer.music.get_pos()) / 1000.0
+        return min(self.start_offset + elapsed, self.get_duration())
 
     def get_duration(self):
-        if self.current_file:
-            audio = MP3(self.current_file)
-            return audio.info.length
+        if self.metadata is not None:
+            return self.metadata.duration
         return 0
+
+    @staticmethod
+    def get_file_duration(audio_file):
+        return get_metadata(audio_file).duration
@@ -0,0 +1,8 @@
+from src.core.backends.base import (
+    TTSBackend,
+    available_backends,
+    get_backend,
+    register_backend,
+)
+
+__all__ = ["TTSBackend", "available_backends", "get_backend", "register_backend"]
@@ -0,0 +1,127 @@
+import asyncio
+import importlib
+import os
+import tempfile
+
+
+class TTSBackend:
+    """Giao diện chung cho các nhà cung cấp tổng hợp giọng nói
+
+    Backend con cần khai báo name, formats, max_input_chars và cài đặt
+    synthesize/stream. Scheduler, cache, merge... không phụ thuộc backend cụ thể.
+    """
+
+    name = None
+    formats = ("mp3",)
+    max_input_chars = 4096
+
+    def synthesize(self, text, voice, speed=1.0, response_format="mp3"):
+        """Trả về toàn bộ audio dưới dạng bytes"""
+        raise NotImplementedError
+
+    def stream(self, text, voice, speed=1.0, response_format="mp3", chunk_size=65536):
+        """Trả về iterator các khối bytes audio khi chúng sẵn sàng"""
+        yield self.synthesize(text, voice, speed, response_format)
+
+    async def astream(
+        self, text, voice, speed=1.0, response_format="mp3", chunk_size=65536
+    ):
+        """Bản async của stream; mặc định chạy synthesize trong thread"""
+        yield await asyncio.to_thread(
+            self.synthesize, text, voice, speed, response_format
+        )
+
+    def synthesize_to_file(
+        self, text, output_path, voice, speed=1.0, response_format="mp3"
+    ):
+        """Ghi audio ra file ngay khi từng khối bytes tới"""
+        return write_stream_to_file(
+            self.stream(text, voice, speed, response_format), output_path
+        )
+
+    async def asynthesize_to_file(
+        self, text, output_path, voice, speed=1.0, response_format="mp3"
+    ):
+        return await awrite_stream_to_file(
+            self.astream(text, voice, speed, response_format), output_path
+        )
+
+    def check_format(self, response_format):
+        if response_format not in self.formats:
+            raise ValueError(
+                f"Backend '{self.name}' does not support format '{response_format}'"
+            )
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        """Đóng tài nguyên async gắn với event loop đang chạy (nếu có)"""
+
+
+def write_stream_to_file(chunks, output_path):
+    """Ghi từng khối bytes ra file tạm cùng thư mục rồi rename, để không ai đọc
+    được file ghi dở"""
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".synth_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for data in chunks:
+                f.write(data)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
+
+
+async def awrite_stream_to_file(chunks, output_path):
+    """Bản async của write_stream_to_file, chunks là async iterator"""
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".synth_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for data in chunks:
+                f.write(data)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_path
+
+
+# Backend có sẵn, import khi cần để không phải cài SDK của backend không dùng
+_BUILTIN_BACKENDS = {
+    "openai": "src.core.backends.openai_backend:OpenAIBackend",
+    "offline": "src.core.backends.offline_backend:OfflineBackend",
+}
+_BACKENDS = {}
+
+
+def register_backend(name):
+    """Decorator đăng ký class backend với tên cho trước"""
+
+    def decorator(cls):
+        cls.name = name
+        _BACKENDS[name] = cls
+        return cls
+
+    return decorator
+
+
+def available_backends():
+    return sorted(set(_BUILTIN_BACKENDS) | set(_BACKENDS))
+
+
+def get_backend(name, **kwargs):
+    """Tạo instance backend theo tên đã đăng ký"""
+    if name not in _BACKENDS and name in _BUILTIN_BACKENDS:
+        module_name, _ = _BUILTIN_BACKENDS[name].split(":")
+        importlib.import_module(module_name)
+    if name not in _BACKENDS:
+        raise ValueError(
+            f"Unknown TTS backend '{name}'. Available: {', '.join(available_backends())}"
+        )
+    return _BACKENDS[name](**kwargs)
@@ -0,0 +1,156 @@
+import math
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import zlib
+from array import array
+
+from src.core.audio_formats import (
+    PCM_SAMPLE_RATE,
+    AudioFormatError,
+    parse_wav,
+    wav_header,
+)
+from src.core.backends.base import TTSBackend, register_backend
+from src.core.mp3_frames import silent_frames
+
+
+# Giống định dạng pcm của OpenAI: 24kHz, 16-bit little-endian, mono
+SAMPLE_RATE = PCM_SAMPLE_RATE
+CHARS_PER_SECOND = 15.0
+
+
+def resample_pcm(pcm, src_rate, dst_rate=SAMPLE_RATE):
+    """Đổi sample rate của PCM 16-bit mono bằng nội suy tuyến tính, không cần ffmpeg"""
+    if src_rate == dst_rate or not pcm:
+        return pcm
+    src = array("h")
+    src.frombytes(pcm[: len(pcm) // 2 * 2])
+    if sys.byteorder == "big":
+        src.byteswap()
+    last = len(src) - 1
+    ratio = src_rate / dst_rate
+    out = array("h", bytes(2 * (len(src) * dst_rate // src_rate)))
+    for i in range(len(out)):
+        position = i * ratio
+        j = int(position)
+        a = src[j]
+        out[i] = int(a + (src[min(j + 1, last)] - a) * (position - j))
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out.tobytes()
+
+
+@register_backend("offline")
+class OfflineBackend(TTSBackend):
+    """Backend offline, tất định: sinh tone/noise có độ dài tỉ lệ với text
+
+    Dùng cho CI không có mạng và máy dev. engine="espeak" dùng espeak-ng nếu
+    đã cài (rơi về tone nếu không có). MP3 được encode bằng ffmpeg nếu có,
+    nếu không thì trả về MP3 im lặng hợp lệ.
+    """
+
+    formats = ("mp3", "wav", "pcm")
+    max_input_chars = 4096
+
+    def __init__(self, engine="tone", chars_per_second=CHARS_PER_SECOND):
+        self.engine = engine  # tone | noise | espeak
+        self.chars_per_second = chars_per_second
+        self.espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.ffmpeg = shutil.which("ffmpeg")
+        self._periods = {}
+
+    def synthesize(self, text, voice, speed=1.0, response_format="mp3"):
+        self.check_format(response_format)
+        duration = len(text) / self.chars_per_second / (speed or 1.0)
+
+        if response_format == "mp3" and not self.ffmpeg and self.engine != "espeak":
+            return silent_frames(duration)
+
+        pcm = None
+        if self.engine == "espeak" and self.espeak:
+            pcm = self._espeak_pcm(text, voice, speed)
+        if pcm is None:
+            pcm = self._generate_pcm(text, voice, duration)
+
+        if response_format == "pcm":
+            return pcm
+        if response_format == "wav":
+            return wav_header(len(pcm)) + pcm
+        if self.ffmpeg:
+            return self._encode_mp3(pcm)
+        return silent_frames(len(pcm) / 2 / SAMPLE_RATE)
+
+    def _generate_pcm(self, text, voice, duration):
+        samples = max(1, int(duration * SAMPLE_RATE))
+        if self.engine == "noise":
+            rng = random.Random(zlib.crc32(text.encode("utf-8")))
+            noise = array("h", (rng.randint(-3000, 3000) for _ in range(SAMPLE_RATE)))
+            block = noise.tobytes()
+        else:
+            block = self._period(voice)
+
+        repeats, remainder = divmod(samples * 2, len(block))
+        return block * repeats + block[:remainder]
+
+    def _period(self, voice):
+        """Một giây sine 16-bit, tần số cố định theo voice (cache lại)"""
+        block = self._periods.get(voice)
+        if block is None:
+            frequency = 180 + zlib.crc32(voice.encode("utf-8")) % 200
+            step = 2 * math.pi * frequency / SAMPLE_RATE
+            block = array(
+                "h", (int(8000 * math.sin(i * step)) for i in range(SAMPLE_RATE))
+            ).tobytes()
+            self._periods[voice] = block
+        return block
+
+    def _espeak_pcm(self, text, voice, speed):
+        try:
+            # Text qua stdin để text bắt đầu bằng "-" không bị đọc thành option
+            rate = str(int(175 * (speed or 1.0)))
+            result = subprocess.run(
+                [self.espeak, "--stdout", "--stdin", "-s", rate],
+                input=text.encode("utf-8"),
+                check=True,
+                capture_output=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        if not self.ffmpeg:
+            # espeak thường xuất 22050Hz: lấy sample rate từ header rồi đổi
+            # sang 24kHz như mọi định dạng khác của backend
+            try:
+                info = parse_wav(result.stdout)
+            except (AudioFormatError, struct.error):
+                return None
+            if (info.channels, info.bits) != (1, 16):
+                return None
+            end = info.data_offset + info.data_size
+            pcm = result.stdout[info.data_offset:end]
+            return resample_pcm(pcm, info.sample_rate)
+        converted = subprocess.run(
+            [
+                self.ffmpeg, "-loglevel", "error", "-i", "pipe:0",
+                "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "pipe:1",
+            ],
+            input=result.stdout,
+            check=True,
+            capture_output=True,
+        )
+        return converted.stdout
+
+    def _encode_mp3(self, pcm):
+        result = subprocess.run(
+            [
+                self.ffmpeg, "-loglevel", "error",
+                "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+                "-f", "mp3", "-b:a", "64k", "pipe:1",
+            ],
+            input=pcm,
+            check=True,
+            capture_output=True,
+        )
+        return result.stdout
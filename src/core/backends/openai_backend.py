@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+from openai import AsyncOpenAI, OpenAI
+
+from src.core.backends.base import TTSBackend, register_backend
+
+
+@register_backend("openai")
+class OpenAIBackend(TTSBackend):
+    formats = ("mp3", "opus", "aac", "flac", "wav", "pcm")
+    max_input_chars = 4096
+
+    def __init__(self, model="tts-1", api_key=None):
+        self.model = model
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(api_key=self.api_key)
+        self._async_client = None
+        self._async_client_loop = None
+
+    def get_async_client(self):
+        """AsyncOpenAI dùng chung connection pool trong cùng một event loop
+
+        Client gắn với loop tạo ra nó: gọi aclose() trước khi loop kết thúc
+        để đóng connection pool.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _request(self, text, voice, speed, response_format):
+        return dict(
+            model=self.model,
+            voice=voice,
+            input=text,
+            speed=speed,
+            response_format=response_format,
+        )
+
+    def synthesize(self, text, voice, speed=1.0, response_format="mp3"):
+        response = self.client.audio.speech.create(
+            **self._request(text, voice, speed, response_format)
+        )
+        return response.content
+
+    def stream(self, text, voice, speed=1.0, response_format="mp3", chunk_size=65536):
+        with self.client.audio.speech.with_streaming_response.create(
+            **self._request(text, voice, speed, response_format)
+        ) as response:
+            for data in response.iter_bytes(chunk_size):
+                yield data
+
+    async def astream(
+        self, text, voice, speed=1.0, response_format="mp3", chunk_size=65536
+    ):
+        client = self.get_async_client()
+        async with client.audio.speech.with_streaming_response.create(
+            **self._request(text, voice, speed, response_format)
+        ) as response:
+            async for data in response.iter_bytes(chunk_size):
+                yield data
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        client, loop = self._async_client, self._async_client_loop
+        if client is None or loop is not asyncio.get_running_loop():
+            return
+        self._async_client = self._async_client_loop = None
+        await client.close()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ChunkCache:
+    """Cache audio đã tổng hợp trên đĩa, key theo hash nội dung, eviction LRU"""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (path, size), cũ nhất ở đầu
+        self._in_use = {}  # key -> số lượt đang link/đọc, không bị evict
+        self._total_bytes = 0
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice, model, speed, response_format):
+        """Tạo key từ tất cả tham số ảnh hưởng tới audio đầu ra"""
+        payload = json.dumps(
+            [text, voice, model, float(speed), response_format],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        """Đọc các entry có sẵn, sắp xếp theo mtime để khôi phục thứ tự LRU"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            # Bỏ qua file tạm của các lần ghi bị gián đoạn
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_mtime, os.path.splitext(name)[0], path, stat.st_size))
+
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+
+    def _path_for(self, key, response_format):
+        return os.path.join(self.cache_dir, f"{key}.{response_format}")
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            return entry
+
+    def _record(self, key, entry, hit):
+        with self._lock:
+            users = self._in_use.pop(key) - 1
+            if users:
+                self._in_use[key] = users
+            if hit:
+                self.hits += 1
+            else:
+                # Entry bị xóa từ bên ngoài. Thread khác có thể vừa store lại
+                # key này: chỉ bỏ đúng entry đã đọc, không bỏ entry mới
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self._total_bytes -= entry[1]
+                self.misses += 1
+            # Entry vừa dùng xong có thể đã được giữ lại ở lần evict trước
+            self._evict()
+
+    def fetch(self, key, dest_path):
+        """Copy audio đã cache ra dest_path. Trả về True nếu cache hit"""
+        entry = self._lookup(key)
+        if entry is None:
+            return False
+        try:
+            _link_or_copy(entry[0], dest_path)
+            os.utime(entry[0])  # Giữ thứ tự LRU giữa các lần chạy
+        except OSError:
+            self._record(key, entry, hit=False)
+            return False
+        self._record(key, entry, hit=True)
+        return True
+
+    def read(self, key):
+        """Đọc audio đã cache thành bytes, None nếu cache miss"""
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        try:
+            with open(entry[0], "rb") as f:
+                data = f.read()
+            os.utime(entry[0])
+        except OSError:
+            self._record(key, entry, hit=False)
+            return None
+        self._record(key, entry, hit=True)
+        return data
+
+    def store(self, key, src_path, response_format="mp3"):
+        """Lưu file audio vào cache bằng ghi atomic (file tạm + rename)"""
+
+        def write(dst):
+            with open(src_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+
+        self._write_entry(key, response_format, write)
+
+    def store_bytes(self, key, data, response_format="mp3"):
+        """Lưu audio trong bộ nhớ vào cache"""
+        self._write_entry(key, response_format, lambda dst: dst.write(data))
+
+    def _write_entry(self, key, response_format, write):
+        path = self._path_for(key, response_format)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                write(dst)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._total_bytes -= old[1]
+            self._entries[key] = (path, size)
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        """Xóa entry ít dùng nhất cho tới khi về dưới max_bytes (đã giữ lock)
+
+        Entry đang được link/đọc bị bỏ qua để file không bị xóa giữa chừng;
+        nó bị xóa ở lần evict sau khi dùng xong.
+        """
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self._total_bytes <= self.max_bytes or len(self._entries) <= 1:
+                break
+            if key in self._in_use:
+                continue
+            path, size = self._entries.pop(key)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for path, _ in self._entries.values():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def _link_or_copy(src, dst):
+    """Hard link nếu cùng filesystem, nếu không thì copy"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
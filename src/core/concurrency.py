@@ -0,0 +1,154 @@
+import math
+import threading
+import time
+from collections import deque
+
+from src.core.scheduler import get_error_reason, get_status_code
+from src.core.transfer_stats import percentile
+from src.utils.logger import get_logger, tracer
+
+logger = get_logger(__name__)
+
+
+def is_overload(error):
+    """429 hoặc timeout: dấu hiệu API quá tải, cần giảm số request đồng thời"""
+    status = get_status_code(error)
+    if status is not None:
+        return status in (408, 429, 503, 504)
+    cause = error
+    while cause is not None:
+        if isinstance(cause, TimeoutError) or "Timeout" in type(cause).__name__:
+            return True
+        cause = cause.__cause__
+    return False
+
+
+class AimdController:
+    """Điều chỉnh giới hạn request đồng thời của scheduler theo kiểu AIMD
+
+    Tăng cộng (+increase) sau mỗi cửa sổ request khỏe mạnh, giảm nhân
+    (×decrease) khi gặp 429/timeout hoặc khi p95 latency tăng: vượt
+    target_latency (giây/request, nếu đặt) hoặc vượt tolerance lần mức nền.
+    Mức nền là p95 latency trên 1.000 ký tự của các cửa sổ khỏe mạnh nên
+    không phụ thuộc kích thước chunk.
+
+    Mỗi lần đổi giới hạn được lưu vào history để tinh chỉnh min/max/target.
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        min_limit=1,
+        max_limit=15,
+        initial=None,
+        target_latency=None,
+        increase=1,
+        decrease=0.5,
+        tolerance=1.5,
+        max_history=1000,
+    ):
+        self.scheduler = scheduler
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.baseline = None  # giây trên 1.000 ký tự
+        self.history = deque(maxlen=max_history)
+        self.decreases = {}  # lý do -> số lần giảm
+        self._latencies = []  # (latency, giây/1k ký tự) của cửa sổ hiện tại
+        self._errors = 0
+        self._last_decrease = 0.0
+        self._cooldown = 1.0  # ~ p50 latency: lỗi trong khoảng này cùng một đợt
+        self._lock = threading.Lock()
+        if initial is None:
+            initial = max(self.min_limit, self.max_limit // 2)
+        self._set_limit(min(self.max_limit, max(self.min_limit, initial)), "initial")
+
+    @property
+    def limit(self):
+        return self.scheduler.max_in_flight
+
+    def on_success(self, latency, cost=0):
+        """Gọi sau mỗi request thành công với latency (giây) và số ký tự"""
+        per_kchar = latency / max(cost, 100) * 1000
+        with self._lock:
+            self._latencies.append((latency, per_kchar))
+            # Một cửa sổ ≈ một lượt của mọi slot đang mở
+            if len(self._latencies) + self._errors < self.limit:
+                return
+            self._evaluate()
+
+    def on_error(self, error, latency=None):
+        """Gọi khi một lần thử thất bại; 429/timeout giảm giới hạn ngay"""
+        with self._lock:
+            if is_overload(error):
+                self._back_off(f"overload:{get_error_reason(error)}")
+            else:
+                self._errors += 1
+
+    def _evaluate(self):
+        latencies = [latency for latency, _ in self._latencies]
+        normalized = [value for _, value in self._latencies]
+        errors = self._errors
+        self._latencies = []
+        self._errors = 0
+
+        p95 = percentile(latencies, 95)
+        p95_normalized = percentile(normalized, 95)
+        if self.target_latency and p95 > self.target_latency:
+            self._back_off("latency_target")
+        elif self.baseline and p95_normalized > self.baseline * self.tolerance:
+            self._back_off("latency_rise")
+        elif errors > len(latencies):
+            # Đa số request lỗi (không phải 429): không tăng thêm tải
+            return
+        else:
+            # Cửa sổ khỏe mạnh: cập nhật mức nền (EWMA) và tăng thêm slot
+            self._cooldown = max(1.0, percentile(latencies, 50))
+            # Giảm ngay khi nhanh hơn, chỉ tăng chậm: latency tăng dần theo
+            # từng slot vẫn bị phát hiện thay vì kéo mức nền lên theo
+            if self.baseline is None or p95_normalized < self.baseline:
+                self.baseline = p95_normalized
+            else:
+                self.baseline = 0.95 * self.baseline + 0.05 * p95_normalized
+            if self.limit < self.max_limit:
+                self._set_limit(
+                    min(self.max_limit, self.limit + self.increase), "increase"
+                )
+
+    def _back_off(self, reason):
+        # Các lỗi của cùng một đợt quá tải chỉ giảm một lần
+        now = time.monotonic()
+        if now - self._last_decrease < self._cooldown:
+            return
+        self._last_decrease = now
+        self._latencies = []
+        self._errors = 0
+        self.decreases[reason] = self.decreases.get(reason, 0) + 1
+        new_limit = max(self.min_limit, math.floor(self.limit * self.decrease))
+        if new_limit != self.limit:
+            self._set_limit(new_limit, reason)
+
+    def _set_limit(self, limit, reason):
+        self.scheduler.set_max_in_flight(limit)
+        self.history.append((time.time(), limit, reason))
+        tracer.counter("concurrency_limit", limit=limit)
+        if reason not in ("initial", "increase"):
+            logger.info("Concurrency limit -> %d (%s)", limit, reason)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "min": self.min_limit,
+                "max": self.max_limit,
+                "target_latency": self.target_latency,
+                "baseline_per_1k_chars": self.baseline,
+                "decreases": dict(self.decreases),
+                "history": [
+                    {"time": round(t, 3), "limit": limit, "reason": reason}
+                    for t, limit, reason in self.history
+                ],
+            }
@@ -0,0 +1,127 @@
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+
+
+# kind: queued | started | planned | stream | progress | chunk | done | error
+ConversionEvent = namedtuple("ConversionEvent", ["kind", "job_id", "data"])
+
+
+class ConversionService:
+    """Chạy job chuyển đổi ở background thread, gửi sự kiện qua queue thread-safe
+
+    GUI không bao giờ gọi engine trực tiếp: submit() đưa job vào hàng đợi,
+    còn poll() lấy các sự kiện (tiến trình, chunk sẵn sàng, xong, lỗi) để xử
+    lý trên main thread, ví dụ từ root.after.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.events = queue.Queue()
+        self._jobs = queue.Queue()
+        self._ids = itertools.count(1)
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self.active_job = None
+        self._thread = threading.Thread(
+            target=self._run, name="conversion-service", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, text, voice, settings=None):
+        """Đưa job vào hàng đợi, trả về job_id"""
+        job_id = next(self._ids)
+        self._jobs.put((job_id, text, voice, settings))
+        self._emit("queued", job_id, {"pending": self.pending_count()})
+        return job_id
+
+    def cancel(self, job_id):
+        """Hủy job đang chờ hoặc dừng job đang chạy sau chunk hiện tại"""
+        with self._lock:
+            self._cancelled.add(job_id)
+
+    def pending_count(self):
+        return self._jobs.qsize()
+
+    def poll(self, max_events=200):
+        """Lấy tối đa max_events sự kiện, không block"""
+        events = []
+        for _ in range(max_events):
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def shutdown(self):
+        self._jobs.put(None)
+
+    def _emit(self, kind, job_id, data=None):
+        self.events.put(ConversionEvent(kind, job_id, data or {}))
+
+    def _is_cancelled(self, job_id):
+        with self._lock:
+            return job_id in self._cancelled
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            job_id, text, voice, settings = job
+            if self._is_cancelled(job_id):
+                self._emit("error", job_id, {"error": "Cancelled"})
+                continue
+
+            self.active_job = job_id
+            try:
+                self._convert(job_id, text, voice, settings)
+            except Exception as e:
+                self._emit("error", job_id, {"error": str(e)})
+            finally:
+                self.active_job = None
+
+    def _convert(self, job_id, text, voice, settings):
+        start_time = time.time()
+        self._emit("started", job_id, {"chars": len(text)})
+
+        def on_progress(completed, total):
+            self._emit("progress", job_id, {"completed": completed, "total": total})
+
+        def on_plan(plan):
+            self._emit(
+                "planned",
+                job_id,
+                {"chunks": [(task.index, len(task.text)) for task in plan]},
+            )
+
+        def on_stream(index, stream):
+            # Bytes của chunk đầu tới dần trong stream (GrowingBuffer)
+            self._emit("stream", job_id, {"index": index, "stream": stream})
+
+        audio_files = []
+        for index, audio_file in self.engine.iter_speech_parallel(
+            text,
+            voice,
+            settings,
+            progress_callback=on_progress,
+            plan_callback=on_plan,
+            stream_callback=on_stream,
+        ):
+            audio_files.append(audio_file)
+            self._emit("chunk", job_id, {"index": index, "path": audio_file})
+            if self._is_cancelled(job_id):
+                # Thoát generator sẽ hủy các chunk chưa chạy
+                raise RuntimeError("Cancelled")
+
+        self._emit(
+            "done",
+            job_id,
+            {
+                "audio_files": audio_files,
+                "chars": len(text),
+                "elapsed": time.time() - start_time,
+            },
+        )
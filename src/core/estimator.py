@@ -0,0 +1,233 @@
+import heapq
+import random
+import threading
+from collections import deque, namedtuple
+
+from src.core.transfer_stats import percentile
+
+
+# Dự đoán thời gian chuyển đổi (giây) với khoảng tin cậy p10..p90 và chi phí
+Estimate = namedtuple(
+    "Estimate", ["seconds", "low", "high", "cost", "chunks", "samples"]
+)
+
+# Khi chưa có lịch sử: ~1s chờ byte đầu + ~150 ký tự/giây, sai số ±50%
+DEFAULT_LATENCY = (1.0, 1.0 / 150, 0.0)
+DEFAULT_RATIOS = (0.7, 0.85, 1.0, 1.2, 1.5)
+MIN_SAMPLES = 8
+
+
+def _solve(matrix, vector):
+    """Giải hệ tuyến tính nhỏ bằng khử Gauss, None nếu suy biến"""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(n):
+            if r != col:
+                factor = rows[r][col] / rows[col][col]
+                for c in range(col, n + 1):
+                    rows[r][c] -= factor * rows[col][c]
+    return [rows[i][n] / rows[i][i] for i in range(n)]
+
+
+def fit_latency(samples):
+    """Hồi quy latency = a + b*chars + c*(in_flight - 1) bằng bình phương tối thiểu
+
+    samples là [(chars, seconds, in_flight)]. Trả về ((a, b, c), ratios) với
+    ratios là tỉ số thực tế/dự đoán của từng mẫu, dùng làm phân phối sai số.
+    """
+    if len(samples) < MIN_SAMPLES:
+        return DEFAULT_LATENCY, DEFAULT_RATIOS
+
+    xs = [(1.0, chars, max(0, in_flight - 1)) for chars, _, in_flight in samples]
+    ys = [seconds for _, seconds, _ in samples]
+    size = 3 if len({x[2] for x in xs}) > 1 else 2
+    normal = [
+        [sum(x[i] * x[j] for x in xs) for j in range(size)] for i in range(size)
+    ]
+    rhs = [sum(x[i] * y for x, y in zip(xs, ys)) for i in range(size)]
+    coef = _solve(normal, rhs)
+    if coef is None:
+        return DEFAULT_LATENCY, DEFAULT_RATIOS
+
+    # Latency không thể giảm khi text dài hơn hay khi tải nặng hơn
+    coef = [max(0.0, value) for value in coef] + [0.0] * (3 - size)
+    model = tuple(coef)
+    ratios = []
+    for (_, chars, load), seconds in zip(xs, ys):
+        predicted = predict_latency(model, chars, load + 1)
+        if predicted > 0:
+            ratios.append(seconds / predicted)
+    return model, tuple(ratios) or DEFAULT_RATIOS
+
+
+def predict_latency(model, chars, in_flight=1):
+    a, b, c = model
+    return max(0.05, a + b * chars + c * max(0, in_flight - 1))
+
+
+def simulate_makespan(durations, workers):
+    """Thời gian xong khi các chunk được chạy theo thứ tự trên workers slot"""
+    slots = [0.0] * max(1, min(workers, len(durations)))
+    for duration in durations:
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots) if durations else 0.0
+
+
+class ThroughputEstimator:
+    """Ước tính thời gian/chi phí chuyển đổi, tự hiệu chỉnh theo lịch sử đo được
+
+    Latency của từng request được học theo voice (số ký tự, số request đang
+    chạy cùng lúc); thời gian của cả job được mô phỏng bằng cách xếp chunk
+    vào các worker, lặp lại với sai số lấy mẫu từ lịch sử để có khoảng tin
+    cậy. Tỉ số thực tế/dự đoán của các job trước hiệu chỉnh phần còn lại
+    (overhead, cache, mạng...) mà mô hình không thấy.
+    """
+
+    def __init__(self, journal, max_samples=2000, simulations=100):
+        self.journal = journal
+        self.simulations = simulations
+        self.max_samples = max_samples
+        self._samples = {}  # model -> deque[(voice, chars, seconds, in_flight)]
+        self._fits = {}  # (model, voice) -> (coef, ratios)
+        self._calibration = {}  # model -> hệ số hiệu chỉnh
+        self._lock = threading.Lock()
+
+    def _history(self, model):
+        samples = self._samples.get(model)
+        if samples is None:
+            rows = self.journal.get_request_history(model, self.max_samples)
+            samples = deque(reversed(rows), maxlen=self.max_samples)
+            self._samples[model] = samples
+        return samples
+
+    def observe_request(self, model, voice, chars, seconds, in_flight=1):
+        """Ghi nhận một request thành công"""
+        in_flight = max(1, in_flight)
+        with self._lock:
+            self._history(model).append((voice, chars, seconds, in_flight))
+            self._fits = {
+                key: fit for key, fit in self._fits.items() if key[0] != model
+            }
+        self.journal.record_request(model, voice, chars, seconds, in_flight)
+
+    def observe_run(self, model, chunk_sizes, workers, predicted, actual):
+        """Ghi nhận thời gian thực tế của một job để hiệu chỉnh các lần sau"""
+        self.journal.record_run(
+            model, len(chunk_sizes), sum(chunk_sizes), workers, predicted, actual
+        )
+        with self._lock:
+            self._calibration.pop(model, None)
+
+    def get_latency_model(self, model, voice=None):
+        """(hệ số (a, b, c), tỉ số sai số) cho voice, dùng mọi voice nếu ít mẫu"""
+        key = (model, voice)
+        with self._lock:
+            fit = self._fits.get(key)
+            if fit is None:
+                history = self._history(model)
+                samples = [
+                    (chars, seconds, in_flight)
+                    for sample_voice, chars, seconds, in_flight in history
+                    if sample_voice == voice
+                ]
+                if len(samples) < MIN_SAMPLES:
+                    samples = [sample[1:] for sample in history]
+                fit = self._fits[key] = fit_latency(samples)
+            return fit
+
+    def get_calibration(self, model):
+        """Trung vị thực tế/dự đoán của các job gần đây (1.0 nếu chưa có)"""
+        with self._lock:
+            factor = self._calibration.get(model)
+            if factor is None:
+                runs = self.journal.get_run_history(model)
+                ratios = [
+                    actual / predicted
+                    for _, _, _, predicted, actual in runs
+                    if predicted > 0
+                ]
+                factor = percentile(ratios, 50) if ratios else 1.0
+                factor = self._calibration[model] = min(4.0, max(0.25, factor))
+            return factor
+
+    def sample_count(self, model):
+        with self._lock:
+            return len(self._history(model))
+
+    def estimate(
+        self,
+        chunk_sizes,
+        model,
+        voice=None,
+        workers=1,
+        requests_per_minute=None,
+        chars_per_minute=None,
+        price_per_1k=0.0,
+        calibrated=True,
+    ):
+        """Dự đoán thời gian chạy các chunk (số ký tự) với workers slot"""
+        chunk_sizes = list(chunk_sizes)
+        cost = sum(chunk_sizes) / 1000 * price_per_1k
+        if not chunk_sizes:
+            return Estimate(0.0, 0.0, 0.0, cost, 0, self.sample_count(model))
+
+        coef, ratios = self.get_latency_model(model, voice)
+        load = min(workers, len(chunk_sizes))
+        base = [predict_latency(coef, chars, load) for chars in chunk_sizes]
+
+        # Monte Carlo: mỗi chunk nhận một sai số ngẫu nhiên từ lịch sử
+        rng = random.Random(len(chunk_sizes))
+        simulations = max(10, min(self.simulations, 50000 // len(chunk_sizes)))
+        makespans = [
+            simulate_makespan([d * rng.choice(ratios) for d in base], workers)
+            for _ in range(simulations)
+        ]
+
+        # Rate limit đặt cận dưới (trừ phần burst ~5s của token bucket)
+        floor = 0.0
+        if requests_per_minute:
+            floor = max(floor, len(chunk_sizes) * 60 / requests_per_minute - 5)
+        if chars_per_minute:
+            floor = max(floor, sum(chunk_sizes) * 60 / chars_per_minute - 5)
+
+        factor = self.get_calibration(model) if calibrated else 1.0
+        low, mid, high = (
+            max(floor, percentile(makespans, pct) * factor) for pct in (10, 50, 90)
+        )
+        return Estimate(mid, low, high, cost, len(chunk_sizes), self.sample_count(model))
+
+    def estimate_remaining(self, chunk_sizes, completed, elapsed, model, **kwargs):
+        """Cập nhật dự đoán tổng thời gian giữa job
+
+        Phần còn lại được mô phỏng như estimate(), rồi trộn với tốc độ thực
+        tế của job này theo tỉ lệ đã hoàn thành.
+        """
+        chunk_sizes = list(chunk_sizes)
+        remaining = self.estimate(chunk_sizes[completed:], model, **kwargs)
+        done_chars = sum(chunk_sizes[:completed])
+        # Chi phí tính cho cả job, không chỉ phần còn lại
+        remaining = remaining._replace(
+            cost=sum(chunk_sizes) / 1000 * kwargs.get("price_per_1k", 0.0),
+            chunks=len(chunk_sizes),
+        )
+        if not done_chars or elapsed <= 0:
+            return remaining._replace(
+                seconds=elapsed + remaining.seconds,
+                low=elapsed + remaining.low,
+                high=elapsed + remaining.high,
+            )
+
+        weight = done_chars / sum(chunk_sizes)
+        observed = elapsed / done_chars * sum(chunk_sizes[completed:])
+        blend = (1 - weight) * remaining.seconds + weight * observed
+        scale = blend / remaining.seconds if remaining.seconds else 1.0
+        return remaining._replace(
+            seconds=elapsed + blend,
+            low=elapsed + remaining.low * scale,
+            high=elapsed + remaining.high * scale,
+        )
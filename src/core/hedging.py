@@ -0,0 +1,221 @@
+import concurrent.futures
+import threading
+import time
+
+from src.utils.logger import tracer
+
+
+class RequestCancelled(Exception):
+    """Request bị hủy chủ động (ví dụ bên thua của một cặp hedged request)"""
+
+
+def _succeeded(future):
+    return not future.cancelled() and future.exception() is None
+
+
+def _finished(attempt):
+    return attempt.future is not None and attempt.future.done()
+
+
+class _Attempt:
+    """Một lần gửi request của chunk: thời điểm bắt đầu chạy và cờ hủy"""
+
+    __slots__ = ("started", "cancel", "future", "hedge")
+
+    def __init__(self, hedge=False):
+        self.started = None
+        self.cancel = threading.Event()
+        self.future = None
+        self.hedge = hedge
+
+
+class _Group:
+    """Request gốc và (nếu có) request dự phòng của cùng một chunk"""
+
+    __slots__ = ("cost", "primary", "hedge", "hedge_attempt", "finalize", "result")
+
+    def __init__(self, cost, hedge, finalize):
+        self.cost = cost
+        self.hedge = hedge
+        self.finalize = finalize
+        self.primary = _Attempt()
+        self.hedge_attempt = None
+        self.result = concurrent.futures.Future()
+
+
+class RequestHedger:
+    """Gửi thêm một request dự phòng cho chunk chạy quá lâu, lấy kết quả về trước
+
+    Thread giám sát kiểm tra các request đang chạy mỗi interval giây; request
+    nào chạy lâu hơn threshold(cost) (ví dụ p95 latency của chunk cùng cỡ) thì
+    được gửi lại qua scheduler. Bên về trước thắng, bên kia bị hủy: bỏ khỏi
+    hàng đợi nếu chưa chạy, hoặc dừng ở khối bytes kế tiếp nếu đang tải.
+    Tổng ký tự gửi thêm không vượt budget_ratio × ký tự của các request gốc.
+    """
+
+    def __init__(
+        self, scheduler, threshold, budget_ratio=0.1, interval=0.1, metrics=None
+    ):
+        self.scheduler = scheduler
+        self.threshold = threshold  # cost -> giây, None nếu chưa đủ dữ liệu
+        self.budget_ratio = budget_ratio
+        self.interval = interval
+        self.metrics = metrics
+        self.primary_chars = 0
+        self.hedge_chars = 0
+        self.launched = 0
+        self.won = 0  # request dự phòng về trước
+        self.lost = 0  # request gốc về trước
+        self._groups = set()
+        self._lock = threading.Lock()
+        self._monitor = None
+
+    def submit(self, primary, hedge, cost, finalize=None):
+        """Chạy primary(cancel_event) qua scheduler, trả về Future kết quả
+
+        hedge(cancel_event) là request dự phòng. finalize(winner, loser) được
+        gọi nếu bên thua cũng kịp xong, để dọn kết quả thừa.
+        """
+        group = _Group(cost, hedge, finalize)
+        with self._lock:
+            self.primary_chars += cost
+            self._groups.add(group)
+            if self._monitor is None:
+                self._monitor = threading.Thread(
+                    target=self._watch, name="request-hedger", daemon=True
+                )
+                self._monitor.start()
+        # Consumer hủy Future kết quả (ví dụ dừng job sớm): hủy cả các request
+        group.result.add_done_callback(
+            lambda result: self._cancel_group(group) if result.cancelled() else None
+        )
+        self._start(group, group.primary, primary)
+        return group.result
+
+    def _start(self, group, attempt, func):
+        attempt.future = self.scheduler.submit(
+            self._run, attempt, func, cost=group.cost
+        )
+        attempt.future.add_done_callback(
+            lambda future: self._on_done(group, attempt, future)
+        )
+
+    @staticmethod
+    def _run(attempt, func):
+        if attempt.cancel.is_set():
+            raise RequestCancelled()
+        # Scheduler gọi lại khi thử lại: tính thời gian từ lần thử hiện tại
+        attempt.started = time.monotonic()
+        return func(attempt.cancel)
+
+    def _on_done(self, group, attempt, future):
+        other = group.hedge_attempt if attempt is group.primary else group.primary
+        with self._lock:
+            # Bên thắng (hoặc consumer hủy) đã bỏ group khỏi danh sách
+            loser = group not in self._groups
+            if not loser:
+                error = None if future.cancelled() else future.exception()
+                if (future.cancelled() or error is not None) and (
+                    other is not None and not _finished(other)
+                ):
+                    return  # Còn bên kia, chờ nó
+                self._groups.discard(group)
+                if error is None and not future.cancelled() and other is not None:
+                    if attempt.hedge:
+                        self.won += 1
+                    else:
+                        self.lost += 1
+
+        if loser:
+            # Bên thua: dọn kết quả thừa nếu nó cũng xong. finalize ghi journal
+            # và xóa file nên chạy ngoài lock
+            if group.finalize and _succeeded(future):
+                try:
+                    winner = group.result.result()
+                except Exception:
+                    return  # Bên thắng lỗi hoặc consumer đã hủy
+                group.finalize(winner, future.result())
+            return
+        if error is None and not future.cancelled() and other is not None:
+            self._count("won" if attempt.hedge else "lost")
+
+        try:
+            if future.cancelled():
+                group.result.cancel()
+            elif error is not None:
+                group.result.set_exception(error)
+            else:
+                group.result.set_result(future.result())
+        except concurrent.futures.InvalidStateError:
+            return  # Consumer đã hủy kết quả
+
+        if error is None and other is not None:
+            other.cancel.set()
+            if (other.future is None or other.future.cancel()) and other.hedge:
+                # Request dự phòng chưa kịp chạy: không tính vào budget
+                with self._lock:
+                    self.hedge_chars -= group.cost
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._groups:
+                    self._monitor = None
+                    return
+                candidates = [
+                    group
+                    for group in self._groups
+                    if group.hedge_attempt is None
+                    and group.primary.started is not None
+                    and not group.result.done()
+                ]
+
+            now = time.monotonic()
+            for group in candidates:
+                threshold = self.threshold(group.cost)
+                if threshold is None or now - group.primary.started < threshold:
+                    continue
+                with self._lock:
+                    # Request gốc có thể đã xong (hoặc bị hủy) sau khi lấy danh sách
+                    if group not in self._groups or group.result.done():
+                        continue
+                    budget = self.primary_chars * self.budget_ratio
+                    if self.hedge_chars + group.cost > budget:
+                        continue
+                    self.hedge_chars += group.cost
+                    self.launched += 1
+                    group.hedge_attempt = _Attempt(hedge=True)
+                self._count("launched")
+                tracer.instant(
+                    "hedge",
+                    cat="scheduler",
+                    chars=group.cost,
+                    waited=round(now - group.primary.started, 3),
+                )
+                self._start(group, group.hedge_attempt, group.hedge)
+
+    def _cancel_group(self, group):
+        with self._lock:
+            self._groups.discard(group)
+        for attempt in (group.primary, group.hedge_attempt):
+            if attempt is not None:
+                attempt.cancel.set()
+                if attempt.future is not None:
+                    attempt.future.cancel()
+
+    def _count(self, outcome):
+        if self.metrics is not None:
+            self.metrics.inc("tts_hedges_total", label_value=outcome)
+
+    def get_stats(self):
+        with self._lock:
+            finished = self.won + self.lost
+            return {
+                "launched": self.launched,
+                "won": self.won,
+                "lost": self.lost,
+                "win_rate": self.won / finished if finished else 0.0,
+                "extra_chars": self.hedge_chars,
+                "budget_chars": int(self.primary_chars * self.budget_ratio),
+            }
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    text_hash TEXT NOT NULL,
+    chars INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    output_path TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, chunk_index)
+);
+CREATE TABLE IF NOT EXISTS request_history (
+    model TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    chars INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    in_flight INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_history (
+    model TEXT NOT NULL,
+    chunks INTEGER NOT NULL,
+    chars INTEGER NOT NULL,
+    workers INTEGER NOT NULL,
+    predicted REAL NOT NULL,
+    actual REAL NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JobJournal:
+    """Nhật ký job trên SQLite: ranh giới chunk, trạng thái và file đầu ra
+
+    Mỗi chunk được ghi ngay khi xong nên nếu process chết giữa chừng, lần
+    chạy lại cùng job chỉ cần tổng hợp các chunk chưa xong hoặc bị lỗi.
+    """
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def make_job_id(text, **params):
+        payload = json.dumps([text, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def start_job(self, job_id, chunks, params=None):
+        """Đăng ký job, trả về {chunk_index: output_path} của các chunk đã xong
+
+        Nếu ranh giới chunk khác lần chạy trước (ví dụ đổi cách chia chunk)
+        thì journal của job được làm mới.
+        """
+        now = time.time()
+        hashes = [text_hash(chunk) for chunk in chunks]
+
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT chunk_index, text_hash, status, output_path FROM chunks "
+                "WHERE job_id = ? ORDER BY chunk_index",
+                (job_id,),
+            ).fetchall()
+
+            if [row[1] for row in rows] == hashes:
+                finished = {}
+                missing = []
+                for index, _, status, path in rows:
+                    if status != DONE:
+                        continue
+                    if path and os.path.exists(path):
+                        finished[index] = path
+                    else:
+                        missing.append(index)
+                # Chunk DONE mà mất file sẽ được tổng hợp lại: đưa về PENDING để
+                # mark_failed ghi được lỗi nếu lần này thất bại
+                self._conn.executemany(
+                    "UPDATE chunks SET status = ?, output_path = NULL, updated = ? "
+                    "WHERE job_id = ? AND chunk_index = ?",
+                    [(PENDING, now, job_id, index) for index in missing],
+                )
+                status = DONE if len(finished) == len(chunks) else PENDING
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?",
+                    (status, now, job_id),
+                )
+                return finished
+
+            self._conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    json.dumps(params or {}, ensure_ascii=False),
+                    len(chunks),
+                    PENDING,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)",
+                [
+                    (job_id, i, hashes[i], len(chunk), PENDING, now)
+                    for i, chunk in enumerate(chunks)
+                ],
+            )
+        return {}
+
+    def mark_done(self, job_id, chunk_index, output_path):
+        self._update_chunk(job_id, chunk_index, DONE, output_path, None)
+
+    def mark_failed(self, job_id, chunk_index, error):
+        """Đánh dấu chunk lỗi; lỗi tới muộn không đè lên chunk đã xong"""
+        self._update_chunk(job_id, chunk_index, FAILED, None, str(error))
+
+    def _update_chunk(self, job_id, chunk_index, status, output_path, error):
+        now = time.time()
+        query = (
+            "UPDATE chunks SET status = ?, output_path = ?, error = ?, updated = ? "
+            "WHERE job_id = ? AND chunk_index = ?"
+        )
+        params = [status, output_path, error, now, job_id, chunk_index]
+        if status != DONE:
+            query += " AND status != ?"
+            params.append(DONE)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+            # Trạng thái job luôn suy ra lại từ các chunk
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE job_id = ? AND status != ?",
+                (job_id, DONE),
+            ).fetchone()[0]
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE job_id = ?",
+                (PENDING if remaining else DONE, now, job_id),
+            )
+
+    def get_job(self, job_id):
+        """Trạng thái job và số chunk theo từng trạng thái"""
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT status, chunk_count, created, updated FROM jobs "
+                "WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM chunks WHERE job_id = ? "
+                    "GROUP BY status",
+                    (job_id,),
+                ).fetchall()
+            )
+        return {
+            "job_id": job_id,
+            "status": job[0],
+            "chunks": job[1],
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "pending": counts.get(PENDING, 0),
+            "created": job[2],
+            "updated": job[3],
+        }
+
+    def record_request(self, model, voice, chars, seconds, in_flight):
+        """Lưu thời gian của một request thành công (dữ liệu cho estimator)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO request_history VALUES (?, ?, ?, ?, ?, ?)",
+                (model, voice, chars, seconds, in_flight, time.time()),
+            )
+
+    def get_request_history(self, model, limit=2000):
+        """[(voice, chars, seconds, in_flight)] mới nhất trước"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT voice, chars, seconds, in_flight FROM request_history "
+                "WHERE model = ? ORDER BY created DESC LIMIT ?",
+                (model, limit),
+            ).fetchall()
+
+    def record_run(self, model, chunks, chars, workers, predicted, actual):
+        """Lưu thời gian dự đoán và thực tế của một job"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO run_history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (model, chunks, chars, workers, predicted, actual, time.time()),
+            )
+
+    def get_run_history(self, model, limit=50):
+        """[(chunks, chars, workers, predicted, actual)] mới nhất trước"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT chunks, chars, workers, predicted, actual FROM run_history "
+                "WHERE model = ? ORDER BY created DESC LIMIT ?",
+                (model, limit),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
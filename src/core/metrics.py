@@ -0,0 +1,236 @@
+import json
+import math
+import os
+import tempfile
+import threading
+
+
+def exponential_buckets(start, factor, count):
+    return [start * factor**i for i in range(count)]
+
+
+# Giây: 5ms .. ~164s
+SECONDS_BUCKETS = exponential_buckets(0.005, 2, 16)
+# Byte: 4KB .. 32MB
+BYTES_BUCKETS = exponential_buckets(4096, 2, 14)
+# Ký tự/giây: 10 .. ~160k
+RATE_BUCKETS = exponential_buckets(10, 2, 15)
+
+
+class Histogram:
+    """Histogram dạng Prometheus: đếm theo bucket cộng dồn, kèm sum/count/min/max"""
+
+    def __init__(self, name, help_text, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Ước lượng phân vị từ bucket (nội suy tuyến tính như histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                estimate = lower + (bound - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "type": "histogram",
+            "help": self.help,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(map(str, self.buckets), self.cumulative())),
+        }
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def to_prometheus(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for bound, total in zip(self.buckets, self.cumulative()):
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {total}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum:g}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class Counter:
+    """Counter có nhãn, ví dụ số lần thử lại theo lý do"""
+
+    def __init__(self, name, help_text, label="reason"):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.values = {}
+
+    def inc(self, amount=1, label_value=""):
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    @property
+    def total(self):
+        return sum(self.values.values())
+
+    def to_dict(self):
+        return {
+            "type": "counter",
+            "help": self.help,
+            "total": self.total,
+            "values": dict(self.values),
+        }
+
+    def to_prometheus(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for value, count in sorted(self.values.items()):
+            if value:
+                lines.append(f'{self.name}{{{self.label}="{value}"}} {count}')
+            else:
+                lines.append(f"{self.name} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Tập metric trong process, thread-safe, xuất được JSON và Prometheus text"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, buckets=SECONDS_BUCKETS):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, help_text, buckets)
+            return metric
+
+    def counter(self, name, help_text, label="reason"):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name, help_text, label)
+            return metric
+
+    def observe(self, name, value):
+        """Ghi một giá trị vào histogram đã khai báo (bỏ qua nếu chưa có)"""
+        if value is None or math.isnan(value):
+            return
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.observe(value)
+
+    def inc(self, name, amount=1, label_value=""):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.inc(amount, label_value)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def reset(self):
+        with self._lock:
+            for name, metric in list(self._metrics.items()):
+                if isinstance(metric, Histogram):
+                    self._metrics[name] = Histogram(name, metric.help, metric.buckets)
+                else:
+                    self._metrics[name] = Counter(name, metric.help, metric.label)
+
+    def to_dict(self):
+        with self._lock:
+            return {name: metric.to_dict() for name, metric in self._metrics.items()}
+
+    def to_prometheus(self):
+        with self._lock:
+            lines = []
+            for metric in self._metrics.values():
+                lines.extend(metric.to_prometheus())
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        return _write_atomic(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, path):
+        return _write_atomic(path, self.to_prometheus())
+
+    def export(self, directory, name="metrics"):
+        """Ghi <name>.json và <name>.prom vào directory, trả về hai đường dẫn"""
+        os.makedirs(directory, exist_ok=True)
+        return (
+            self.write_json(os.path.join(directory, f"{name}.json")),
+            self.write_prometheus(os.path.join(directory, f"{name}.prom")),
+        )
+
+
+def _write_atomic(path, content):
+    out_dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".metrics_")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def create_tts_metrics():
+    """Registry với các metric của pipeline TTS"""
+    metrics = MetricsRegistry()
+    metrics.histogram(
+        "tts_queue_wait_seconds", "Time from submit until a request slot is free"
+    )
+    metrics.histogram("tts_request_seconds", "Duration of each request attempt")
+    metrics.histogram("tts_ttfb_seconds", "Time to first audio byte")
+    metrics.histogram("tts_transfer_seconds", "Time from first to last audio byte")
+    metrics.histogram("tts_response_bytes", "Audio bytes per response", BYTES_BUCKETS)
+    metrics.histogram(
+        "tts_chars_per_second", "Characters synthesized per second", RATE_BUCKETS
+    )
+    metrics.histogram("tts_merge_seconds", "Time to merge chunks into one file")
+    metrics.histogram(
+        "tts_transcode_seconds", "Time from a finished chunk to its converted copy"
+    )
+    metrics.counter("tts_retries_total", "Retried request attempts by reason")
+    metrics.counter("tts_request_errors_total", "Failed requests by reason")
+    metrics.counter("tts_chunks_total", "Chunks by source", label="source")
+    metrics.counter("tts_hedges_total", "Hedged requests by outcome", label="outcome")
+    return metrics
@@ -0,0 +1,375 @@
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections import namedtuple
+
+
+# Bitrate (kbps) theo bitrate index cho Layer III
+BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+
+# Sample rate theo version bits (0: MPEG2.5, 2: MPEG2, 3: MPEG1)
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    0: [11025, 12000, 8000],
+}
+
+XING_FRAMES = 0x1
+XING_BYTES = 0x2
+XING_TOC = 0x4
+
+FrameHeader = namedtuple(
+    "FrameHeader",
+    [
+        "version",  # 3: MPEG1, 2: MPEG2, 0: MPEG2.5
+        "bitrate_index",
+        "bitrate",  # bps
+        "sample_rate",
+        "padding",
+        "channel_mode",  # 3: mono
+        "frame_size",
+        "samples",
+    ],
+)
+
+
+class Mp3FormatError(ValueError):
+    """File không phải MP3 Layer III hợp lệ hoặc không cùng định dạng"""
+
+
+def parse_header(data, offset=0):
+    """Parse 4 byte header của frame MP3 Layer III, trả về None nếu không hợp lệ"""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x3
+    layer = (b1 >> 1) & 0x3
+    bitrate_index = (b2 >> 4) & 0xF
+    rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = (BITRATES_V1 if version == 3 else BITRATES_V2)[bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x1
+    samples = 1152 if version == 3 else 576
+    frame_size = samples // 8 * bitrate // sample_rate + padding
+
+    return FrameHeader(
+        version,
+        bitrate_index,
+        bitrate,
+        sample_rate,
+        padding,
+        (b3 >> 6) & 0x3,
+        frame_size,
+        samples,
+    )
+
+
+def side_info_size(header):
+    mono = header.channel_mode == 3
+    if header.version == 3:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def skip_id3v2(data):
+    """Trả về offset sau tag ID3v2 (nếu có) ở đầu file"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for b in data[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    has_footer = data[5] & 0x10
+    return 10 + size + (10 if has_footer else 0)
+
+
+def audio_end(data):
+    """Offset kết thúc phần audio, bỏ qua tag ID3v1 ở cuối file"""
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    return end
+
+
+def is_info_frame(data, offset, header):
+    """Frame Xing/Info/VBRI (LAME header) không chứa audio thật"""
+    tag_offset = offset + 4 + side_info_size(header)
+    if data[tag_offset:tag_offset + 4] in (b"Xing", b"Info"):
+        return True
+    return data[offset + 36:offset + 40] == b"VBRI"
+
+
+def iter_frames(data, start=None, end=None):
+    """Duyệt (offset, header) của từng frame, tự đồng bộ lại khi gặp byte rác"""
+    offset = skip_id3v2(data) if start is None else start
+    end = audio_end(data) if end is None else end
+
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or offset + header.frame_size > end:
+            # Tìm sync word tiếp theo
+            offset = data.find(b"\xff", offset + 1, end)
+            if offset < 0:
+                return
+            continue
+        yield offset, header
+        offset += header.frame_size
+
+
+def main_data_begin(data, offset, header):
+    """Số byte frame này mượn từ các frame trước (bit reservoir)"""
+    position = offset + 4
+    if not data[offset + 1] & 0x1:
+        position += 2  # CRC
+    if header.version == 3:
+        return (data[position] << 1) | (data[position + 1] >> 7)
+    return data[position]
+
+
+def playable_prefix(data, min_duration=0.0, final=False, start=None):
+    """Độ dài phần đầu của data có thể giải mã độc lập với phần sau
+
+    Chỉ cắt trước một frame không dùng bit reservoir (main_data_begin = 0),
+    để phần sau cũng giải mã được như một file riêng. Phần đầu phải dài ít
+    nhất min_duration giây; trả về 0 nếu chưa cắt được. final=True: data
+    đã đầy đủ, lấy toàn bộ.
+    """
+    if final:
+        return len(data)
+    cut = 0
+    duration = 0.0
+    for offset, header in iter_frames(data, start=start, end=len(data)):
+        if duration and duration >= min_duration:
+            if not main_data_begin(data, offset, header):
+                cut = offset
+        duration += header.samples / header.sample_rate
+    return cut
+
+
+FrameScan = namedtuple("FrameScan", ["first", "offsets", "runs", "vbr"])
+
+
+def scan_frames(data):
+    """Quét một lượt toàn bộ frame audio của file
+
+    Trả về FrameScan gồm header frame đầu, offset từng frame (array), các
+    đoạn frame liên tục (runs) và cờ VBR. Frame Xing/Info của file nguồn bị
+    loại để không lặp header ở giữa file ghép.
+    """
+    first = None
+    offsets = array("Q")
+    runs = []
+    bitrate = None
+    vbr = False
+    run_start = run_end = None
+
+    for offset, header in iter_frames(data):
+        if first is None:
+            first = header
+            if is_info_frame(data, offset, header):
+                continue
+        if bitrate is None:
+            bitrate = header.bitrate
+        elif header.bitrate != bitrate:
+            vbr = True
+        if offset != run_end:
+            if run_start is not None:
+                runs.append((run_start, run_end))
+            run_start = offset
+        run_end = offset + header.frame_size
+        offsets.append(offset)
+
+    if run_start is not None:
+        runs.append((run_start, run_end))
+    return FrameScan(first, offsets, runs, vbr)
+
+
+def build_info_frame(template, frame_count, total_bytes, toc=None, vbr=True):
+    """Tạo frame Xing/Info chứa tổng số frame, tổng số byte và TOC để seek"""
+    payload_size = 4 + 4 + 4 + 4 + (100 if toc else 0)
+
+    # Chọn bitrate nhỏ nhất (từ bitrate của file) đủ chỗ cho Xing data
+    bitrates = BITRATES_V1 if template.version == 3 else BITRATES_V2
+    for bitrate_index in range(template.bitrate_index, 15):
+        bitrate = bitrates[bitrate_index] * 1000
+        frame_size = template.samples // 8 * bitrate // template.sample_rate
+        if frame_size >= 4 + side_info_size(template) + payload_size:
+            break
+    else:
+        raise Mp3FormatError("Frame too small for Xing header")
+
+    header = bytes(
+        [
+            0xFF,
+            0xE0 | (template.version << 3) | (1 << 1) | 1,  # Layer III, no CRC
+            (bitrate_index << 4)
+            | (SAMPLE_RATES[template.version].index(template.sample_rate) << 2),
+            template.channel_mode << 6,
+        ]
+    )
+
+    flags = XING_FRAMES | XING_BYTES | (XING_TOC if toc else 0)
+    payload = (b"Xing" if vbr else b"Info") + struct.pack(
+        ">III", flags, frame_count, total_bytes + frame_size
+    )
+    if toc:
+        payload += bytes(toc)
+
+    frame = bytearray(frame_size)
+    frame[:4] = header
+    tag_offset = 4 + side_info_size(template)
+    frame[tag_offset:tag_offset + len(payload)] = payload
+    return bytes(frame)
+
+
+def silent_frames(duration, sample_rate=24000, bitrate=64000, mono=True):
+    """Tạo MP3 im lặng hợp lệ dài khoảng duration giây
+
+    Side info và main data toàn 0 nên decoder giải mã ra silence.
+    """
+    for version, rates in SAMPLE_RATES.items():
+        if sample_rate in rates:
+            break
+    else:
+        raise Mp3FormatError(f"Unsupported sample rate: {sample_rate}")
+
+    bitrates = BITRATES_V1 if version == 3 else BITRATES_V2
+    bitrate_index = bitrates.index(bitrate // 1000)
+    samples = 1152 if version == 3 else 576
+    frame_size = samples // 8 * bitrate // sample_rate
+    header = bytes(
+        [
+            0xFF,
+            0xE0 | (version << 3) | (1 << 1) | 1,
+            (bitrate_index << 4) | (rates.index(sample_rate) << 2),
+            (3 if mono else 0) << 6,
+        ]
+    )
+    frame = header + bytes(frame_size - 4)
+    count = max(1, int(duration * sample_rate / samples))
+    return frame * count
+
+
+def build_toc(frame_offsets, total_bytes, header_size):
+    """TOC 100 điểm: vị trí byte (thang 256) tại mỗi 1% thời lượng"""
+    count = len(frame_offsets)
+    total = total_bytes + header_size
+    toc = []
+    for i in range(100):
+        offset = header_size + frame_offsets[min(count - 1, i * count // 100)]
+        toc.append(min(255, offset * 256 // total))
+    return toc
+
+
+def open_source(source):
+    """(file, data) của một nguồn: buffer trong bộ nhớ dùng trực tiếp, file thì mmap"""
+    if getattr(source, "in_memory", False):
+        if not source.size:
+            raise Mp3FormatError(f"Empty buffer: {source.name}")
+        return None, source.data
+    f = open(source, "rb")
+    if os.fstat(f.fileno()).st_size == 0:
+        f.close()
+        raise Mp3FormatError(f"Empty file: {os.fspath(source)}")
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextlib.contextmanager
+def mapped_source(source):
+    """Context manager của open_source: đóng mmap và file khi ra khỏi khối"""
+    f, data = open_source(source)
+    try:
+        yield data
+    finally:
+        if f is not None:
+            data.close()
+            f.close()
+
+
+def concat_mp3(input_paths, output_path, buffer_size=1024 * 1024):
+    """Ghép các file MP3 cùng định dạng ở mức frame, không cần ffmpeg
+
+    Bỏ tag ID3 và frame Xing/LAME của từng file, ghi một frame Xing mới với
+    tổng số frame, số byte và TOC để trình phát tính đúng thời lượng.
+    Ghi ra file tạm rồi rename để không ai đọc được file ghép dở. Đầu vào có
+    thể là đường dẫn hoặc AudioBuffer (đọc thẳng từ bộ nhớ, không copy).
+    Mỗi lượt chỉ mở một nguồn nên số file không bị giới hạn bởi số fd.
+    """
+    if not input_paths:
+        raise Mp3FormatError("No input files")
+
+    # Lượt 1: quét frame từng nguồn rồi đóng ngay, chỉ giữ các đoạn frame
+    sources = []
+    template = None
+    total_bytes = 0
+    vbr = False
+    # Offset của từng frame trong phần audio đầu ra, dùng cho TOC
+    frame_offsets = array("Q")
+
+    for path in input_paths:
+        with mapped_source(path) as data:
+            scan = scan_frames(data)
+        if scan.first is None or not scan.offsets:
+            raise Mp3FormatError(f"No MP3 frames in {path}")
+        first = scan.first
+        if template is None:
+            template = first
+        elif (first.version, first.sample_rate, first.channel_mode == 3) != (
+            template.version,
+            template.sample_rate,
+            template.channel_mode == 3,
+        ):
+            raise Mp3FormatError(f"Format mismatch in {path}")
+
+        # Map offset trong file nguồn sang offset trong file đầu ra
+        run_index = 0
+        run_base = total_bytes
+        for offset in scan.offsets:
+            while offset >= scan.runs[run_index][1]:
+                run_base += scan.runs[run_index][1] - scan.runs[run_index][0]
+                run_index += 1
+            frame_offsets.append(run_base + offset - scan.runs[run_index][0])
+        for start, end in scan.runs:
+            total_bytes += end - start
+        vbr = vbr or scan.vbr or first.bitrate != template.bitrate
+        sources.append((path, scan.runs))
+
+    frame_count = len(frame_offsets)
+    toc = build_toc(frame_offsets, total_bytes, 0)
+    info = build_info_frame(template, frame_count, total_bytes, toc, vbr)
+    # TOC tính lại khi đã biết kích thước frame Xing
+    toc = build_toc(frame_offsets, total_bytes, len(info))
+    info = build_info_frame(template, frame_count, total_bytes, toc, vbr)
+
+    # Lượt 2: mở lại lần lượt từng nguồn và chép các đoạn frame đã quét
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".merge_", suffix=".mp3")
+    try:
+        with os.fdopen(fd, "wb", buffering=buffer_size) as out:
+            out.write(info)
+            for path, runs in sources:
+                with mapped_source(path) as data:
+                    if len(data) < runs[-1][1]:
+                        raise Mp3FormatError(f"File changed while merging: {path}")
+                    # View phải được release kể cả khi ghi lỗi, nếu không mmap
+                    # không đóng được và BufferError che mất lỗi gốc
+                    with memoryview(data) as view:
+                        for start, end in runs:
+                            with view[start:end] as part:
+                                out.write(part)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return output_path
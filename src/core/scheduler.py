@@ -0,0 +1,314 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+import concurrent.futures
+from email.utils import parsedate_to_datetime
+
+from src.core.hedging import RequestCancelled
+from src.utils.logger import tracer
+
+
+# Status code nên thử lại: timeout, conflict, rate limit và lỗi server
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket cho phép "nợ" token để xếp hàng các request đều nhau
+
+    Thay vì để mọi thread thử lại cùng lúc khi bucket rỗng, mỗi lần reserve
+    trừ token ngay và trả về thời gian cần chờ, nên các request được giãn
+    đều đúng bằng tốc độ cho phép.
+    """
+
+    def __init__(self, rate_per_minute, burst_seconds=5.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Trừ amount token, trả về số giây phải chờ trước khi dùng"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class AsyncSlots:
+    """Như asyncio.Semaphore nhưng đọc giới hạn từ scheduler.max_in_flight mỗi
+    lần chờ, nên đổi giới hạn lúc đang chạy có hiệu lực ngay"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self.active < self.scheduler.max_in_flight
+            )
+            self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+        return False
+
+
+class RateLimitScheduler:
+    """Giới hạn số request đang chạy và tốc độ request/ký tự mỗi phút"""
+
+    def __init__(
+        self, max_in_flight=15, requests_per_minute=None, chars_per_minute=None
+    ):
+        self.max_in_flight = max_in_flight
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.char_bucket = TokenBucket(chars_per_minute) if chars_per_minute else None
+        self.in_flight = 0
+        self.async_in_flight = 0
+        self.throttled = 0
+        # MetricsRegistry (tùy chọn): queue wait, thời gian request, lý do thử lại
+        self.metrics = None
+        # Bộ điều chỉnh max_in_flight (tùy chọn, ví dụ AimdController)
+        self.controller = None
+        self._pause_until = 0.0
+        self._cond = threading.Condition()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="tts-worker"
+        )
+        self._async_slots = weakref.WeakKeyDictionary()
+
+    def submit(self, func, *args, cost=0, max_retries=3, **kwargs):
+        """Đưa task vào hàng đợi, trả về Future. cost là số ký tự của request"""
+        return self._executor.submit(
+            self._call, func, args, kwargs, cost, max_retries, time.perf_counter()
+        )
+
+    def call(self, func, *args, cost=0, max_retries=3, **kwargs):
+        """Chạy func trong giới hạn rate limit, thử lại theo Retry-After"""
+        return self._call(func, args, kwargs, cost, max_retries, time.perf_counter())
+
+    def _call(self, func, args, kwargs, cost, max_retries, queued_at):
+        for attempt in range(max_retries):
+            self.acquire(cost)
+            start = time.perf_counter()
+            if attempt == 0:
+                self._observe("tts_queue_wait_seconds", start - queued_at)
+                tracer.complete("queue_wait", queued_at, start, cat="scheduler")
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                if attempt == max_retries - 1 or not is_retryable(e):
+                    if not is_cancelled(e):
+                        self._count("tts_request_errors_total", e)
+                    raise
+                self._count("tts_retries_total", e)
+                delay = self.get_retry_delay(e, attempt)
+                tracer.instant(
+                    "retry", cat="scheduler", reason=get_error_reason(e), delay=delay
+                )
+            finally:
+                self._end_attempt(start, attempt, cost, error)
+                self.release()
+            time.sleep(delay)
+
+    async def acall(self, func, *args, cost=0, max_retries=3, **kwargs):
+        """Bản async của call: func là coroutine function"""
+        slots = self.get_async_slots()
+        queued_at = time.perf_counter()
+        for attempt in range(max_retries):
+            async with slots:
+                self.async_in_flight += 1
+                wait = self.reserve(cost)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                start = time.perf_counter()
+                if attempt == 0:
+                    self._observe("tts_queue_wait_seconds", start - queued_at)
+                    tracer.complete("queue_wait", queued_at, start, cat="scheduler")
+                error = None
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    error = e
+                    if attempt == max_retries - 1 or not is_retryable(e):
+                        if not is_cancelled(e):
+                            self._count("tts_request_errors_total", e)
+                        raise
+                    self._count("tts_retries_total", e)
+                    delay = self.get_retry_delay(e, attempt)
+                    tracer.instant(
+                        "retry",
+                        cat="scheduler",
+                        reason=get_error_reason(e),
+                        delay=delay,
+                    )
+                finally:
+                    self.async_in_flight -= 1
+                    self._end_attempt(start, attempt, cost, error)
+            await asyncio.sleep(delay)
+
+    def _end_attempt(self, start, attempt, cost, error=None):
+        end = time.perf_counter()
+        self._observe("tts_request_seconds", end - start)
+        if self.controller is not None and not is_cancelled(error):
+            if error is None:
+                self.controller.on_success(end - start, cost)
+            else:
+                self.controller.on_error(error, end - start)
+        tracer.complete(
+            "request", start, end, cat="scheduler", attempt=attempt + 1, chars=cost
+        )
+
+    def _observe(self, name, value):
+        if self.metrics is not None:
+            self.metrics.observe(name, value)
+
+    def _count(self, name, error):
+        if self.metrics is not None:
+            self.metrics.inc(name, label_value=get_error_reason(error))
+
+    def get_async_slots(self):
+        """Giới hạn request async theo max_in_flight, dùng chung cho cả event loop"""
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = AsyncSlots(self)
+            self._async_slots[loop] = slots
+        return slots
+
+    def acquire(self, cost=0):
+        """Chờ tới khi có slot trống và đủ token"""
+        with self._cond:
+            while self.in_flight >= self.max_in_flight:
+                self._cond.wait()
+            self.in_flight += 1
+            tracer.counter("in_flight", requests=self.in_flight)
+
+        wait = self.reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+    def reserve(self, cost=0):
+        """Giữ chỗ token, trả về thời gian phải chờ (không block)"""
+        wait = max(0.0, self._pause_until - time.monotonic())
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.char_bucket and cost:
+            wait = max(wait, self.char_bucket.reserve(cost))
+        return wait
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            tracer.counter("in_flight", requests=self.in_flight)
+            self._cond.notify()
+
+    def set_max_in_flight(self, limit):
+        with self._cond:
+            self.max_in_flight = max(1, limit)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Tạm dừng mọi request mới trong seconds giây (khi bị 429)"""
+        with self._cond:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def get_retry_delay(self, error, attempt):
+        """Thời gian chờ trước lần thử lại: Retry-After nếu có, nếu không thì backoff"""
+        delay = get_retry_after(error)
+        if get_status_code(error) == 429:
+            self.throttled += 1
+            if delay is None:
+                delay = 2**attempt
+            # Cả pool cùng dừng, tránh các worker khác tiếp tục dính 429
+            self.pause(delay)
+        if delay is None:
+            # Exponential backoff có jitter: 0.5s, 1s, 2s...
+            delay = (2**attempt) * 0.5 * random.uniform(0.8, 1.2)
+        return delay
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _iter_causes(error):
+    """Duyệt error và chuỗi __cause__ (engine bọc lỗi của client)"""
+    while error is not None:
+        yield error
+        error = error.__cause__
+
+
+def get_status_code(error):
+    for e in _iter_causes(error):
+        status = getattr(e, "status_code", None)
+        if status is not None:
+            return status
+    return None
+
+
+def get_error_reason(error):
+    """Lý do lỗi ngắn gọn cho metrics: status code HTTP hoặc tên exception gốc"""
+    status = get_status_code(error)
+    if status is not None:
+        return str(status)
+    causes = list(_iter_causes(error))
+    return type(causes[-1]).__name__
+
+
+def get_retry_after(error):
+    """Đọc header retry-after-ms / retry-after từ response của lỗi"""
+    for e in _iter_causes(error):
+        response = getattr(e, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            continue
+
+        value = headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000.0
+            except ValueError:
+                pass
+
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            try:
+                retry_at = parsedate_to_datetime(value)
+                return max(0.0, retry_at.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def is_cancelled(error):
+    """Lỗi do request bị hủy chủ động, không phải lỗi của API"""
+    return any(isinstance(e, RequestCancelled) for e in _iter_causes(error))
+
+
+def is_retryable(error):
+    if is_cancelled(error):
+        return False
+    status = get_status_code(error)
+    # Không có status code: lỗi kết nối/timeout, nên thử lại
+    return status is None or status in RETRYABLE_STATUS
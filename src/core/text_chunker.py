@@ -0,0 +1,216 @@
+import bisect
+import math
+import re
+
+
+# Giới hạn input của OpenAI TTS API
+MAX_INPUT_CHARS = 4096
+
+# Kết thúc câu: dấu câu (kể cả "…" và dấu CJK), dấu đóng ngoặc/nháy, khoảng trắng;
+# hoặc xuống dòng
+SENTENCE_BOUNDARY = re.compile(r"[.!?…。！？]+[\"'”’»)\]]*\s+|\n\s*")
+CLAUSE_BOUNDARY = re.compile(r"[,;:、，；—–]\s*")
+WORD_BOUNDARY = re.compile(r"\s+")
+
+
+def _split_span(text, start, end, pattern):
+    """Tách đoạn [start, end) tại các vị trí khớp pattern, giữ nguyên offset"""
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        if match.end() > pos and match.end() < end:
+            yield pos, match.end()
+            pos = match.end()
+    if pos < end:
+        yield pos, end
+
+
+def split_units(text, max_chars=MAX_INPUT_CHARS):
+    """Chia text thành các đoạn (start, end) liên tiếp, mỗi đoạn <= max_chars
+
+    Ưu tiên ranh giới câu, sau đó tới mệnh đề, từ, cuối cùng cắt cứng.
+    """
+    for start, end in _split_span(text, 0, len(text), SENTENCE_BOUNDARY):
+        if end - start <= max_chars:
+            yield start, end
+            continue
+        for c_start, c_end in _split_span(text, start, end, CLAUSE_BOUNDARY):
+            if c_end - c_start <= max_chars:
+                yield c_start, c_end
+                continue
+            for w_start, w_end in _split_span(text, c_start, c_end, WORD_BOUNDARY):
+                # Một "từ" dài hơn giới hạn (URL, chuỗi không khoảng trắng...)
+                yield from _split_even(w_start, w_end, max_chars)
+
+
+def _split_even(start, end, max_chars):
+    """Cắt cứng [start, end) thành ít phần nhất, các phần dài gần bằng nhau"""
+    parts = math.ceil((end - start) / max_chars)
+    for k in range(parts):
+        yield (
+            start + (end - start) * k // parts,
+            start + (end - start) * (k + 1) // parts,
+        )
+
+
+def chunk_text(text, max_chars=MAX_INPUT_CHARS, target_chars=3500):
+    """Chia text thành các chunk có kích thước đều nhau, không chunk nào > max_chars
+
+    Chạy tuyến tính: chỉ duyệt offset và cắt slice của text gốc, không nối chuỗi.
+    Số chunk là ceil(len / target_chars); mỗi lần cắt chọn ranh giới gần nhất với
+    kích thước lý tưởng của phần còn lại để batch song song xong cùng lúc.
+    """
+    units = list(split_units(text, max_chars))
+    return _chunk_units(text, units, max_chars, target_chars)
+
+
+def _chunk_units(text, units, max_chars, target_chars):
+    """Gom các đoạn (start, end) liên tiếp thành chunk (xem chunk_text)"""
+    if not units:
+        return []
+
+    total = units[-1][1] - units[0][0]
+    remaining_chunks = max(1, math.ceil(total / target_chars))
+    boundaries = []
+    chunk_start = units[0][0]
+    ideal = total / remaining_chunks
+
+    for start, end in units:
+        if end - chunk_start > max_chars:
+            # Thêm đoạn này sẽ vượt giới hạn: bắt buộc cắt trước nó
+            cut = start
+        elif end - chunk_start >= ideal and remaining_chunks > 1:
+            # Cắt trước hoặc sau đoạn này, tùy bên nào gần kích thước lý tưởng hơn
+            before = start - chunk_start
+            after = end - chunk_start
+            cut = start if before and ideal - before < after - ideal else end
+        else:
+            continue
+
+        boundaries.append((chunk_start, cut))
+        chunk_start = cut
+        remaining_chunks = max(1, remaining_chunks - 1)
+        ideal = (total - (chunk_start - units[0][0])) / remaining_chunks
+
+    if chunk_start < units[-1][1]:
+        boundaries.append((chunk_start, units[-1][1]))
+
+    chunks = []
+    for start, end in boundaries:
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+
+def find_repeats(keys, lengths, min_chars=200, max_candidates=16, separators=None):
+    """Tìm các dãy đoạn liên tiếp lặp lại nguyên văn trong văn bản
+
+    keys[i] là nội dung của đoạn i, lengths[i] là số ký tự; separators[i]
+    (nếu có) là khoảng trắng sau đoạn i, phải giống nhau ở mọi ranh giới bên
+    trong dãy. Duyệt từ trái sang phải, tại mỗi vị trí chọn dãy dài nhất khớp
+    với các vị trí phía sau mà không chồng lên nhau; chỉ giữ dãy có ít nhất
+    min_chars ký tự. Các lần xuất hiện sau được giữ chỗ với đúng độ dài đó, nên
+    mọi dãy trả về đều có bản sao y hệt. Trả về list (start, end) theo chỉ số
+    đoạn. max_candidates giới hạn số vị trí được so cho mỗi nội dung để văn
+    bản lặp dày không bị O(n²).
+    """
+    positions = {}
+    for i, key in enumerate(keys):
+        positions.setdefault(key, []).append(i)
+
+    n = len(keys)
+    claimed = [False] * n  # đoạn thuộc một lần xuất hiện đã được giữ chỗ
+    forced = {}  # vị trí bắt đầu -> độ dài dãy đã giữ chỗ
+    repeats = []
+    i = 0
+    while i < n:
+        if i in forced:
+            length = forced.pop(i)
+            repeats.append((i, i + length))
+            i += length
+            continue
+
+        matches = []
+        candidates = positions[keys[i]]
+        first = bisect.bisect_right(candidates, i)
+        for j in candidates[first:first + max_candidates]:
+            if claimed[j]:
+                continue
+            # Dãy tại i và tại j không được chồng lên nhau hay lên chỗ đã giữ
+            limit = min(n - j, j - i)
+            length = 0
+            while (
+                length < limit
+                and keys[i + length] == keys[j + length]
+                and not claimed[i + length]
+                and not claimed[j + length]
+            ):
+                length += 1
+                if separators is not None and (
+                    separators[i + length - 1] != separators[j + length - 1]
+                ):
+                    break
+            if length:
+                matches.append((j, length))
+
+        best = max((length for _, length in matches), default=0)
+        if not best or sum(lengths[i:i + best]) < min_chars:
+            i += 1
+            continue
+
+        repeats.append((i, i + best))
+        end = i + best
+        for j, length in matches:
+            if length >= best and j >= end:
+                forced[j] = best
+                for k in range(j, j + best):
+                    claimed[k] = True
+                end = j + best
+        i += best
+    return repeats
+
+
+def _trim_units(text, units):
+    """units với khoảng trắng ở đầu đoạn đầu và cuối đoạn cuối bị bỏ đi"""
+    units = list(units)
+    start, end = units[0]
+    units[0] = (end - len(text[start:end].lstrip()), end)
+    start, end = units[-1]
+    units[-1] = (start, start + len(text[start:end].rstrip()))
+    return units
+
+
+def dedup_chunk_text(
+    text, max_chars=MAX_INPUT_CHARS, target_chars=3500, min_repeat_chars=200
+):
+    """Như chunk_text nhưng căn ranh giới chunk theo các dãy câu lặp lại
+
+    Mỗi dãy câu lặp lại nguyên văn (boilerplate, lời dẫn chương, disclaimer...)
+    được tách thành chunk riêng và chia giống hệt nhau ở mọi vị trí, nên các
+    lần xuất hiện cho ra chunk trùng nhau và chỉ cần tổng hợp một lần. Phần
+    còn lại được chia như chunk_text. Dãy ngắn hơn min_repeat_chars không được
+    tách vì chunk nhỏ tốn thêm request mà tiết kiệm không đáng kể.
+    """
+    units = list(split_units(text, max_chars))
+    keys = []
+    separators = []
+    for start, end in units:
+        body = text[start:end].rstrip()
+        keys.append(body.lstrip())
+        separators.append(text[start + len(body):end])
+    lengths = [len(key) for key in keys]
+    repeats = find_repeats(keys, lengths, min_repeat_chars, separators=separators)
+    if not repeats:
+        return _chunk_units(text, units, max_chars, target_chars)
+
+    chunks = []
+    pos = 0
+    for start, end in repeats + [(len(units), len(units))]:
+        # Phần không lặp trước dãy lặp, rồi chính dãy lặp (bỏ khoảng trắng ở
+        # hai đầu để mọi lần xuất hiện được chia giống hệt nhau)
+        chunks.extend(_chunk_units(text, units[pos:start], max_chars, target_chars))
+        if start < end:
+            run = _trim_units(text, units[start:end])
+            chunks.extend(_chunk_units(text, run, max_chars, target_chars))
+        pos = end
+    return chunks
@@ -0,0 +1,300 @@
+import collections
+import concurrent.futures
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from src.core.audio_buffers import audio_path, release_audio
+from src.core.audio_formats import (
+    PCM_CHANNELS,
+    PCM_SAMPLE_RATE,
+    format_of,
+    parse_wav,
+    wav_header,
+    with_format,
+)
+from src.utils.logger import tracer
+
+
+# Demuxer ffmpeg cho từng định dạng nguồn
+FFMPEG_DEMUXERS = {
+    "mp3": ["-f", "mp3"],
+    "opus": ["-f", "ogg"],
+    "aac": ["-f", "aac"],
+    "flac": ["-f", "flac"],
+    "wav": ["-f", "wav"],
+    "pcm": ["-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", str(PCM_CHANNELS)],
+}
+
+# Codec và muxer cho từng định dạng đích. AAC dùng ADTS để các chunk ghép
+# được bằng cách nối bytes; WAV được tạo từ PCM để header có kích thước đúng.
+FFMPEG_ENCODERS = {
+    "mp3": ["-c:a", "libmp3lame", "-f", "mp3"],
+    "opus": ["-c:a", "libopus", "-application", "voip", "-f", "ogg"],
+    "aac": ["-c:a", "aac", "-f", "adts"],
+    "flac": ["-c:a", "flac", "-f", "flac"],
+    "pcm": [
+        "-c:a", "pcm_s16le", "-ar", str(PCM_SAMPLE_RATE),
+        "-ac", str(PCM_CHANNELS), "-f", "s16le",
+    ],
+}
+
+# Bitrate mặc định cho giọng nói mono
+DEFAULT_BITRATES = {"mp3": "64k", "opus": "32k", "aac": "64k"}
+
+
+class TranscodeError(RuntimeError):
+    """Không chuyển được định dạng (thiếu ffmpeg hoặc ffmpeg báo lỗi)"""
+
+
+def transcode_bytes(data, src_format, dst_format, bitrate=None):
+    """Chuyển audio data từ src_format sang dst_format, trả về bytes
+
+    WAV <-> PCM (24kHz mono) chỉ thêm/bỏ header; các cặp khác gọi ffmpeg
+    qua pipe, không ghi file tạm.
+    """
+    if src_format == dst_format:
+        return bytes(data)
+    if src_format == "pcm" and dst_format == "wav":
+        return wav_header(len(data)) + bytes(data)
+    if src_format == "wav" and dst_format == "pcm":
+        info = parse_wav(data)
+        if (info.sample_rate, info.channels, info.bits) == (
+            PCM_SAMPLE_RATE,
+            PCM_CHANNELS,
+            16,
+        ):
+            return bytes(data[info.data_offset:info.data_offset + info.data_size])
+    if dst_format == "wav":
+        pcm = transcode_bytes(data, src_format, "pcm")
+        return wav_header(len(pcm)) + pcm
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise TranscodeError(
+            f"ffmpeg is required to convert {src_format} to {dst_format}"
+        )
+    bitrate = bitrate or DEFAULT_BITRATES.get(dst_format)
+    command = [ffmpeg, "-loglevel", "error", *FFMPEG_DEMUXERS[src_format]]
+    command += ["-i", "pipe:0"]
+    if bitrate and dst_format in DEFAULT_BITRATES:
+        command += ["-b:a", bitrate]
+    command += [*FFMPEG_ENCODERS[dst_format], "pipe:1"]
+    result = subprocess.run(command, input=bytes(data), capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise TranscodeError(
+            f"ffmpeg failed ({src_format} -> {dst_format}): {message}"
+        )
+    return result.stdout
+
+
+def encode_pcm_file(pcm_path, dst_path, dst_format, bitrate=None):
+    """Encode file PCM (24kHz mono) ra dst_path bằng ffmpeg, không đọc vào bộ nhớ"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise TranscodeError(f"ffmpeg is required to encode {dst_format}")
+    bitrate = bitrate or DEFAULT_BITRATES.get(dst_format)
+    out_dir = os.path.dirname(os.path.abspath(dst_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".transcode_")
+    os.close(fd)
+    command = [ffmpeg, "-y", "-loglevel", "error", *FFMPEG_DEMUXERS["pcm"]]
+    command += ["-i", pcm_path]
+    if bitrate and dst_format in DEFAULT_BITRATES:
+        command += ["-b:a", bitrate]
+    command += [*FFMPEG_ENCODERS[dst_format], tmp_path]
+    try:
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", "replace").strip()
+            raise TranscodeError(f"ffmpeg failed (pcm -> {dst_format}): {message}")
+        os.replace(tmp_path, dst_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dst_path
+
+
+def transcode_file(src_path, dst_path, src_format, dst_format, bitrate=None):
+    """Bản file của transcode_bytes, ghi dst_path atomic (file tạm + rename)"""
+    with open(src_path, "rb") as f:
+        data = transcode_bytes(f.read(), src_format, dst_format, bitrate)
+    out_dir = os.path.dirname(os.path.abspath(dst_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".transcode_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return dst_path
+
+
+class Transcoder:
+    """Chuyển định dạng các chunk đã tổng hợp trong một thread pool
+
+    Mỗi chunk được chuyển ngay khi tải xong, song song với việc tổng hợp các
+    chunk còn lại, nên khi chunk cuối về thì phần lớn việc encode đã xong.
+    Việc nặng chạy trong process ffmpeg (hoặc NumPy, vốn nhả GIL) nên thread
+    là đủ để dùng mọi core, không tốn chi phí khởi động process và pickle
+    audio. Pool được tạo khi cần.
+    """
+
+    def __init__(self, workers=None, bitrate=None, buffers=None, metrics=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.bitrate = bitrate
+        self.buffers = buffers  # AudioBufferStore cho chunk in-memory
+        self.metrics = metrics
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="transcode"
+                )
+            return self._executor
+
+    def submit(self, audio, dst_format, src_format=None, on_done=None):
+        """Chuyển một chunk (đường dẫn hoặc AudioBuffer), trả về Future audio mới
+
+        src_format mặc định suy ra từ đuôi file. Audio gốc được giải phóng khi
+        chuyển xong (bản gốc vẫn nằm trong cache); on_done(audio mới) được gọi
+        trước đó, ví dụ để ghi journal trỏ sang file mới.
+        """
+        path = audio_path(audio)
+        src_format = src_format or format_of(path)
+        if src_format == dst_format:
+            future = concurrent.futures.Future()
+            future.set_result(audio)
+            return future
+
+        executor = self._get_executor()
+        start = time.perf_counter()
+        in_memory = getattr(audio, "in_memory", False)
+        if in_memory:
+            # Cùng process nên dùng thẳng bytes của buffer, không copy
+            future = executor.submit(
+                transcode_bytes,
+                audio.data,
+                src_format,
+                dst_format,
+                self.bitrate,
+            )
+        else:
+            future = executor.submit(
+                transcode_file,
+                os.fspath(audio),
+                with_format(path, dst_format),
+                src_format,
+                dst_format,
+                self.bitrate,
+            )
+
+        def finish(result):
+            if in_memory:
+                result = self.buffers.put(with_format(path, dst_format), result)
+            if on_done is not None:
+                on_done(result)
+            release_audio(audio)
+            return result
+
+        return self._chain(future, finish, start)
+
+    def map(self, func, *iterables, window=None):
+        """Như executor.map (kết quả theo thứ tự, chạy song song) nhưng lười
+
+        Chỉ nộp trước tối đa window việc (mặc định 2 × workers) so với kết quả
+        đã được lấy, nên kết quả lớn (ví dụ PCM đã giải mã) không dồn lại
+        trong bộ nhớ khi bên dùng chậm hơn pool.
+        """
+        executor = self._get_executor()
+        window = window or 2 * self.workers
+        pending = collections.deque()
+        try:
+            for args in zip(*iterables):
+                pending.append(executor.submit(func, *args))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Bên dùng dừng sớm hoặc gặp lỗi: bỏ các việc chưa chạy
+            for future in pending:
+                future.cancel()
+
+    def then(self, future, dst_format, on_done=None):
+        """Future của audio sau khi future (tổng hợp chunk) xong và được chuyển
+
+        Hủy Future trả về cũng hủy future gốc nếu nó chưa chạy. on_done như
+        trong submit.
+        """
+        result = concurrent.futures.Future()
+
+        def on_synthesized(done):
+            if result.cancelled():
+                return
+            try:
+                transcoded = self.submit(done.result(), dst_format, on_done=on_done)
+            except BaseException as e:
+                _set_exception(result, e)
+                return
+            transcoded.add_done_callback(lambda f: _copy_future(f, result))
+
+        result.add_done_callback(
+            lambda f: future.cancel() if f.cancelled() else None
+        )
+        future.add_done_callback(on_synthesized)
+        return result
+
+    def _chain(self, future, finish, start):
+        result = concurrent.futures.Future()
+
+        def on_done(done):
+            try:
+                audio = finish(done.result())
+            except BaseException as e:
+                _set_exception(result, e)
+                return
+            end = time.perf_counter()
+            tracer.complete("transcode", start, end, cat="transcode")
+            if self.metrics is not None:
+                self.metrics.observe("tts_transcode_seconds", end - start)
+            try:
+                result.set_result(audio)
+            except concurrent.futures.InvalidStateError:
+                pass
+
+        future.add_done_callback(on_done)
+        return result
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _set_exception(future, error):
+    try:
+        future.set_exception(error)
+    except concurrent.futures.InvalidStateError:
+        pass  # Consumer đã hủy
+
+
+def _copy_future(source, target):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        _set_exception(target, source.exception())
+    else:
+        try:
+            target.set_result(source.result())
+        except concurrent.futures.InvalidStateError:
+            pass
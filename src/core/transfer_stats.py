@@ -0,0 +1,45 @@
+import threading
+from collections import deque, namedtuple
+
+
+# Một lần tải audio: thời gian tới byte đầu (ttfb) và thời gian truyền phần còn lại
+TransferTiming = namedtuple(
+    "TransferTiming", ["chars", "ttfb", "transfer_time", "bytes"]
+)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class TransferStats:
+    """Ghi nhận TTFB/transfer time của các request gần nhất (thread-safe)"""
+
+    def __init__(self, max_samples=1000):
+        self.timings = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, chars, ttfb, transfer_time, size):
+        timing = TransferTiming(chars, ttfb, transfer_time, size)
+        with self._lock:
+            self.timings.append(timing)
+        return timing
+
+    def get_stats(self):
+        with self._lock:
+            timings = list(self.timings)
+        ttfbs = [t.ttfb for t in timings]
+        transfer_time = sum(t.transfer_time for t in timings)
+        total_bytes = sum(t.bytes for t in timings)
+        return {
+            "requests": len(timings),
+            "ttfb_p50": percentile(ttfbs, 50),
+            "ttfb_p95": percentile(ttfbs, 95),
+            "transfer_p50": percentile([t.transfer_time for t in timings], 50),
+            "bytes": total_bytes,
+            "bytes_per_sec": total_bytes / transfer_time if transfer_time else 0.0,
+        }
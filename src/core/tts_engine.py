@@ -1,192 +1,921 @@
-from openai import OpenAI
+import asyncio
+import inspect
 import os
 import time
-import subprocess
-from queue import Queue
-from threading import Thread
-from datetime import datetime
+from collections import namedtuple
 import concurrent.futures
+import functools
+from src.config import settings as config
+from src.core.audio_buffers import (
+    AudioBufferStore,
+    GrowingBuffer,
+    audio_path,
+    release_audio,
+)
+from src.core.audio_formats import EXTENSIONS, format_of
+from src.core.audio_merger import merge_files
+from src.core.backends import get_backend
+from src.core.backends.base import awrite_stream_to_file, write_stream_to_file
+from src.core.chunk_cache import ChunkCache
+from src.core.concurrency import AimdController
+from src.core.estimator import ThroughputEstimator, predict_latency
+from src.core.hedging import RequestCancelled, RequestHedger
+from src.core.job_journal import JobJournal
+from src.core.metrics import create_tts_metrics
+from src.core.postprocess import PostProcessor, numpy_available
+from src.core.scheduler import RateLimitScheduler, is_cancelled
+from src.core.text_chunker import chunk_text, dedup_chunk_text
+from src.core.transcoder import Transcoder
+from src.core.transfer_stats import TransferStats, percentile
+from src.utils.logger import get_logger, tracer
+
+logger = get_logger(__name__)
+
+# Một chunk trong kế hoạch tổng hợp của job
+ChunkTask = namedtuple(
+    "ChunkTask",
+    ["index", "text", "output_path", "cache_key", "job_id", "done", "response_format"],
+)
 
 
 class TTSEngine:
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers=None,
+        min_workers=None,
+        target_latency=None,
+        adaptive=None,
+        postprocess=None,
+    ):
         self.output_dir = "output"  # Default output directory
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.max_workers = 15
-        self.task_queue = Queue()
-        self.result_queue = Queue()
+        self.model = config.TTS_MODEL
+        self.backend = self.create_backend(config.TTS_BACKEND)
+        self.use_asyncio = config.USE_ASYNCIO
+        self.max_workers = max_workers or config.MAX_WORKERS
+        self.scheduler = RateLimitScheduler(
+            max_in_flight=self.max_workers,
+            requests_per_minute=config.REQUESTS_PER_MINUTE,
+            chars_per_minute=config.CHARS_PER_MINUTE,
+        )
+        # max_workers là trần; AIMD chọn số request đồng thời thực tế
+        self.concurrency = None
+        if config.ADAPTIVE_CONCURRENCY if adaptive is None else adaptive:
+            self.concurrency = AimdController(
+                self.scheduler,
+                min_limit=min_workers or config.MIN_WORKERS,
+                max_limit=self.max_workers,
+                target_latency=target_latency or config.TARGET_LATENCY or None,
+            )
+            self.scheduler.controller = self.concurrency
         self.progress_callback = None
+        self.chunk_callback = None
+        self.response_format = config.TTS_RESPONSE_FORMAT
+        self.backend.check_format(self.response_format)
+        # Định dạng của chunk trả về; khác response_format thì chunk được
+        # chuyển trong thread pool ngay khi tải xong
+        self.output_format = config.TTS_OUTPUT_FORMAT or None
+        self.chunk_size = config.CHUNK_SIZE
+        self.dedup_chunks = config.DEDUP_CHUNKS
+        self.cache = ChunkCache(config.CACHE_DIR, config.CACHE_MAX_BYTES)
+        self.journal = JobJournal(config.JOURNAL_PATH)
+        self.last_job_id = None
+        self.transfer_stats = TransferStats()
+        self.estimator = ThroughputEstimator(self.journal)
+        self.metrics = create_tts_metrics()
+        self.scheduler.metrics = self.metrics
+        # Gửi request dự phòng cho chunk chạy quá lâu (cắt tail latency)
+        self.hedger = None
+        if config.HEDGE_REQUESTS:
+            self.hedger = RequestHedger(
+                self.scheduler,
+                self.hedge_threshold,
+                budget_ratio=config.HEDGE_BUDGET,
+                metrics=self.metrics,
+            )
+        # Chế độ in-memory: chunk là AudioBuffer thay vì file trong output_dir
+        self.buffers = None
+        if config.IN_MEMORY_AUDIO:
+            self.buffers = AudioBufferStore(
+                config.AUDIO_MEMORY_BUDGET, config.AUDIO_SPILL_DIR
+            )
+        self.transcoder = Transcoder(
+            workers=config.TRANSCODE_WORKERS or None,
+            bitrate=config.TRANSCODE_BITRATE,
+            buffers=self.buffers,
+            metrics=self.metrics,
+        )
+        # Cắt lặng, chuẩn hóa loudness và crossfade khi ghép (cần NumPy)
+        self.postprocessor = None
+        if config.POSTPROCESS if postprocess is None else postprocess:
+            if numpy_available():
+                self.postprocessor = PostProcessor(
+                    self.transcoder,
+                    target_lufs=config.TARGET_LUFS,
+                    trim=config.TRIM_SILENCE,
+                    crossfade=config.CROSSFADE_MS / 1000,
+                    threshold_db=config.SILENCE_THRESHOLD_DB,
+                    pad=config.SILENCE_PAD,
+                )
+            else:
+                logger.warning("NumPy is not installed, post-processing disabled")
 
     def set_progress_callback(self, callback):
         """Set callback function để cập nhật tiến trình"""
         self.progress_callback = callback
 
-    def generate_speech(self, text, voice="alloy", settings=None):
-        """Tạo speech từ text"""
+    def set_chunk_callback(self, callback):
+        """Callback(index, audio_file) khi một chunk sẵn sàng theo thứ tự"""
+        self.chunk_callback = callback
+
+    def get_speed(self, settings):
+        return settings.get("pitch", 1.0) if settings else 1.0
+
+    def get_format(self, settings):
+        """Định dạng yêu cầu từ backend cho job (settings["response_format"])"""
+        if settings and settings.get("response_format"):
+            return settings["response_format"]
+        return self.response_format
+
+    def get_output_format(self, settings):
+        """Định dạng của chunk sau bước chuyển (settings["output_format"])"""
+        if settings and settings.get("output_format"):
+            return settings["output_format"]
+        return self.output_format or self.get_format(settings)
+
+    def create_backend(self, name):
+        if name == "openai":
+            return get_backend(name, model=self.model)
+        return get_backend(name)
+
+    def set_backend(self, name):
+        """Đổi backend tổng hợp (openai, offline hoặc backend đã đăng ký)"""
+        backend = self.create_backend(name)
+        backend.check_format(self.response_format)
+        self.backend.close()
+        self.backend = backend
+
+    @property
+    def model_id(self):
+        """Định danh backend + model, dùng trong cache key và job id"""
+        return f"{self.backend.name}/{self.model}"
+
+    def get_cache_stats(self):
+        """Số liệu hit/miss của chunk cache"""
+        return self.cache.get_stats()
+
+    def stream_speech(
+        self, text, voice="alloy", settings=None, on_chunk=None, cancel=None
+    ):
+        """Generator các khối bytes audio ngay khi chúng tới từ backend
+
+        Ghi nhận time-to-first-byte và thời gian truyền vào transfer_stats.
+        on_chunk(data) được gọi với từng khối để chuyển tiếp (ví dụ phát sớm).
+        Khi cancel (threading.Event) được set, dừng tải và đóng kết nối ở khối
+        kế tiếp bằng RequestCancelled.
+        """
+        start = time.perf_counter()
+        first_byte = None
+        size = 0
+        stream = self.backend.stream(
+            text, voice, self.get_speed(settings), self.get_format(settings)
+        )
+        try:
+            for data in stream:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled()
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                size += len(data)
+                if on_chunk:
+                    on_chunk(data)
+                yield data
+        finally:
+            stream.close()
+        self.record_transfer(len(text), start, first_byte, size, voice)
+
+    async def astream_speech(self, text, voice="alloy", settings=None):
+        """Bản async của stream_speech"""
+        start = time.perf_counter()
+        first_byte = None
+        size = 0
+        async for data in self.backend.astream(
+            text, voice, self.get_speed(settings), self.get_format(settings)
+        ):
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            size += len(data)
+            yield data
+        self.record_transfer(len(text), start, first_byte, size, voice)
+
+    def record_transfer(self, chars, start, first_byte, size, voice=None):
+        """Ghi nhận một lần tải xong vào transfer_stats, metrics và estimator"""
+        end = time.perf_counter()
+        first_byte = first_byte or end
+        ttfb = first_byte - start
+        transfer_time = end - first_byte
+        self.transfer_stats.record(chars, ttfb, transfer_time, size)
+        self.metrics.observe("tts_ttfb_seconds", ttfb)
+        self.metrics.observe("tts_transfer_seconds", transfer_time)
+        self.metrics.observe("tts_response_bytes", size)
+        tracer.complete(
+            "download", start, end, chars=chars, bytes=size, ttfb=round(ttfb, 4)
+        )
+        if end > start:
+            self.metrics.observe("tts_chars_per_second", chars / (end - start))
+        if voice is not None:
+            in_flight = self.scheduler.in_flight + self.scheduler.async_in_flight
+            self.estimator.observe_request(
+                self.model_id, voice, chars, end - start, in_flight
+            )
+
+    @property
+    def price_per_1k(self):
+        return config.PRICE_PER_1K_CHARS.get(self.model_id, 0.0)
+
+    def estimate_chunks(self, chunk_sizes, voice=None, calibrated=True):
+        """Dự đoán thời gian (Estimate) để tổng hợp các chunk với số ký tự cho trước
+
+        Dùng giới hạn worker và rate limit hiện tại của scheduler.
+        """
+        return self.estimator.estimate(
+            chunk_sizes,
+            self.model_id,
+            voice=voice,
+            workers=self.scheduler.max_in_flight,
+            requests_per_minute=config.REQUESTS_PER_MINUTE,
+            chars_per_minute=config.CHARS_PER_MINUTE,
+            price_per_1k=self.price_per_1k,
+            calibrated=calibrated,
+        )
+
+    def estimate_text(self, text, voice=None):
+        """Dự đoán thời gian/chi phí chuyển đổi text theo kế hoạch chunk hiện tại"""
+        return self.estimate_chunks(
+            [len(chunk) for chunk in self.optimize_chunk_size(text)], voice
+        )
+
+    def estimate_progress(self, chunk_sizes, completed, elapsed, voice=None):
+        """Dự đoán tổng thời gian của job đang chạy sau completed chunk"""
+        return self.estimator.estimate_remaining(
+            chunk_sizes,
+            completed,
+            elapsed,
+            self.model_id,
+            voice=voice,
+            workers=self.scheduler.max_in_flight,
+            requests_per_minute=config.REQUESTS_PER_MINUTE,
+            chars_per_minute=config.CHARS_PER_MINUTE,
+            price_per_1k=self.price_per_1k,
+        )
+
+    def _predict_run(self, chunk_sizes, voice):
+        """Dự đoán chưa hiệu chỉnh, để so với thời gian thực tế khi job xong"""
+        if not chunk_sizes:
+            return None
+        return self.estimate_chunks(chunk_sizes, voice, calibrated=False)
+
+    def record_run(self, voice, chunk_sizes, predicted, start):
+        """Lưu thời gian thực tế của các chunk vừa tổng hợp để hiệu chỉnh estimator"""
+        if chunk_sizes and predicted is not None:
+            self.estimator.observe_run(
+                self.model_id,
+                chunk_sizes,
+                self.scheduler.max_in_flight,
+                predicted.seconds,
+                time.perf_counter() - start,
+            )
+
+    def get_metrics(self):
+        """Toàn bộ metric dạng dict (xem MetricsRegistry.to_dict)"""
+        return self.metrics.to_dict()
+
+    def export_metrics(self, directory, name="metrics"):
+        """Ghi metrics ra <name>.json và <name>.prom (Prometheus text format)"""
+        return self.metrics.export(directory, name)
+
+    def export_trace(self, path):
+        """Ghi các span đã ghi nhận ra Chrome trace JSON (cần bật tracer)"""
+        return tracer.export_chrome_trace(path)
+
+    def get_concurrency_stats(self):
+        """Giới hạn request đồng thời hiện tại và lịch sử thay đổi"""
+        if self.concurrency is None:
+            limit = self.scheduler.max_in_flight
+            return {"limit": limit, "min": limit, "max": limit, "history": []}
+        return self.concurrency.get_stats()
+
+    def get_transfer_stats(self):
+        """TTFB/transfer time của các request gần nhất"""
+        return self.transfer_stats.get_stats()
+
+    def generate_speech(
+        self, text, voice="alloy", settings=None, on_chunk=None, cancel=None
+    ):
+        """Tạo speech từ text, trả về audio bytes"""
+        try:
+            return b"".join(
+                self.stream_speech(text, voice, settings, on_chunk, cancel)
+            )
+
+        except Exception as e:
+            raise Exception(f"Error generating speech: {str(e)}") from e
+
+    async def generate_speech_async(self, text, voice="alloy", settings=None):
+        """Bản async của generate_speech"""
         try:
-            # Sử dụng text làm input và trả về response
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text,
-                speed=settings.get("pitch", 1.0) if settings else 1.0,
+            return b"".join(
+                [data async for data in self.astream_speech(text, voice, settings)]
             )
-            return response
 
         except Exception as e:
-            raise Exception(f"Error generating speech: {str(e)}")
+            raise Exception(f"Error generating speech: {str(e)}") from e
 
     def generate_speech_with_retry(
         self, chunk, voice="alloy", settings=None, max_retries=3
     ):
-        """Thử lại khi gặp lỗi với exponential backoff"""
-        for attempt in range(max_retries):
-            try:
-                return self.generate_speech(chunk, voice, settings)
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    raise e
-                wait_time = (2**attempt) * 0.5  # 0.5s, 1s, 2s
-                time.sleep(wait_time)
-
-    def worker(self):
-        """Worker thread để xử lý các task từ queue"""
-        while True:
-            task = self.task_queue.get()
-            if task is None:
-                break
-
-            chunk_index, chunk, voice, settings = task
-            try:
-                audio_file = self.generate_speech_with_retry(chunk, voice, settings)
-                self.result_queue.put((chunk_index, audio_file))
-            except Exception as e:
-                self.result_queue.put((chunk_index, None, str(e)))
-            finally:
-                self.task_queue.task_done()
+        """Thử lại khi gặp lỗi, chờ theo Retry-After hoặc exponential backoff"""
+        return self.scheduler.call(
+            self.generate_speech,
+            chunk,
+            voice,
+            settings,
+            cost=len(chunk),
+            max_retries=max_retries,
+        )
 
     def optimize_chunk_size(self, text):
-        """Tối ưu kích thước chunk"""
-        optimal_size = 3500
-        chunks = []
-        current_chunk = ""
-        sentences = text.replace("\n", ". ").split(". ")
-
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) + 2 <= optimal_size:
-                current_chunk += sentence + ". "
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + ". "
+        """Tối ưu kích thước chunk: cân bằng, không vượt giới hạn input của API
+
+        Khi bật dedup_chunks, các dãy câu lặp lại được tách thành chunk giống
+        hệt nhau để chỉ tổng hợp một lần (xem dedup_chunk_text).
+        """
+        if self.dedup_chunks:
+            return dedup_chunk_text(
+                text,
+                max_chars=self.backend.max_input_chars,
+                target_chars=self.chunk_size,
+                min_repeat_chars=config.DEDUP_MIN_CHARS,
+            )
+        return chunk_text(
+            text,
+            max_chars=self.backend.max_input_chars,
+            target_chars=self.chunk_size,
+        )
+
+    def get_dedup_savings(self, chunks, voice=None):
+        """Phần tiết kiệm được nhờ chỉ tổng hợp mỗi chunk trùng một lần
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        Trả về dict: số chunk/ký tự tổng và duy nhất, ký tự, tiền (USD) và
+        thời gian (giây, theo estimator) tiết kiệm được.
+        """
+        unique = list(dict.fromkeys(chunks))
+        sizes = [len(chunk) for chunk in chunks]
+        unique_sizes = [len(chunk) for chunk in unique]
+        saved_chars = sum(sizes) - sum(unique_sizes)
+        saved_seconds = 0.0
+        if saved_chars:
+            saved_seconds = max(
+                0.0,
+                self.estimate_chunks(sizes, voice).seconds
+                - self.estimate_chunks(unique_sizes, voice).seconds,
+            )
+        return {
+            "chunks": len(chunks),
+            "unique_chunks": len(unique),
+            "chars": sum(sizes),
+            "unique_chars": sum(unique_sizes),
+            "saved_chars": saved_chars,
+            "saved_cost": saved_chars / 1000 * self.price_per_1k,
+            "saved_seconds": saved_seconds,
+        }
 
-        return chunks
+    def plan_chunks(self, text, voice, settings=None, prefix="segment"):
+        """Chia text thành chunk và đăng ký job trong journal, trả về list ChunkTask
 
-    def generate_speech_parallel(self, text, voice="echo", settings=None):
+        Job được nhận diện theo nội dung và tham số, nên chạy lại cùng job sẽ
+        dùng lại các chunk đã xong (done=True). prefix giúp các job chạy cùng
+        lúc không ghi đè segment của nhau; settings["job_key"] (ví dụ file đầu
+        ra) tách journal của hai job cùng text và tham số.
+        """
         # Create output directory if not exists
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
-            
-        # Get current date for filename
-        current_date = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Split text into chunks
-        chunks = self.optimize_chunk_size(text)
-        audio_files = []
-        
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = []
-            
-            for i, chunk in enumerate(chunks):
-                # Format filename with segment number and date
-                output_path = os.path.join(
-                    self.output_dir, 
-                    f"segment_{i:03d}_{current_date}.mp3"
-                )
-                
-                future = executor.submit(
-                    self.convert_to_speech,  # Sử dụng convert_to_speech thay vì generate_speech
+
+        speed = self.get_speed(settings)
+        response_format = self.get_format(settings)
+        self.backend.check_format(response_format)
+        output_format = self.get_output_format(settings)
+        if output_format not in EXTENSIONS:
+            raise ValueError(f"Unsupported output format '{output_format}'")
+        params = {
+            "voice": voice,
+            "model": self.model_id,
+            "speed": float(speed),
+            "response_format": response_format,
+        }
+        if settings and settings.get("job_key"):
+            params["job_key"] = settings["job_key"]
+        job_id = self.journal.make_job_id(text, **params)
+        with tracer.span("chunking", chars=len(text)) as span:
+            chunks = self.optimize_chunk_size(text)
+            span.set(chunks=len(chunks))
+        finished = self.journal.start_job(job_id, chunks, params)
+        self.last_job_id = job_id
+
+        plan = []
+        for i, chunk in enumerate(chunks):
+            # Tên file cố định theo job để lần chạy lại tìm thấy segment cũ
+            output_path = finished.get(i) or os.path.join(
+                self.output_dir,
+                f"{prefix}_{job_id[:12]}_{i:03d}.{EXTENSIONS[response_format]}",
+            )
+            cache_key = self.cache.make_key(
+                chunk, voice, self.model_id, speed, response_format
+            )
+            plan.append(
+                ChunkTask(
+                    i,
                     chunk,
                     output_path,
-                    voice,
-                    settings
+                    cache_key,
+                    job_id,
+                    i in finished,
+                    response_format,
                 )
-                futures.append(future)
-                
+            )
+        return plan
+
+    def get_job_status(self, job_id=None):
+        """Trạng thái job trong journal (mặc định là job gần nhất)"""
+        return self.journal.get_job(job_id or self.last_job_id)
+
+    def generate_speech_parallel(
+        self, text, voice="echo", settings=None, prefix="segment"
+    ):
+        if self.use_asyncio:
+            return asyncio.run(
+                self._generate_speech_parallel_run(text, voice, settings, prefix)
+            )
+
+        audio_files = []
+        for _, audio_file in self.iter_speech_parallel(
+            text, voice, settings, prefix
+        ):
+            audio_files.append(audio_file)
+        return audio_files
+
+    async def _generate_speech_parallel_run(self, text, voice, settings, prefix):
+        # Mỗi asyncio.run là một event loop mới: đóng client async của backend
+        # trước khi loop đóng để không rò connection pool qua các lần chạy
+        try:
+            return await self.generate_speech_parallel_async(
+                text, voice, settings, prefix=prefix
+            )
+        finally:
+            await self.backend.aclose()
+
+    def iter_speech_parallel(
+        self,
+        text,
+        voice="echo",
+        settings=None,
+        prefix="segment",
+        progress_callback=None,
+        plan_callback=None,
+        stream_callback=None,
+    ):
+        """Generator trả về (index, audio_file) theo đúng thứ tự văn bản
+
+        Mỗi chunk được yield ngay khi nó và mọi chunk trước nó đã xong, nên
+        có thể phát chunk 0 trong khi các chunk sau vẫn đang được tổng hợp.
+        Chunk lỗi bị bỏ qua. plan_callback nhận list ChunkTask trước khi bắt
+        đầu tổng hợp. stream_callback(index, GrowingBuffer) nhận bytes của
+        chunk đầu tiên ngay khi chúng tới, để phát trước khi chunk tải xong.
+        """
+        progress_callback = progress_callback or self.progress_callback
+        plan = self.plan_chunks(text, voice, settings, prefix)
+        output_format = self.get_output_format(settings)
+        if plan_callback:
+            plan_callback(plan)
+        ready = {}  # index -> audio_file, None nếu lỗi
+        next_index = 0
+        completed = 0
+        failed = 0
+        futures = {}  # future -> [index], nhiều index nếu chunk lặp lại
+        primary = {}  # cache_key -> future của lần xuất hiện đầu
+        synthesized = []  # số ký tự của các chunk phải gọi API
+        start = time.perf_counter()
+
+        try:
+            for task in plan:
+                if not task.done and task.cache_key in primary:
+                    # Chunk trùng với chunk trước: dùng lại audio của nó
+                    self.count_chunk(task, None, duplicate=True)
+                    futures[primary[task.cache_key]].append(task.index)
+                    continue
+
+                # Chunk đã xong ở lần chạy trước hoặc có trong cache
+                cached = None if task.done else self.fetch_cached_chunk(task)
+                self.count_chunk(task, cached)
+                if task.done or cached is not None:
+                    future = concurrent.futures.Future()
+                    future.set_result(cached or task.output_path)
+                elif stream_callback and task.index == 0:
+                    # Chunk đầu được chuyển tiếp từng phần để phát trước khi tải xong
+                    stream = GrowingBuffer(task.output_path)
+                    stream_callback(task.index, stream)
+                    future = self.scheduler.submit(
+                        self.synthesize_chunk_streaming,
+                        task,
+                        stream,
+                        voice,
+                        settings,
+                        cost=len(task.text),
+                    )
+                    future.add_done_callback(lambda _, stream=stream: stream.close())
+                else:
+                    # Scheduler giới hạn số request đồng thời, RPM/CPM và thử lại
+                    future = self.submit_chunk(task, voice, settings)
+                if output_format != task.response_format:
+                    # Chuyển định dạng song song với các chunk còn đang tổng hợp
+                    future = self.transcoder.then(
+                        future,
+                        output_format,
+                        on_done=functools.partial(self.mark_transcoded, task),
+                    )
+                if not (task.done or cached is not None):
+                    synthesized.append(len(task.text))
+                if not task.done:
+                    primary[task.cache_key] = future
+                futures[future] = [task.index]
+            predicted = self._predict_run(synthesized, voice)
+
             # Process results as they complete
-            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            for future in concurrent.futures.as_completed(futures):
+                indices = futures[future]
                 try:
-                    audio_file = future.result()
-                    audio_files.append(audio_file)
-                    if self.progress_callback:
-                        self.progress_callback(i + 1, len(chunks))
+                    audio = future.result()
                 except Exception as e:
-                    print(f"Error processing chunk {i}: {str(e)}")
-                    
-        return sorted(audio_files)  # Return sorted to maintain order
+                    audio = None
+                    failed += len(indices)
+                    logger.error("Error processing chunk %d: %s", indices[0], e)
+                else:
+                    self.mark_duplicates_done(plan, indices, audio)
+                for i in indices:
+                    ready[i] = audio
 
-    def combine_audio_files(self, audio_files):
-        """Ghép nhiều file audio thành một file duy nhất"""
-        try:
-            output_file = os.path.join(
-                self.output_dir, f"combined_{int(time.time())}.mp3"
-            )
-
-            list_file = os.path.join(self.output_dir, "files.txt")
-            with open(list_file, "w") as f:
-                for audio_file in audio_files:
-                    abs_path = os.path.abspath(audio_file)
-                    f.write(f"file '{abs_path}'\n")
-
-            cmd = [
-                "ffmpeg",
-                "-loglevel",
-                "error",
-                "-f",
-                "concat",
-                "-safe",
-                "0",
-                "-i",
-                list_file,
-                "-c",
-                "copy",
-                output_file,
-            ]
-
-            subprocess.run(
-                cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-
-            # Cleanup
-            os.remove(list_file)
-            for file in audio_files:
+                completed += len(indices)
+                if progress_callback:
+                    progress_callback(completed, len(plan))
+
+                # Trả về phần đầu liên tục đã hoàn thành
+                while next_index in ready:
+                    audio_file = ready.pop(next_index)
+                    if audio_file is not None:
+                        if self.chunk_callback:
+                            self.chunk_callback(next_index, audio_file)
+                        yield next_index, audio_file
+                    next_index += 1
+
+            if not failed:
+                self.record_run(voice, synthesized, predicted, start)
+        finally:
+            # Consumer dừng sớm: hủy các chunk chưa chạy
+            for future in futures:
+                future.cancel()
+
+    async def generate_speech_parallel_async(
+        self,
+        text,
+        voice="echo",
+        settings=None,
+        progress_callback=None,
+        prefix="segment",
+    ):
+        """Bản asyncio của generate_speech_parallel, kết quả giữ đúng thứ tự chunk
+
+        progress_callback(completed, total) có thể là hàm thường hoặc coroutine.
+        """
+        progress_callback = progress_callback or self.progress_callback
+        plan = self.plan_chunks(text, voice, settings, prefix)
+        output_format = self.get_output_format(settings)
+        completed = 0
+        synthesized = []
+        start = time.perf_counter()
+
+        async def run_chunk(task):
+            audio = task.output_path
+            cached = None
+            if not task.done:
+                cached = await asyncio.to_thread(self.fetch_cached_chunk, task)
+            self.count_chunk(task, cached)
+            if cached is not None:
+                audio = cached
+            elif not task.done:
+                synthesized.append(len(task.text))
                 try:
-                    os.remove(file)
-                except:
-                    pass
+                    if self.buffers is not None:
+                        data = await self.scheduler.acall(
+                            self.generate_speech_async,
+                            task.text,
+                            voice,
+                            settings,
+                            cost=len(task.text),
+                        )
+                        audio = self.buffers.put(task.output_path, data)
+                    else:
+                        await self.scheduler.acall(
+                            self.convert_to_speech_async,
+                            task.text,
+                            task.output_path,
+                            voice,
+                            settings,
+                            cost=len(task.text),
+                        )
+                        data = None
+                except Exception as e:
+                    await asyncio.to_thread(
+                        self.journal.mark_failed, task.job_id, task.index, e
+                    )
+                    raise
+                await asyncio.to_thread(self.store_chunk, task, data)
+            if output_format != task.response_format:
+                audio = await asyncio.wrap_future(
+                    self.transcoder.submit(
+                        audio,
+                        output_format,
+                        on_done=functools.partial(self.mark_transcoded, task),
+                    )
+                )
+            await report_progress()
+            return audio
+
+        async def run_duplicate(task, source, source_job):
+            # Chunk trùng: chờ lần xuất hiện đầu rồi dùng lại audio của nó
+            self.count_chunk(task, None, duplicate=True)
+            audio = await source_job
+            await asyncio.to_thread(
+                self.mark_duplicates_done, plan, [source.index, task.index], audio
+            )
+            await report_progress()
+            return audio
+
+        async def report_progress():
+            nonlocal completed
+            completed += 1
+            if progress_callback:
+                result = progress_callback(completed, len(plan))
+                if inspect.isawaitable(result):
+                    await result
+
+        jobs = []
+        primary = {}  # cache_key -> (task, job) của lần xuất hiện đầu
+        for task in plan:
+            if not task.done and task.cache_key in primary:
+                jobs.append(run_duplicate(task, *primary[task.cache_key]))
+                continue
+            job = asyncio.ensure_future(run_chunk(task))
+            if not task.done:
+                primary[task.cache_key] = (task, job)
+            jobs.append(job)
+
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+
+        if not any(isinstance(result, BaseException) for result in results):
+            # Cache hit chỉ biết được trong lúc chạy nên dự đoán được tính sau
+            predicted = self._predict_run(synthesized, voice)
+            await asyncio.to_thread(
+                self.record_run, voice, synthesized, predicted, start
+            )
+
+        audio_files = []
+        for task, result in zip(plan, results):
+            if isinstance(result, BaseException):
+                logger.error("Error processing chunk %d: %s", task.index, result)
+            else:
+                audio_files.append(result)
+        return audio_files
+
+    def combine_audio_files(self, audio_files, output_file=None):
+        """Ghép nhiều file audio thành một file duy nhất
+
+        Định dạng ghép theo đuôi của chunk (response_format hoặc định dạng đã
+        chuyển), không theo tên output_file.
+        """
+        try:
+            response_format = format_of(
+                audio_path(audio_files[0]), self.output_format or self.response_format
+            )
+            if output_file is None:
+                output_file = os.path.join(
+                    self.output_dir,
+                    f"combined_{int(time.time())}.{EXTENSIONS[response_format]}",
+                )
+
+            merge_start = time.perf_counter()
+            with tracer.span(
+                "merge",
+                files=len(audio_files),
+                format=response_format,
+                postprocess=self.postprocessor is not None,
+            ):
+                if self.postprocessor is not None:
+                    self.postprocessor.combine(
+                        audio_files, output_file, response_format
+                    )
+                else:
+                    merge_files(audio_files, output_file, response_format)
+            self.metrics.observe(
+                "tts_merge_seconds", time.perf_counter() - merge_start
+            )
+
+            # Cleanup: xóa file segment hoặc giải phóng buffer
+            for audio in audio_files:
+                release_audio(audio)
 
             return output_file
 
         except Exception as e:
             raise Exception(f"Error combining audio files: {str(e)}")
 
-    def convert_to_speech(self, text, output_path, voice="alloy", settings=None):
-        """Alias for generate_speech with output_path parameter"""
+    def convert_to_speech(
+        self,
+        text,
+        output_path,
+        voice="alloy",
+        settings=None,
+        on_chunk=None,
+        cancel=None,
+    ):
+        """Tải audio dạng streaming, ghi ra output_path ngay khi bytes tới"""
         try:
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text,
-                speed=settings.get("pitch", 1.0) if settings else 1.0,
+            return write_stream_to_file(
+                self.stream_speech(text, voice, settings, on_chunk, cancel),
+                output_path,
             )
 
-            response.stream_to_file(output_path)
-            return output_path
+        except Exception as e:
+            raise Exception(f"Error generating speech: {str(e)}") from e
 
+    async def convert_to_speech_async(
+        self, text, output_path, voice="alloy", settings=None
+    ):
+        """Bản async của convert_to_speech (AsyncOpenAI với backend openai)"""
+        try:
+            return await awrite_stream_to_file(
+                self.astream_speech(text, voice, settings), output_path
+            )
+
+        except Exception as e:
+            raise Exception(f"Error generating speech: {str(e)}") from e
+
+    def mark_duplicates_done(self, plan, indices, audio):
+        """Ghi journal cho các vị trí dùng lại audio của chunk indices[0]"""
+        source = plan[indices[0]]
+        for i in indices[1:]:
+            self.journal.mark_done(source.job_id, i, audio_path(audio))
+
+    def mark_transcoded(self, task, audio):
+        """Journal trỏ sang chunk đã chuyển định dạng trước khi xóa file gốc
+
+        Nhờ vậy lần chạy lại dùng được chunk đã chuyển thay vì tổng hợp lại.
+        """
+        self.journal.mark_done(task.job_id, task.index, audio_path(audio))
+
+    def count_chunk(self, task, cached, duplicate=False):
+        if duplicate:
+            source = "dedup"
+        elif task.done:
+            source = "resumed"
+        elif cached is not None:
+            source = "cache"
+        else:
+            source = "synthesized"
+        self.metrics.inc("tts_chunks_total", label_value=source)
+
+    def fetch_cached_chunk(self, task):
+        """Lấy chunk từ cache, ghi nhận vào journal nếu hit
+
+        Trả về audio của chunk (đường dẫn hoặc AudioBuffer), None nếu miss.
+        """
+        with tracer.span("cache_lookup", chunk=task.index) as span:
+            audio = self._fetch_cached_chunk(task)
+            span.set(hit=audio is not None)
+        return audio
+
+    def _fetch_cached_chunk(self, task):
+        if self.buffers is not None:
+            data = self.cache.read(task.cache_key)
+            if data is None:
+                return None
+            audio = self.buffers.put(task.output_path, data)
+        elif self.cache.fetch(task.cache_key, task.output_path):
+            audio = task.output_path
+        else:
+            return None
+        self.journal.mark_done(task.job_id, task.index, task.output_path)
+        return audio
+
+    def store_chunk(self, task, data=None):
+        """Lưu chunk vừa tổng hợp vào cache và đánh dấu xong trong journal"""
+        try:
+            if data is not None:
+                self.cache.store_bytes(task.cache_key, data, task.response_format)
+            else:
+                self.cache.store(
+                    task.cache_key, task.output_path, task.response_format
+                )
+        except OSError as e:
+            # Lỗi cache không được làm hỏng kết quả chuyển đổi
+            logger.warning("Error caching chunk %d: %s", task.index, e)
+        self.journal.mark_done(task.job_id, task.index, task.output_path)
+
+    def synthesize_chunk(
+        self, task, voice="alloy", settings=None, on_chunk=None, cancel=None
+    ):
+        """Tổng hợp một ChunkTask, ghi kết quả vào cache và journal
+
+        Trả về đường dẫn file, hoặc AudioBuffer ở chế độ in-memory.
+        """
+        try:
+            if self.buffers is not None:
+                data = self.generate_speech(
+                    task.text, voice, settings, on_chunk, cancel
+                )
+                audio = self.buffers.put(task.output_path, data)
+            else:
+                self.convert_to_speech(
+                    task.text, task.output_path, voice, settings, on_chunk, cancel
+                )
+                data = None
+                audio = task.output_path
         except Exception as e:
-            raise Exception(f"Error generating speech: {str(e)}")
+            # Bị hủy (bên thua khi hedge) không phải lỗi của chunk
+            if not is_cancelled(e):
+                self.journal.mark_failed(task.job_id, task.index, e)
+            raise
+        self.store_chunk(task, data)
+        return audio
+
+    def submit_chunk(self, task, voice="alloy", settings=None):
+        """Đưa chunk vào scheduler, có hedge nếu bật; trả về Future của audio"""
+        if self.hedger is None:
+            return self.scheduler.submit(
+                self.synthesize_chunk, task, voice, settings, cost=len(task.text)
+            )
+
+        # Request dự phòng ghi ra file riêng để hai bên không đè nhau
+        root, ext = os.path.splitext(task.output_path)
+        hedge_task = task._replace(output_path=f"{root}_hedge{ext}")
+        return self.hedger.submit(
+            lambda cancel: self.synthesize_chunk(
+                task, voice, settings, cancel=cancel
+            ),
+            lambda cancel: self.synthesize_chunk(
+                hedge_task, voice, settings, cancel=cancel
+            ),
+            cost=len(task.text),
+            finalize=lambda winner, loser: self.discard_hedge_loser(
+                task, winner, loser
+            ),
+        )
+
+    def discard_hedge_loser(self, task, winner, loser):
+        """Cả hai request của chunk đều xong: giữ bên thắng, bỏ bên thua"""
+        self.journal.mark_done(task.job_id, task.index, audio_path(winner))
+        if audio_path(loser) != audio_path(winner):
+            release_audio(loser)
+
+    def hedge_threshold(self, chars):
+        """Thời gian chạy (giây) mà sau đó chunk chars ký tự được gửi dự phòng
+
+        Là phân vị HEDGE_PERCENTILE của latency dự đoán bởi estimator; None
+        (không hedge) khi chưa đủ lịch sử.
+        """
+        if self.estimator.sample_count(self.model_id) < config.HEDGE_MIN_SAMPLES:
+            return None
+        coef, ratios = self.estimator.get_latency_model(self.model_id)
+        predicted = predict_latency(coef, chars, self.scheduler.max_in_flight)
+        threshold = predicted * percentile(ratios, config.HEDGE_PERCENTILE)
+        return max(config.HEDGE_MIN_DELAY, threshold)
+
+    def get_hedge_stats(self):
+        """Số request dự phòng, tỉ lệ thắng và ký tự đã tiêu thêm"""
+        if self.hedger is None:
+            return None
+        return self.hedger.get_stats()
+
+    def synthesize_chunk_streaming(self, task, stream, voice="alloy", settings=None):
+        """synthesize_chunk và chuyển tiếp bytes vào GrowingBuffer khi chúng tới
+
+        Scheduler có thể gọi lại khi thử lại: nếu lần trước đã chuyển tiếp một
+        phần thì bỏ luồng phát sớm, chunk sẽ được phát khi tải xong.
+        """
+        if stream.size:
+            stream.abandon()
+        on_chunk = None if stream.abandoned else stream.write
+        audio = self.synthesize_chunk(task, voice, settings, on_chunk)
+        stream.close()
+        return audio
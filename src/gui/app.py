@@ -1,9 +1,14 @@
+import time
 import tkinter as tk
 from tkinter import ttk
 from src.core.tts_engine import TTSEngine
 from src.core.audio_player import AudioPlayer
-import time
+from src.core.conversion_service import ConversionService
 from src.gui.audio_list_frame import AudioListFrame
+from src.gui.components.metrics_panel import MetricsPanel
+from src.gui.components.text_stats import TextStatsTracker
+
+PLACEHOLDER_TEXT = "Enter your text here..."
 
 
 class App:
@@ -24,9 +29,13 @@ class App:
         self.root.configure(bg=self.bg_color)
 
         self.tts_engine = TTSEngine()
+        self.conversion_service = ConversionService(self.tts_engine)
+        # job_id -> {"voice", "chunks" (số ký tự), "start"} để cập nhật dự đoán
+        self.running_jobs = {}
 
         self.setup_styles()
         self.setup_ui()
+        self.poll_conversion_events()
 
     def setup_styles(self):
         style = ttk.Style()
@@ -174,6 +183,10 @@ class App:
         voice_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(5, 0))
         self.setup_voice_selection(voice_frame)
 
+        # Số liệu hiệu năng trực tiếp (latency, TTFB, retry...)
+        self.metrics_panel = MetricsPanel(voice_frame, self.tts_engine)
+        self.metrics_panel.pack(fill=tk.X, pady=(10, 0))
+
         # Bottom section for convert button and status
         bottom_section = ttk.Frame(main_container)
         bottom_section.pack(fill=tk.X, pady=(10, 0))
@@ -247,7 +260,7 @@ class App:
 
         self.char_counter = ttk.Label(
             count_frame,
-            text="Characters: 0/4,000",
+            text="Characters: 0",
             style="TLabel",
             background=self.secondary_bg,
         )
@@ -258,6 +271,11 @@ class App:
         )
         self.word_count_label.pack(anchor=tk.W)
 
+        self.chunk_count_label = ttk.Label(
+            count_frame, text="Chunks: 0", style="TLabel", background=self.secondary_bg
+        )
+        self.chunk_count_label.pack(anchor=tk.W, pady=(5, 0))
+
         # Column 2: Time estimates
         time_frame = ttk.Frame(columns_container, style="Dark.TFrame")
         time_frame.pack(side=tk.LEFT, padx=(0, 40))  # Tăng khoảng cách giữa các cột
@@ -292,6 +310,19 @@ class App:
         )
         self.actual_cost_label.pack(anchor=tk.W)
 
+        # Column 4: Chunk preview (kết quả của chunker, tính khi ngừng gõ)
+        preview_frame = ttk.Frame(columns_container, style="Dark.TFrame")
+        preview_frame.pack(side=tk.LEFT, padx=(40, 0))
+
+        self.chunk_preview_var = tk.StringVar(value="")
+        self.chunk_preview = ttk.Combobox(
+            preview_frame,
+            textvariable=self.chunk_preview_var,
+            state="readonly",
+            width=40,
+        )
+        self.chunk_preview.pack(anchor=tk.W)
+
         # Function to draw rounded rectangle
         def draw_rounded_corners(event=None):
             width = self.canvas.winfo_width()
@@ -335,11 +366,17 @@ class App:
         self.canvas.bind("<Configure>", draw_rounded_corners)
 
         # Bind text change events
-        self.text_area.bind("<KeyRelease>", self.update_text_info)
-        self.text_area.bind("<KeyPress>", self.update_text_info)
+        # Thống kê tăng dần theo từng lệnh insert/delete, thay cho quét lại
+        # toàn bộ text mỗi lần nhấn phím
+        self.text_stats = TextStatsTracker(
+            self.text_area,
+            on_counts=self.update_text_info,
+            chunker=self.tts_engine.optimize_chunk_size,
+            on_chunks=self.update_chunk_preview,
+        )
 
         # Default text
-        self.text_area.insert("1.0", "Enter your text here...")
+        self.text_area.insert("1.0", PLACEHOLDER_TEXT)
         self.text_area.bind("<FocusIn>", self.clear_default_text)
         self.text_area.bind("<FocusOut>", self.restore_default_text)
 
@@ -428,13 +465,13 @@ class App:
         voice_combo.pack(fill=tk.X)
 
     def on_focus_in(self, event):
-        if self.text_area.get("1.0", "end-1c") == "Enter your text here...":
+        if self.text_area.get("1.0", "end-1c") == PLACEHOLDER_TEXT:
             self.text_area.delete("1.0", tk.END)
             self.text_area.config(fg=self.text_color)
 
     def on_focus_out(self, event):
         if not self.text_area.get("1.0", "end-1c"):
-            self.text_area.insert("1.0", "Enter your text here...")
+            self.text_area.insert("1.0", PLACEHOLDER_TEXT)
             self.text_area.config(fg=self.label_color)
 
     def format_price(self, price):
@@ -459,35 +496,31 @@ class App:
         """Format số với dấu phẩy ngăn cách hàng nghìn"""
         return f"{number:,}"
 
-    def update_text_info(self, event=None):
-        """Cập nhật thông tin về text khi có thay đổi"""
-        text = self.text_area.get("1.0", tk.END).strip()
-        if text == "Enter your text here...":
+    def is_placeholder(self, stats):
+        return (
+            stats.char_count == len(PLACEHOLDER_TEXT)
+            and self.text_area.get("1.0", "end-1c") == PLACEHOLDER_TEXT
+        )
+
+    def update_text_info(self, stats=None):
+        """Cập nhật thông tin về text từ thống kê tăng dần (đã debounce)"""
+        stats = stats or self.text_stats.stats
+        if self.is_placeholder(stats):
             return
 
         # Đếm ký tự
-        char_count = len(text)
+        char_count = stats.char_count
         formatted_char_count = self.format_number(char_count)
-        self.char_counter.config(text=f"Characters: {formatted_char_count}/4,000")
-        if char_count > 4000:
-            self.char_counter.config(foreground="#FF4444")
-        else:
-            self.char_counter.config(foreground=self.label_color)
+        self.char_counter.config(text=f"Characters: {formatted_char_count}")
 
         # Đếm từ
-        words = text.split()
-        word_count = len(words)
+        word_count = stats.word_count
         formatted_word_count = self.format_number(word_count)
         self.word_count_label.config(text=f"Words: {formatted_word_count}")
 
-        # Ước tính thời gian
-        est_time = round(word_count / 3)  # Rough estimate: ~3 words per second
-        formatted_est_time = self.format_time(est_time)
-        self.time_estimate_label.config(text=f"Est. Time: {formatted_est_time}")
-
-        # Ước tính chi phí
-        # OpenAI TTS pricing: $0.015 per 1,000 characters
-        estimated_cost = (char_count / 1000) * 0.015
+        # Ước tính chi phí theo bảng giá của backend/model đang dùng
+        # (thời gian được ước tính khi chunker tính xong kế hoạch chunk)
+        estimated_cost = (char_count / 1000) * self.tts_engine.price_per_1k
         formatted_cost = self.format_price(estimated_cost)
         self.cost_estimate_label.config(text=f"Est. Cost: {formatted_cost}")
 
@@ -495,47 +528,118 @@ class App:
         self.actual_time_label.config(text="Actual: --")
         self.actual_cost_label.config(text="Actual: --")
 
-    def update_conversion_progress(self, completed, total):
-        """Callback để cập nhật tiến trình"""
+    def update_chunk_preview(self, chunks):
+        """Hiển thị số chunk và đoạn đầu của từng chunk mà chunker sẽ tạo"""
+        if self.is_placeholder(self.text_stats.stats):
+            chunks = []
+        # Chunk lặp lại chỉ được tổng hợp một lần
+        unique = list(dict.fromkeys(chunks))
+        repeated = len(chunks) - len(unique)
+        self.chunk_count_label.config(
+            text=f"Chunks: {self.format_number(len(chunks))}"
+            + (f" ({self.format_number(repeated)} repeated)" if repeated else "")
+        )
+        previews = [
+            f"#{i + 1} ({self.format_number(len(chunk))}): {chunk[:40]}"
+            for i, chunk in enumerate(chunks[:1000])
+        ]
+        self.chunk_preview.config(values=previews)
+        self.chunk_preview_var.set(previews[0] if previews else "")
+
+        # Ước tính thời gian chuyển đổi từ thông lượng đo được ở các job trước
+        estimate = self.tts_engine.estimate_chunks(
+            [len(chunk) for chunk in unique], self.voice_var.get().lower()
+        )
+        self.show_time_estimate(estimate)
+        self.cost_estimate_label.config(
+            text=f"Est. Cost: {self.format_price(estimate.cost)}"
+        )
+
+    def show_time_estimate(self, estimate):
+        """Hiển thị dự đoán thời gian kèm cận trên (p90)"""
+        if not estimate.chunks:
+            self.time_estimate_label.config(text="Est. Time: 0s")
+            return
+        self.time_estimate_label.config(
+            text=f"Est. Time: {self.format_time(estimate.seconds)}"
+            f" (≤ {self.format_time(estimate.high)})"
+        )
+
+    def update_conversion_progress(self, job_id, completed, total):
+        """Cập nhật tiến trình và dự đoán thời gian còn lại (chỉ gọi trên main thread)"""
         percentage = (completed / total) * 100
+        pending = self.conversion_service.pending_count()
+        queued = f" - {pending} queued" if pending else ""
+        eta = ""
+        job = self.running_jobs.get(job_id)
+        if job is not None and job["chunks"]:
+            elapsed = time.monotonic() - job["start"]
+            estimate = self.tts_engine.estimate_progress(
+                job["chunks"], completed, elapsed, job["voice"]
+            )
+            self.show_time_estimate(estimate)
+            remaining = max(0.0, estimate.seconds - elapsed)
+            eta = f" - ~{self.format_time(remaining)} left"
         self.status_label.config(
-            text=f"Converting... {completed}/{total} chunks ({percentage:.1f}%)"
+            text=f"Converting... {completed}/{total} chunks ({percentage:.1f}%){eta}{queued}"
         )
-        self.root.update()
 
     def convert_to_speech(self):
-        try:
-            text = self.text_area.get("1.0", tk.END).strip()
-            if not text or text == "Enter your text here...":
-                self.status_label.config(text="Please enter some text!")
-                return
-
-            self.status_label.config(text="Starting conversion...")
-            self.root.update()
+        text = self.text_area.get("1.0", tk.END).strip()
+        if not text or text == PLACEHOLDER_TEXT:
+            self.status_label.config(text="Please enter some text!")
+            return
 
-            start_time = time.time()
-            voice = self.voice_var.get().lower()
-            settings = {}
+        voice = self.voice_var.get().lower()
+        settings = {}
 
-            def update_progress(completed, total):
-                percentage = (completed / total) * 100
-                self.status_label.config(
-                    text=f"Converting... {completed}/{total} chunks ({percentage:.1f}%)"
-                )
-                self.root.update()
+        # Job chạy ở background, kết quả trả về qua poll_conversion_events
+        job_id = self.conversion_service.submit(text, voice, settings)
+        self.running_jobs[job_id] = {"voice": voice, "chunks": [], "start": None}
+        if self.conversion_service.active_job is None:
+            self.status_label.config(text="Starting conversion...")
+        else:
+            self.status_label.config(text=f"Conversion #{job_id} queued")
+
+    def poll_conversion_events(self):
+        """Xử lý sự kiện từ ConversionService trên main thread (~60 lần/giây)"""
+        for event in self.conversion_service.poll():
+            self.handle_conversion_event(event)
+        self.root.after(16, self.poll_conversion_events)
+
+    def handle_conversion_event(self, event):
+        if event.kind == "planned":
+            self.audio_list.add_plan(event.job_id, event.data["chunks"])
+            job = self.running_jobs.get(event.job_id)
+            if job is not None:
+                job["chunks"] = [chars for _, chars in event.data["chunks"]]
+                job["start"] = time.monotonic()
+
+        elif event.kind == "stream":
+            # Bắt đầu phát chunk đầu trong khi nó vẫn đang tải
+            self.audio_list.play_stream(
+                event.data["stream"], event.job_id, event.data["index"]
+            )
 
-            self.tts_engine.set_progress_callback(update_progress)
+        elif event.kind == "progress":
+            self.update_conversion_progress(
+                event.job_id, event.data["completed"], event.data["total"]
+            )
 
-            # Xử lý text và tạo audio
-            audio_files = self.tts_engine.generate_speech_parallel(
-                text, voice, settings
+        elif event.kind == "chunk":
+            # Phát ngay từng chunk theo thứ tự khi sẵn sàng
+            self.audio_list.stream_audio(
+                event.data["path"], event.job_id, event.data["index"]
             )
 
+        elif event.kind == "done":
+            self.audio_list.finish_job(event.job_id)
+            self.running_jobs.pop(event.job_id, None)
+
             # Cập nhật thông tin
-            end_time = time.time()
-            actual_time = end_time - start_time
+            actual_time = event.data["elapsed"]
             formatted_time = self.format_time(actual_time)
-            actual_cost = (len(text) / 1000) * 0.015
+            actual_cost = (event.data["chars"] / 1000) * self.tts_engine.price_per_1k
             formatted_cost = self.format_price(actual_cost)
 
             # Cập nhật actual time và cost
@@ -543,30 +647,26 @@ class App:
             self.actual_cost_label.config(text=f"Actual: {formatted_cost}")
 
             self.status_label.config(
-                text=f"Conversion completed! ({self.format_number(len(text))} characters in {formatted_time})"
+                text=f"Conversion completed! ({self.format_number(event.data['chars'])} characters in {formatted_time})"
             )
 
-            # Add audio files to the list
-            for audio_file in audio_files:
-                self.audio_list.add_audio(audio_file)
-
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}")
+        elif event.kind == "error":
+            self.audio_list.finish_job(event.job_id)
+            self.running_jobs.pop(event.job_id, None)
+            self.status_label.config(text=f"Error: {event.data['error']}")
 
     def run(self):
         self.root.mainloop()
 
     def clear_default_text(self, event):
         """Xóa text mặc định khi focus vào text area"""
-        if self.text_area.get("1.0", tk.END).strip() == "Enter your text here...":
+        if self.text_area.get("1.0", tk.END).strip() == PLACEHOLDER_TEXT:
             self.text_area.delete("1.0", tk.END)
             self.text_area.config(fg=self.text_color)
-            self.update_text_info()
 
     def restore_default_text(self, event):
         """Khôi phục text mặc định khi không có nội dung và mất focus"""
         if not self.text_area.get("1.0", tk.END).strip():
             self.text_area.delete("1.0", tk.END)
-            self.text_area.insert("1.0", "Enter your text here...")
+            self.text_area.insert("1.0", PLACEHOLDER_TEXT)
             self.text_area.config(fg=self.label_color)
-            self.update_text_info()
@@ -1,13 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
-import pygame
-from src.core.audio_merger import AudioMerger
+from src.core.audio_player import AudioPlayer
+from src.gui.components.chunk_list import FAILED, PENDING, READY, VirtualChunkList
 
 class AudioListFrame(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
-        self.audio_merger = AudioMerger()
-        self.audio_files = []
+        self._job_rows = {}  # job_id -> số chunk đã lên kế hoạch
+        self._streams = {}  # (job_id, index) -> GrowingBuffer đang phát dần
+        self._added = 0
         
         # Title Label
         title_frame = ttk.Frame(self)
@@ -22,30 +23,36 @@ class AudioListFrame(ttk.Frame):
         self.main_container = ttk.Frame(self, style="Dark.TFrame")
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
         
-        # Create listbox with scrollbar
-        list_frame = ttk.Frame(self.main_container)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Listbox with better styling
-        self.listbox = tk.Listbox(
-            list_frame,
-            width=70,
-            height=15,
-            bg="#2D2D2D",
-            fg="#FFFFFF",
-            selectbackground="#0D7377",
-            selectforeground="#FFFFFF",
-            font=("Helvetica", 11),
-            activestyle='none',
-            yscrollcommand=scrollbar.set
+        # Danh sách ảo hóa: chỉ vẽ các hàng đang hiển thị
+        self.chunk_list = VirtualChunkList(
+            self.main_container,
+            metadata_loader=AudioPlayer.get_file_duration,
+            on_activate=self.play_row,
         )
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.listbox.yview)
-        
+        self.chunk_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Timeline chung của playlist: kéo để seek qua mọi chunk
+        timeline_frame = ttk.Frame(self.main_container)
+        timeline_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+
+        self.timeline_var = tk.DoubleVar(value=0.0)
+        self.timeline_scale = ttk.Scale(
+            timeline_frame,
+            from_=0.0,
+            to=1.0,
+            variable=self.timeline_var,
+            orient=tk.HORIZONTAL,
+        )
+        self.timeline_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.timeline_scale.bind("<ButtonPress-1>", self._on_seek_start)
+        self.timeline_scale.bind("<ButtonRelease-1>", self._on_seek_end)
+        self._seeking = False
+
+        self.position_label = ttk.Label(
+            timeline_frame, text="0:00 / 0:00", style="Status.TLabel"
+        )
+        self.position_label.pack(side=tk.RIGHT, padx=(10, 0))
+
         # Controls frame
         controls_frame = ttk.Frame(self.main_container)
         controls_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -59,6 +66,15 @@ class AudioListFrame(ttk.Frame):
         )
         self.play_btn.pack(side=tk.LEFT, padx=5)
         
+        # Phát liền mạch mọi chunk đã sẵn sàng, không cần ghép file trước
+        self.play_all_btn = ttk.Button(
+            controls_frame,
+            text="⏯ Play All",
+            command=self.play_all,
+            style="Audio.TButton"
+        )
+        self.play_all_btn.pack(side=tk.LEFT, padx=5)
+
         # Stop button
         self.stop_btn = ttk.Button(
             controls_frame,
@@ -76,36 +92,138 @@ class AudioListFrame(ttk.Frame):
         )
         self.status_label.pack(side=tk.RIGHT, padx=5)
         
-        # Initialize pygame mixer
-        pygame.mixer.init()
+        # Initialize audio player
+        self.player = AudioPlayer()
+        self._poll_player()
     
+    @property
+    def audio_files(self):
+        return self.chunk_list.model.paths
+
     def add_audio(self, audio_path):
-        self.audio_files.append(audio_path)
-        # Format filename nicely
-        filename = audio_path.split("/")[-1]
-        chunk_num = len(self.audio_files)
-        display_text = f"Chunk {chunk_num}: {filename}"
-        self.listbox.insert(tk.END, display_text)
-        self.audio_merger.add_audio(audio_path)
-        
-        # Auto-select first item if it's the only one
-        if len(self.audio_files) == 1:
-            self.listbox.selection_set(0)
+        self.add_audio_files([audio_path])
+
+    def add_audio_files(self, audio_paths):
+        """Thêm nhiều file một lần (một lần vẽ lại cho cả lô)"""
+        rows = []
+        for path in audio_paths:
+            self._added += 1
+            rows.append((("file", self._added), path, 0, READY))
+        self.chunk_list.add_rows(rows)
+
+    def add_plan(self, job_id, chunks):
+        """Thêm trước các hàng pending cho mọi chunk (index, chars) của job
+
+        Lần chuyển đổi mới (không còn job nào đang chạy) thay thế danh sách
+        và playlist cũ, nên bộ nhớ không tăng theo số lần chuyển đổi.
+        """
+        if not self._job_rows:
+            self.reset()
+        self._job_rows[job_id] = len(chunks)
+        self.chunk_list.add_rows(
+            ((job_id, index), None, chars, PENDING) for index, chars in chunks
+        )
+
+    def reset(self):
+        """Bỏ mọi hàng, playlist và timeline của các lần chuyển đổi trước"""
+        self.player.set_playlist([])
+        self.chunk_list.clear()
+        self._streams = {}
+        self._added = 0
+        self.timeline_var.set(0.0)
+        self.status_label.config(text="Ready")
+
+    def finish_job(self, job_id):
+        """Đánh dấu failed các chunk của job không có file khi job kết thúc"""
+        self._streams = {
+            key: stream for key, stream in self._streams.items() if key[0] != job_id
+        }
+        for index in range(self._job_rows.pop(job_id, 0)):
+            row = self.chunk_list.model.row_of((job_id, index))
+            if row is not None and self.chunk_list.model.statuses[row] == PENDING:
+                self.chunk_list.update_row((job_id, index), status=FAILED)
+
+    def play_stream(self, stream, job_id, index):
+        """Phát chunk đang tải, phần còn lại được nối vào khi tới"""
+        if self.player.play_progressive(stream):
+            self._streams[(job_id, index)] = stream
+            self.status_label.config(text="Playing...")
+
+    def stream_audio(self, audio_path, job_id=None, index=None):
+        """Đánh dấu chunk vừa tổng hợp xong và phát nối tiếp theo thứ tự"""
+        if self.chunk_list.update_row((job_id, index), audio_path, READY) is None:
+            self.add_audio(audio_path)
+        stream = self._streams.pop((job_id, index), None)
+        if stream is None or stream.abandoned:
+            self.player.enqueue(audio_path)
+        self.status_label.config(text="Playing...")
+
+    def _poll_player(self):
+        self.player.update()
+        self._update_timeline()
+        self.after(50, self._poll_player)
+
+    def _update_timeline(self):
+        total = self.player.get_total_duration()
+        position = self.player.get_global_pos()
+        self.timeline_scale.config(to=max(total, 1.0))
+        if not self._seeking:
+            self.timeline_var.set(position)
+        self.position_label.config(
+            text=f"{self.format_time(position)} / {self.format_time(total)}"
+        )
+
+    @staticmethod
+    def format_time(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        return f"{minutes}:{seconds:02d}"
+
+    def _on_seek_start(self, event):
+        self._seeking = True
+
+    def _on_seek_end(self, event):
+        self._seeking = False
+        if len(self.player.timeline):
+            self.player.seek_global(self.timeline_var.get())
+            self.status_label.config(text="Playing...")
+
+    def play_all(self):
+        """Phát mọi chunk đã sẵn sàng liền mạch, bắt đầu từ chunk đang chọn"""
+        model = self.chunk_list.model
+        ready = [
+            (row, path) for row, path in enumerate(model.paths) if path is not None
+        ]
+        if not ready:
+            self.status_label.config(text="No audio chunks yet")
+            return
+
+        self.player.set_playlist([path for _, path in ready])
+        selected = self.chunk_list.selected or 0
+        position = next(
+            (i for i, (row, _) in enumerate(ready) if row >= selected), 0
+        )
+        self.player.play_playlist(self.player.timeline.starts[position])
+        self.status_label.config(text="Playing...")
     
     def play_selected(self):
-        selection = self.listbox.curselection()
-        if not selection:
+        if self.chunk_list.selected is None:
             self.status_label.config(text="Please select an audio chunk")
             return
-            
-        selected_file = self.audio_files[selection[0]]
+        self.play_row(self.chunk_list.selected)
+
+    def play_row(self, row):
+        selected_file = self.chunk_list.model.paths[row]
+        if selected_file is None:
+            self.status_label.config(text="Chunk is not ready yet")
+            return
         try:
-            pygame.mixer.music.load(selected_file)
-            pygame.mixer.music.play()
+            self.player.stop()
+            self.player.load(selected_file)
+            self.player.play()
             self.status_label.config(text="Playing...")
         except Exception as e:
             self.status_label.config(text="Error playing audio")
-    
+
     def stop_playback(self):
-        pygame.mixer.music.stop()
+        self.player.stop()
         self.status_label.config(text="Stopped") 
\ No newline at end of file
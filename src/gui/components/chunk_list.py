@@ -0,0 +1,298 @@
+import tkinter as tk
+from tkinter import ttk
+
+from src.core.audio_buffers import audio_name
+
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class ChunkListModel:
+    """Dữ liệu của danh sách chunk, lưu theo cột để thêm hàng loạt cho nhanh
+
+    Mỗi hàng có key (ví dụ (job_id, index)), đường dẫn file, số ký tự, trạng
+    thái và thời lượng. Thời lượng là None cho tới khi được tải lười.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self.chars = []
+        self.statuses = []
+        self.durations = []
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add_rows(self, rows):
+        """Thêm nhiều hàng (key, path, chars, status) một lần, trả về hàng đầu tiên"""
+        first = len(self.paths)
+        for key, path, chars, status in rows:
+            self._rows[key] = len(self.paths)
+            self.paths.append(path)
+            self.chars.append(chars)
+            self.statuses.append(status)
+            self.durations.append(None)
+        return first
+
+    def row_of(self, key):
+        return self._rows.get(key)
+
+    def update(self, key, path=None, status=None):
+        """Cập nhật hàng theo key, trả về số thứ tự hàng (None nếu không có)"""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if path is not None:
+            self.paths[row] = path
+            self.durations[row] = None
+        if status is not None:
+            self.statuses[row] = status
+        return row
+
+    def clear(self):
+        self.__init__()
+
+
+class VirtualChunkList(ttk.Frame):
+    """Danh sách chunk ảo hóa: chỉ vẽ các hàng đang hiển thị trên Canvas
+
+    Số item trên Canvas chỉ phụ thuộc chiều cao khung nhìn, nên thêm hàng
+    nghìn chunk chỉ là thêm phần tử vào model. Thời lượng của các hàng đang
+    hiển thị được tải dần qua metadata_loader(path) trong các lần after.
+    """
+
+    # (tên cột, tọa độ x)
+    columns = (
+        ("label", 10),
+        ("status", 100),
+        ("chars", 180),
+        ("duration", 280),
+        ("name", 350),
+    )
+
+    def __init__(
+        self,
+        parent,
+        model=None,
+        metadata_loader=None,
+        row_height=24,
+        bg="#2D2D2D",
+        fg="#FFFFFF",
+        muted="#CCCCCC",
+        select_bg="#0D7377",
+        font=("Helvetica", 11),
+        on_activate=None,
+    ):
+        super().__init__(parent)
+        self.model = model or ChunkListModel()
+        self.metadata_loader = metadata_loader
+        self.row_height = row_height
+        self.bg = bg
+        self.fg = fg
+        self.muted = muted
+        self.select_bg = select_bg
+        self.font = font
+        self.on_activate = on_activate
+
+        self.top = 0
+        self.selected = None
+        self._pool = []
+        self._render_job = None
+        self._metadata_job = None
+        self._metadata_queue = []
+
+        scrollbar = ttk.Scrollbar(self, command=self.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar = scrollbar
+
+        self.canvas = tk.Canvas(
+            self, bg=bg, highlightthickness=0, bd=0, width=560, height=360
+        )
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.yview("scroll", -3, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.yview("scroll", 3, "units"))
+        self.canvas.bind("<Up>", lambda event: self.move_selection(-1))
+        self.canvas.bind("<Down>", lambda event: self.move_selection(1))
+
+    # --- Dữ liệu ---
+
+    def add_rows(self, rows):
+        """Thêm nhiều hàng rồi vẽ lại một lần"""
+        first = self.model.add_rows(rows)
+        if self.selected is None and len(self.model):
+            self.selected = first
+        self.refresh()
+        return first
+
+    def update_row(self, key, path=None, status=None):
+        row = self.model.update(key, path=path, status=status)
+        if row is not None and self.is_visible(row):
+            self.refresh()
+        return row
+
+    def clear(self):
+        self.model.clear()
+        self.top = 0
+        self.selected = None
+        self._metadata_queue = []
+        self.refresh()
+
+    def selected_path(self):
+        if self.selected is None or self.selected >= len(self.model):
+            return None
+        return self.model.paths[self.selected]
+
+    # --- Cuộn ---
+
+    def visible_rows(self):
+        height = max(self.canvas.winfo_height(), self.row_height)
+        return height // self.row_height + 1
+
+    def is_visible(self, row):
+        return self.top <= row < self.top + self.visible_rows()
+
+    def yview(self, *args):
+        total = len(self.model)
+        page = max(1, self.visible_rows() - 1)
+        if args and args[0] == "moveto":
+            top = int(float(args[1]) * total)
+        elif args and args[0] == "scroll":
+            step = page if args[2] == "pages" else 1
+            top = self.top + int(args[1]) * step
+        else:
+            return
+        self.scroll_to(top)
+
+    def scroll_to(self, top):
+        max_top = max(0, len(self.model) - self.visible_rows() + 1)
+        top = max(0, min(int(top), max_top))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def see(self, row):
+        if row < self.top:
+            self.scroll_to(row)
+        elif row >= self.top + self.visible_rows() - 1:
+            self.scroll_to(row - self.visible_rows() + 2)
+
+    def move_selection(self, delta):
+        if not len(self.model):
+            return
+        current = self.selected if self.selected is not None else -1
+        self.selected = max(0, min(current + delta, len(self.model) - 1))
+        self.see(self.selected)
+        self.refresh()
+
+    def _on_wheel(self, event):
+        self.yview("scroll", -3 if event.delta > 0 else 3, "units")
+
+    def _row_at(self, y):
+        row = self.top + int(y // self.row_height)
+        return row if row < len(self.model) else None
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        row = self._row_at(event.y)
+        if row is not None:
+            self.selected = row
+            self.refresh()
+
+    def _on_double_click(self, event):
+        row = self._row_at(event.y)
+        if row is not None and self.on_activate:
+            self.on_activate(row)
+
+    # --- Vẽ ---
+
+    def refresh(self):
+        """Gộp nhiều thay đổi liên tiếp thành một lần vẽ"""
+        if self._render_job is None:
+            self._render_job = self.after_idle(self.render)
+
+    def _ensure_pool(self, count):
+        width = self.canvas.winfo_width()
+        while len(self._pool) < count:
+            y = len(self._pool) * self.row_height
+            rect = self.canvas.create_rectangle(
+                0, y, width, y + self.row_height, width=0, fill=self.bg
+            )
+            texts = [
+                self.canvas.create_text(
+                    x, y + self.row_height // 2, anchor=tk.W, font=self.font,
+                    fill=self.fg if name in ("label", "name") else self.muted,
+                )
+                for name, x in self.columns
+            ]
+            self._pool.append((rect, texts))
+
+    def render(self):
+        self._render_job = None
+        model = self.model
+        count = self.visible_rows()
+        self._ensure_pool(count)
+        width = self.canvas.winfo_width()
+        missing = []
+
+        for i, (rect, texts) in enumerate(self._pool):
+            row = self.top + i
+            y = i * self.row_height
+            if i >= count or row >= len(model):
+                self.canvas.itemconfigure(rect, state=tk.HIDDEN)
+                for item in texts:
+                    self.canvas.itemconfigure(item, state=tk.HIDDEN)
+                continue
+
+            duration = model.durations[row]
+            if duration is None and model.statuses[row] == READY:
+                missing.append(row)
+            values = (
+                f"Chunk {row + 1}",
+                model.statuses[row],
+                f"{model.chars[row]:,} chars" if model.chars[row] else "",
+                f"{duration:.1f}s" if duration else "",
+                audio_name(model.paths[row]),
+            )
+            self.canvas.coords(rect, 0, y, width, y + self.row_height)
+            self.canvas.itemconfigure(
+                rect,
+                state=tk.NORMAL,
+                fill=self.select_bg if row == self.selected else self.bg,
+            )
+            for item, value in zip(texts, values):
+                self.canvas.itemconfigure(item, text=value, state=tk.NORMAL)
+
+        total = len(model)
+        if total:
+            first = self.top / total
+            last = min(1.0, (self.top + count - 1) / total)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0, 1)
+
+        self._metadata_queue = missing
+        if missing and self.metadata_loader and self._metadata_job is None:
+            self._metadata_job = self.after(1, self._load_metadata)
+
+    def _load_metadata(self, batch=16):
+        """Tải thời lượng cho một ít hàng đang hiển thị mỗi lần, tránh khựng UI"""
+        self._metadata_job = None
+        loaded = False
+        for row in self._metadata_queue[:batch]:
+            if row >= len(self.model) or self.model.durations[row] is not None:
+                continue
+            try:
+                self.model.durations[row] = self.metadata_loader(self.model.paths[row])
+            except Exception:
+                self.model.durations[row] = 0.0
+            loaded = True
+        if loaded:
+            self.refresh()
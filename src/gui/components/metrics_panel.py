@@ -0,0 +1,95 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+
+
+class MetricsPanel(ttk.Frame):
+    """Bảng tóm tắt metric của TTSEngine, tự cập nhật định kỳ"""
+
+    # (nhãn, hàm lấy giá trị từ dict metrics)
+    rows = (
+        ("Requests", lambda m: f"{m['tts_request_seconds']['count']:,}"),
+        ("Concurrency", lambda m: _limit_text(m["concurrency"])),
+        ("Latency p50/p95", lambda m: _seconds_pair(m["tts_request_seconds"])),
+        ("TTFB p50/p95", lambda m: _seconds_pair(m["tts_ttfb_seconds"])),
+        ("Queue wait p50", lambda m: f"{m['tts_queue_wait_seconds']['p50']:.2f}s"),
+        ("Chars/s p50", lambda m: f"{m['tts_chars_per_second']['p50']:,.0f}"),
+        ("Received", lambda m: _format_bytes(m["tts_response_bytes"]["sum"])),
+        ("Retries", lambda m: _counter_text(m["tts_retries_total"])),
+        ("Hedges won", lambda m: _hedge_text(m["hedging"])),
+        ("Errors", lambda m: _counter_text(m["tts_request_errors_total"])),
+        ("Chunks", lambda m: _counter_text(m["tts_chunks_total"])),
+        ("Merge p50", lambda m: f"{m['tts_merge_seconds']['p50']:.2f}s"),
+    )
+
+    def __init__(self, parent, engine, interval=1000, export_dir="output/metrics"):
+        super().__init__(parent, style="Dark.TFrame")
+        self.engine = engine
+        self.interval = interval
+        self.export_dir = export_dir
+        self.value_labels = {}
+
+        ttk.Label(self, text="Metrics", style="Header.TLabel").grid(
+            row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5)
+        )
+        for i, (name, _) in enumerate(self.rows, start=1):
+            ttk.Label(self, text=name, style="TLabel").grid(
+                row=i, column=0, sticky=tk.W, padx=(0, 10)
+            )
+            value = ttk.Label(self, text="--", style="TLabel")
+            value.grid(row=i, column=1, sticky=tk.E)
+            self.value_labels[name] = value
+
+        export_btn = ttk.Button(
+            self, text="Export", style="Audio.TButton", command=self.export
+        )
+        export_btn.grid(
+            row=len(self.rows) + 1, column=0, columnspan=2, sticky=tk.EW, pady=(5, 0)
+        )
+        self.export_label = ttk.Label(self, text="", style="TLabel")
+        self.export_label.grid(row=len(self.rows) + 2, column=0, columnspan=2, sticky=tk.W)
+
+        self.refresh()
+
+    def refresh(self):
+        metrics = self.engine.get_metrics()
+        metrics["concurrency"] = self.engine.get_concurrency_stats()
+        metrics["hedging"] = self.engine.get_hedge_stats()
+        for name, getter in self.rows:
+            try:
+                text = getter(metrics)
+            except (KeyError, TypeError):
+                text = "--"
+            self.value_labels[name].config(text=text)
+        self.after(self.interval, self.refresh)
+
+    def export(self):
+        json_path, _ = self.engine.export_metrics(self.export_dir)
+        self.export_label.config(text=f"Saved to {os.path.dirname(json_path)}")
+
+
+def _hedge_text(stats):
+    return f"{stats['won']}/{stats['launched']} ({stats['win_rate']:.0%})"
+
+
+def _limit_text(stats):
+    return f"{stats['limit']} ({stats['min']}-{stats['max']})"
+
+
+def _seconds_pair(histogram):
+    return f"{histogram['p50']:.2f}s / {histogram['p95']:.2f}s"
+
+
+def _counter_text(counter):
+    if not counter["total"]:
+        return "0"
+    parts = ", ".join(f"{k}: {v}" for k, v in sorted(counter["values"].items()))
+    return f"{counter['total']} ({parts})"
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
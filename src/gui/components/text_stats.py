@@ -0,0 +1,175 @@
+import concurrent.futures
+
+
+class TextStatistics:
+    """Đếm ký tự/từ/dòng và cập nhật tăng dần khi text thay đổi
+
+    Mỗi lần sửa chỉ cần đoạn text quanh vùng sửa trước và sau khi sửa, mở
+    rộng thêm một ký tự mỗi bên: từ bắt đầu ở ký tự đầu đoạn được đếm ở cả
+    hai phía nên triệt tiêu, còn ký tự cuối đoạn quyết định từ phía sau có
+    nối với đoạn hay không. Chênh lệch số đếm của hai đoạn là chênh lệch của
+    cả text, nên dòng dài (ví dụ văn bản 5MB một đoạn) không bị đếm lại.
+    """
+
+    def __init__(self):
+        self.char_count = 0
+        self.word_count = 0
+        self.line_count = 1
+
+    def reset(self, text):
+        self.char_count = len(text)
+        self.word_count = len(text.split())
+        self.line_count = text.count("\n") + 1
+
+    def replace(self, old, new):
+        """Đoạn old (kèm một ký tự mỗi bên nếu có) được thay bằng new"""
+        self.char_count += len(new) - len(old)
+        self.word_count += len(new.split()) - len(old.split())
+        self.line_count += new.count("\n") - old.count("\n")
+
+
+class TextStatsTracker:
+    """Theo dõi thay đổi của tk.Text qua proxy lệnh widget
+
+    Lệnh insert/delete/replace của widget được chặn để biết chính xác vùng
+    bị sửa, nên mỗi phím gõ chỉ tốn công đếm lại vài ký tự. Cập nhật số
+    đếm được debounce; kế hoạch chunk (chạy chunker trên toàn bộ text) chỉ
+    được tính lại ở background thread khi người dùng ngừng gõ.
+    """
+
+    # Mark riêng của tracker bao quanh vùng đang sửa
+    WINDOW_START = "text_stats_start"
+    WINDOW_END = "text_stats_end"
+
+    def __init__(
+        self,
+        text_widget,
+        on_counts=None,
+        chunker=None,
+        on_chunks=None,
+        counts_delay=50,
+        chunks_delay=500,
+    ):
+        self.widget = text_widget
+        self.stats = TextStatistics()
+        self.on_counts = on_counts
+        self.chunker = chunker
+        self.on_chunks = on_chunks
+        self.counts_delay = counts_delay
+        self.chunks_delay = chunks_delay
+        self.chunks = []
+
+        self._counts_job = None
+        self._chunks_job = None
+        self._chunks_future = None
+        self._chunks_stale = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        self._orig = f"{text_widget._w}_orig"
+        text_widget.tk.call("rename", text_widget._w, self._orig)
+        text_widget.tk.createcommand(text_widget._w, self._proxy)
+        self.stats.reset(self._call("get", "1.0", "end-1c"))
+
+    def _call(self, *args):
+        return self.widget.tk.call((self._orig,) + args)
+
+    def _proxy(self, command, *args):
+        window = None
+        if command in ("insert", "delete", "replace") and args:
+            window = self._mark_window(command, args)
+        elif command == "edit" and args and args[0] in ("undo", "redo"):
+            window = "all"
+
+        result = self._call(command, *args)
+
+        if window == "all":
+            self.stats.reset(self._call("get", "1.0", "end-1c"))
+            self._schedule()
+        elif window is not None:
+            new = self._call("get", self.WINDOW_START, self.WINDOW_END)
+            self.stats.replace(window, str(new))
+            self._schedule()
+        return result
+
+    def _mark_window(self, command, args):
+        """Đặt mark quanh vùng sắp sửa (thêm một ký tự mỗi bên), trả về text cũ
+
+        Mark trái có gravity left, mark phải gravity right nên sau lệnh sửa
+        chúng vẫn bao đúng vùng đó, dù text chèn vào dài bao nhiêu.
+        """
+        if command == "insert":
+            indices = [args[0]]
+        elif command == "delete" and len(args) == 1:
+            indices = [args[0], f"{args[0]}+1c"]
+        elif command == "replace":
+            indices = list(args[:2])
+        else:
+            indices = list(args)
+        # "end" nằm sau dấu xuống dòng cuối mà widget luôn giữ lại
+        indices = [self._clamp(index) for index in indices]
+        first = last = indices[0]
+        for index in indices[1:]:
+            if self._compare(index, "<", first):
+                first = index
+            if self._compare(index, ">", last):
+                last = index
+
+        self._call("mark", "set", self.WINDOW_START, f"{first}-1c")
+        self._call("mark", "gravity", self.WINDOW_START, "left")
+        self._call("mark", "set", self.WINDOW_END, self._clamp(f"{last}+1c"))
+        self._call("mark", "gravity", self.WINDOW_END, "right")
+        return str(self._call("get", self.WINDOW_START, self.WINDOW_END))
+
+    def _clamp(self, index):
+        index = str(self._call("index", index))
+        if self._compare(index, ">", "end-1c"):
+            return str(self._call("index", "end-1c"))
+        return index
+
+    def _compare(self, first, op, second):
+        return self.widget.tk.getboolean(self._call("compare", first, op, second))
+
+    def _schedule(self):
+        if self._counts_job is None:
+            self._counts_job = self.widget.after(self.counts_delay, self._emit_counts)
+        if self.chunker:
+            if self._chunks_job is not None:
+                self.widget.after_cancel(self._chunks_job)
+            self._chunks_job = self.widget.after(self.chunks_delay, self._start_chunks)
+
+    def _emit_counts(self):
+        self._counts_job = None
+        if self.on_counts:
+            self.on_counts(self.stats)
+
+    def _start_chunks(self):
+        self._chunks_job = None
+        if self._chunks_future is not None:
+            # Đang tính dở: tính lại khi xong
+            self._chunks_stale = True
+            return
+        text = str(self._call("get", "1.0", "end-1c")).strip()
+        self._chunks_future = self._executor.submit(self.chunker, text)
+        self.widget.after(30, self._check_chunks)
+
+    def _check_chunks(self):
+        future = self._chunks_future
+        if not future.done():
+            self.widget.after(30, self._check_chunks)
+            return
+        self._chunks_future = None
+        if self._chunks_stale:
+            self._chunks_stale = False
+            self._start_chunks()
+            return
+        try:
+            self.chunks = future.result()
+        except Exception:
+            self.chunks = []
+        if self.on_chunks:
+            self.on_chunks(self.chunks)
+
+    def refresh(self):
+        """Đếm lại toàn bộ (ví dụ sau khi đổi text theo cách không qua widget)"""
+        self.stats.reset(self._call("get", "1.0", "end-1c"))
+        self._schedule()
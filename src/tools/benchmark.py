@@ -0,0 +1,189 @@
+"""Benchmark generate_speech_parallel + merge với mock TTS server
+
+Ví dụ:
+    python -m src.tools.benchmark --chars 200000 --concurrency 4,8,16 \\
+        --chunk-size 1000,3500 --latency 0.8 --throttle-rate 0.02
+
+Mặc định tự chạy mock server cục bộ; dùng --base-url để trỏ tới server khác.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from src.config import settings as config
+from src.core.transfer_stats import percentile
+from src.tools.mock_tts_server import (
+    MockTTSServer,
+    add_config_arguments,
+    config_from_args,
+)
+
+
+SAMPLE_WORDS = (
+    "xin chào thế giới hôm nay trời đẹp chúng ta cùng nhau đọc một câu chuyện "
+    "rất dài về những điều thú vị trong cuộc sống"
+).split()
+
+
+def generate_text(chars, seed=0):
+    """Sinh văn bản giả có câu dài ngắn khác nhau"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < chars:
+        sentence = " ".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(5, 30)))
+        sentence = sentence.capitalize() + rng.choice([". ", "? ", "! ", "\n"])
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)[:chars]
+
+
+def run_once(text, concurrency, chunk_size, work_dir, adaptive=False):
+    """Một lần chạy với concurrency/chunk size cho trước, trả về dict kết quả"""
+    from src.core.tts_engine import TTSEngine
+
+    # Cache/journal riêng để không lần chạy nào được hưởng cache của lần trước
+    run_dir = tempfile.mkdtemp(dir=work_dir)
+    config.CACHE_DIR = os.path.join(run_dir, "cache")
+    config.JOURNAL_PATH = os.path.join(run_dir, "jobs.sqlite3")
+
+    # Mặc định giữ cố định concurrency để so sánh; adaptive: concurrency là trần
+    engine = TTSEngine(max_workers=concurrency, adaptive=adaptive)
+    engine.output_dir = run_dir
+    engine.chunk_size = chunk_size
+
+    latencies = []
+    latency_lock = threading.Lock()
+    convert_to_speech = engine.convert_to_speech
+
+    def timed_convert(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return convert_to_speech(*args, **kwargs)
+        finally:
+            with latency_lock:
+                latencies.append(time.perf_counter() - start)
+
+    engine.convert_to_speech = timed_convert
+
+    start = time.perf_counter()
+    first_audio = None
+    audio_files = []
+    for _, audio_file in engine.iter_speech_parallel(text, "alloy"):
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+        audio_files.append(audio_file)
+    synth_time = time.perf_counter() - start
+
+    merge_start = time.perf_counter()
+    if audio_files:
+        engine.combine_audio_files(audio_files, os.path.join(run_dir, "merged.mp3"))
+    merge_time = time.perf_counter() - merge_start
+
+    chunks = len(engine.optimize_chunk_size(text))
+    total_time = synth_time + merge_time
+    transfer = engine.get_transfer_stats()
+    engine.scheduler.shutdown()
+
+    return {
+        "concurrency": concurrency,
+        "chunk_size": chunk_size,
+        "chunks": chunks,
+        "failed_chunks": chunks - len(audio_files),
+        "requests": len(latencies),
+        "throttled": engine.scheduler.throttled,
+        "time_to_first_audio": first_audio,
+        "synth_time": synth_time,
+        "merge_time": merge_time,
+        "total_time": total_time,
+        "chars_per_sec": len(text) / total_time if total_time else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "ttfb_p50": transfer["ttfb_p50"],
+        "ttfb_p95": transfer["ttfb_p95"],
+        "final_limit": engine.scheduler.max_in_flight,
+    }
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TTSEngine load test")
+    parser.add_argument("--text-file", help="Text to convert (default: generated)")
+    parser.add_argument("--chars", type=int, default=100000)
+    parser.add_argument("--concurrency", type=parse_int_list, default=[4, 8, 15])
+    parser.add_argument("--chunk-size", type=parse_int_list, default=[1500, 3500])
+    parser.add_argument(
+        "--requests-per-minute", type=int, default=config.REQUESTS_PER_MINUTE
+    )
+    parser.add_argument("--chars-per-minute", type=int, default=config.CHARS_PER_MINUTE)
+    parser.add_argument("--base-url", help="Use an already running server")
+    parser.add_argument("--json", help="Write results as JSON to this path")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Let AIMD pick the in-flight limit, --concurrency is the maximum",
+    )
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.text_file:
+        with open(args.text_file, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = generate_text(args.chars)
+
+    server = None
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    else:
+        server = MockTTSServer(config_from_args(args))
+        os.environ["OPENAI_BASE_URL"] = server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    config.REQUESTS_PER_MINUTE = args.requests_per_minute
+    config.CHARS_PER_MINUTE = args.chars_per_minute
+
+    work_dir = tempfile.mkdtemp(prefix="tts_bench_")
+    results = []
+    try:
+        print(
+            f"{'conc':>4} {'chunk':>6} {'n':>4} {'fail':>4} {'429':>4} "
+            f"{'ttfa':>7} {'total':>7} {'merge':>6} {'chars/s':>9} "
+            f"{'p50':>6} {'p95':>6} {'p99':>6} {'ttfb':>6} {'lim':>4}"
+        )
+        for concurrency in args.concurrency:
+            for chunk_size in args.chunk_size:
+                r = run_once(text, concurrency, chunk_size, work_dir, args.adaptive)
+                results.append(r)
+                print(
+                    f"{r['concurrency']:>4} {r['chunk_size']:>6} {r['chunks']:>4} "
+                    f"{r['failed_chunks']:>4} {r['throttled']:>4} "
+                    f"{r['time_to_first_audio'] or 0:>7.2f} {r['total_time']:>7.2f} "
+                    f"{r['merge_time']:>6.3f} {r['chars_per_sec']:>9.0f} "
+                    f"{r['latency_p50']:>6.2f} {r['latency_p95']:>6.2f} "
+                    f"{r['latency_p99']:>6.2f} {r['ttfb_p50']:>6.2f} "
+                    f"{r['final_limit']:>4}"
+                )
+    finally:
+        if server:
+            server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"chars": len(text), "runs": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
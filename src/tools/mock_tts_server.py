@@ -0,0 +1,208 @@
+"""Server giả lập endpoint /v1/audio/speech để benchmark không tốn tiền, không cần mạng
+
+Chạy riêng:
+    python -m src.tools.mock_tts_server --port 8089 --latency 0.8 --throttle-rate 0.05
+
+rồi trỏ engine vào server:
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=mock python main.py doc.txt
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.mp3_frames import silent_frames
+
+
+# Tốc độ đọc ước lượng để sinh audio có độ dài tương ứng với input
+CHARS_PER_SECOND = 15.0
+
+
+class MockConfig:
+    def __init__(
+        self,
+        latency=0.5,
+        latency_dist="lognormal",
+        latency_sigma=0.5,
+        per_char_latency=0.0002,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        retry_after=1.0,
+        bandwidth=None,
+        seed=None,
+    ):
+        self.latency = latency  # giây, median của phân phối
+        self.latency_dist = latency_dist  # fixed | uniform | lognormal
+        self.latency_sigma = latency_sigma
+        self.per_char_latency = per_char_latency
+        self.error_rate = error_rate  # tỉ lệ trả 500
+        self.throttle_rate = throttle_rate  # tỉ lệ trả 429
+        self.retry_after = retry_after
+        self.bandwidth = bandwidth  # byte/giây cho mỗi response, None = không giới hạn
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample_latency(self, chars):
+        with self.lock:
+            if self.latency_dist == "fixed":
+                base = self.latency
+            elif self.latency_dist == "uniform":
+                base = self.random.uniform(0, 2 * self.latency)
+            else:
+                base = self.latency * self.random.lognormvariate(0, self.latency_sigma)
+        return base + chars * self.per_char_latency
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+
+class MockTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            text = payload["input"]
+        except (ValueError, KeyError):
+            return self.send_json(400, {"error": {"message": "Invalid request"}})
+
+        if not self.path.rstrip("/").endswith("/audio/speech"):
+            return self.send_json(404, {"error": {"message": "Not found"}})
+
+        self.server.record_request(len(text))
+        roll = config.roll()
+        if roll < config.throttle_rate:
+            return self.send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                {"retry-after": f"{config.retry_after:g}"},
+            )
+        if roll < config.throttle_rate + config.error_rate:
+            return self.send_json(500, {"error": {"message": "Mock server error"}})
+
+        time.sleep(config.sample_latency(len(text)))
+
+        speed = float(payload.get("speed", 1.0)) or 1.0
+        audio = silent_frames(len(text) / CHARS_PER_SECOND / speed)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+
+        if not config.bandwidth:
+            self.wfile.write(audio)
+            return
+
+        # Giới hạn băng thông: gửi từng khối nhỏ
+        block = max(1024, int(config.bandwidth / 20))
+        for offset in range(0, len(audio), block):
+            self.wfile.write(audio[offset:offset + block])
+            self.wfile.flush()
+            time.sleep(block / config.bandwidth)
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockTTSServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), MockTTSHandler)
+        self.config = config or MockConfig()
+        self.requests = 0
+        self.chars = 0
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record_request(self, chars):
+        with self._stats_lock:
+            self.requests += 1
+            self.chars += chars
+
+    def start(self):
+        """Chạy server ở background thread, trả về base_url"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.5, help="Median latency (s)")
+    parser.add_argument(
+        "--latency-dist",
+        choices=["fixed", "uniform", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument(
+        "--per-char-latency", type=float, default=0.0002, help="Extra seconds per char"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument(
+        "--bandwidth", type=float, default=None, help="Bytes/s per response"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency=args.latency,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        per_char_latency=args.per_char_latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        bandwidth=args.bandwidth,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI speech endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockTTSServer(config_from_args(args), args.host, args.port)
+    print(f"Mock TTS server on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
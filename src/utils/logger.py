@@ -0,0 +1,262 @@
+"""Logging và tracing nhẹ cho pipeline TTS
+
+Log và span được đưa vào queue rồi ghi bởi một thread nền, nên worker đang
+tổng hợp không bao giờ bị chặn vì I/O. Span có thể xuất ra Chrome trace JSON
+để mở bằng chrome://tracing hoặc https://ui.perfetto.dev.
+"""
+
+import asyncio
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_log_queue = queue.SimpleQueue()
+_log_listener = None
+_log_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Logger ghi qua QueueHandler, handler thật (stderr) chạy ở thread riêng"""
+    global _log_listener
+    with _log_lock:
+        if _log_listener is None:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            _log_listener = logging.handlers.QueueListener(_log_queue, handler)
+            _log_listener.start()
+            atexit.register(_log_listener.stop)
+
+            root = logging.getLogger("tts")
+            root.addHandler(logging.handlers.QueueHandler(_log_queue))
+            root.setLevel(os.getenv("TTS_LOG_LEVEL", "INFO").upper())
+            root.propagate = False
+    # "src.core.tts_engine" -> "tts.tts_engine"
+    return logging.getLogger(f"tts.{name.rsplit('.', 1)[-1]}")
+
+
+class _Span:
+    """Context manager ghi một span (Chrome trace event "X") khi kết thúc"""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.start, cat=self.cat, **self.args)
+        return False
+
+    def set(self, **args):
+        """Thêm thông tin vào span trước khi nó kết thúc (ví dụ cache hit)"""
+        self.args.update(args)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Ghi span vào queue, thread nền gom lại thành Chrome trace events
+
+    Khi tắt (mặc định), span() trả về context rỗng nên gần như không tốn gì.
+    Trong asyncio mỗi task được coi là một "thread" riêng trên timeline để
+    các span chồng nhau của nhiều coroutine không bị lồng sai.
+    """
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._queue = queue.SimpleQueue()
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._writer = None
+        self._thread_names = {}  # tid -> tên hiển thị
+        self._task_ids = {}  # id(task) -> tid giả
+        self._task_counter = itertools.count(1)
+
+    def enable(self):
+        with self._lock:
+            self.enabled = True
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._drain, name="trace-writer", daemon=True
+                )
+                self._writer.start()
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, cat="tts", **args):
+        """with tracer.span("merge", files=3): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def complete(self, name, start, end=None, cat="tts", **args):
+        """Ghi span đã biết thời điểm bắt đầu/kết thúc (time.perf_counter())"""
+        if not self.enabled:
+            return
+        end = time.perf_counter() if end is None else end
+        tid = self._current_tid()
+        self._queue.put(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": self._micros(start),
+                "dur": max(0.0, (end - start) * 1e6),
+                "pid": self.pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+
+    def instant(self, name, cat="tts", **args):
+        """Sự kiện tức thời, ví dụ một lần thử lại"""
+        if not self.enabled:
+            return
+        self._queue.put(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "i",
+                "s": "t",
+                "ts": self._micros(time.perf_counter()),
+                "pid": self.pid,
+                "tid": self._current_tid(),
+                "args": args,
+            }
+        )
+
+    def counter(self, name, **values):
+        """Giá trị theo thời gian (ví dụ số request đang chạy)"""
+        if not self.enabled:
+            return
+        self._queue.put(
+            {
+                "name": name,
+                "ph": "C",
+                "ts": self._micros(time.perf_counter()),
+                "pid": self.pid,
+                "args": values,
+            }
+        )
+
+    def get_events(self):
+        """Các event đã ghi (chờ thread nền xử lý hết queue trước)"""
+        self.flush()
+        with self._lock:
+            events = list(self._events)
+            names = dict(self._thread_names)
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": thread_name},
+            }
+            for tid, thread_name in names.items()
+        ]
+        return metadata + events
+
+    def export_chrome_trace(self, path):
+        """Ghi trace ra path (JSON Object Format của Chrome trace)"""
+        trace = {"traceEvents": self.get_events(), "displayTimeUnit": "ms"}
+        out_dir = os.path.dirname(os.path.abspath(path))
+        os.makedirs(out_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix=".trace_")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(trace, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def flush(self, timeout=5.0):
+        """Chờ thread nền ghi xong các event đang nằm trong queue"""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def clear(self):
+        self.flush()
+        with self._lock:
+            self._events.clear()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            with self._lock:
+                self._events.append(item)
+
+    def _micros(self, seconds):
+        return (seconds - self._origin) * 1e6
+
+    def _current_tid(self):
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        with self._lock:
+            if task is not None:
+                key = id(task)
+                tid = self._task_ids.get(key)
+                if tid is None:
+                    # tid giả âm để không trùng với thread id thật
+                    tid = self._task_ids[key] = -next(self._task_counter)
+                    self._thread_names[tid] = task.get_name()
+                return tid
+
+            tid = threading.get_ident()
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+            return tid
+
+
+# Tracer dùng chung cho cả process, bật bằng TTS_TRACE=1 hoặc tracer.enable()
+tracer = Tracer()
+if os.getenv("TTS_TRACE", "0") == "1":
+    tracer.enable()
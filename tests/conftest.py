@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from src.config import settings as config
+
+
+@pytest.fixture
+def offline_config(tmp_path, monkeypatch):
+    """Config cho backend offline, cache/journal/output nằm trong tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "TTS_BACKEND", "offline")
+    monkeypatch.setattr(config, "TTS_RESPONSE_FORMAT", "wav")
+    monkeypatch.setattr(config, "TTS_OUTPUT_FORMAT", "")
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "JOURNAL_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(config, "AUDIO_SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setattr(config, "IN_MEMORY_AUDIO", False)
+    monkeypatch.setattr(config, "USE_ASYNCIO", False)
+    monkeypatch.setattr(config, "POSTPROCESS", False)
+    return config
+
+
+@pytest.fixture
+def engine(offline_config):
+    """TTSEngine dùng backend offline (xem offline_config)"""
+    from src.core.tts_engine import TTSEngine
+
+    tts = TTSEngine(max_workers=4, min_workers=4)
+    yield tts
+    tts.scheduler.shutdown()
+    tts.transcoder.shutdown()
+    tts.journal.close()
+
+
+@pytest.fixture
+def fd_limit():
+    """Hạ giới hạn số file mở (RLIMIT_NOFILE) xuống số fd đang mở + extra"""
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    def lower(extra):
+        limit = len(os.listdir("/proc/self/fd")) + extra
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+        return limit
+
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc/self/fd")
+    yield lower
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
@@ -0,0 +1,124 @@
+import errno
+import os
+
+import pytest
+
+from src.core.audio_formats import (
+    PCM_SAMPLE_RATE,
+    AudioFormatError,
+    concat_raw,
+    concat_wav,
+    parse_wav,
+    wav_header,
+)
+
+
+def pcm(seconds, value=1):
+    return value.to_bytes(2, "little", signed=True) * int(PCM_SAMPLE_RATE * seconds)
+
+
+def write_wavs(tmp_path, durations, sample_rate=PCM_SAMPLE_RATE, prefix="chunk"):
+    paths = []
+    for i, duration in enumerate(durations):
+        data = pcm(duration, i + 1)
+        path = tmp_path / f"{prefix}_{i:04d}.wav"
+        path.write_bytes(wav_header(len(data), sample_rate) + data)
+        paths.append(str(path))
+    return paths
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def duration(info):
+    return info.data_size / (info.sample_rate * info.channels * info.bits // 8)
+
+
+def test_concat_wav_duration_and_order(tmp_path):
+    paths = write_wavs(tmp_path, [1.0, 0.25, 2.0])
+    output = str(tmp_path / "merged.wav")
+    concat_wav(paths, output)
+
+    data = read_bytes(output)
+    info = parse_wav(data)
+    assert duration(info) == pytest.approx(3.25)
+    chunks = [read_bytes(path)[44:] for path in paths]
+    assert data[info.data_offset:] == b"".join(chunks)
+
+
+def test_concat_wav_streaming_header(tmp_path):
+    # WAV tải dạng streaming ghi kích thước 0xFFFFFFFF: data kéo tới hết file
+    path = tmp_path / "stream.wav"
+    path.write_bytes(wav_header(0xFFFFFFFF) + pcm(0.5))
+    output = str(tmp_path / "merged.wav")
+    concat_wav([str(path), str(path)], output)
+
+    assert duration(parse_wav(read_bytes(output))) == pytest.approx(1.0)
+
+
+def test_concat_wav_more_inputs_than_fd_limit(tmp_path, fd_limit):
+    paths = write_wavs(tmp_path, [0.01] * 300)
+    output = str(tmp_path / "merged.wav")
+
+    fd_limit(16)
+    concat_wav(paths, output)
+
+    assert duration(parse_wav(read_bytes(output))) == pytest.approx(3.0)
+
+
+def test_concat_wav_rejects_mismatch(tmp_path):
+    paths = write_wavs(tmp_path, [0.1])
+    paths += write_wavs(tmp_path, [0.1], sample_rate=16000, prefix="other")
+    with pytest.raises(AudioFormatError):
+        concat_wav(paths, str(tmp_path / "merged.wav"))
+    assert not (tmp_path / "merged.wav").exists()
+
+
+def test_concat_raw_preserves_bytes(tmp_path, fd_limit):
+    chunks = [pcm(0.01, i) for i in range(300)]
+    paths = []
+    for i, data in enumerate(chunks):
+        path = tmp_path / f"chunk_{i:04d}.pcm"
+        path.write_bytes(data)
+        paths.append(str(path))
+    (tmp_path / "empty.pcm").write_bytes(b"")
+    paths.append(str(tmp_path / "empty.pcm"))
+    output = str(tmp_path / "merged.pcm")
+
+    fd_limit(16)
+    concat_raw(paths, output)
+
+    assert read_bytes(output) == b"".join(chunks)
+
+
+def test_concat_wav_write_error_is_not_masked(tmp_path, monkeypatch):
+    paths = write_wavs(tmp_path, [0.5, 0.5])
+    output = tmp_path / "merged.wav"
+    fdopen = os.fdopen
+
+    class FullDisk:
+        def __init__(self, f):
+            self.f = f
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+        def write(self, data):
+            if len(data) > 44:  # Header ghi được, phần data thì không
+                raise OSError(errno.ENOSPC, "No space left on device")
+            return self.f.write(data)
+
+    monkeypatch.setattr(
+        "src.core.audio_formats.os.fdopen",
+        lambda *a, **kw: FullDisk(fdopen(*a, **kw)),
+    )
+    with pytest.raises(OSError) as error:
+        concat_wav(paths, str(output))
+
+    assert error.value.errno == errno.ENOSPC
+    assert not output.exists()
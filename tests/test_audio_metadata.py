@@ -0,0 +1,90 @@
+import os
+import random
+
+import pytest
+
+from src.core.audio_buffers import AudioBuffer
+from src.core.audio_formats import PCM_SAMPLE_RATE, wav_header
+from src.core.audio_metadata import MetadataCache, buffer_metadata, read_metadata
+from src.core.mp3_frames import silent_frames
+
+
+def noise(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def write_wav(path, seconds, sample_rate=PCM_SAMPLE_RATE):
+    pcm = noise(int(seconds * sample_rate) * 2)
+    path.write_bytes(wav_header(len(pcm), sample_rate) + pcm)
+    return str(path)
+
+
+def test_wav_duration_from_header(tmp_path):
+    # PCM nhiễu không được đọc nhầm thành frame MP3
+    path = write_wav(tmp_path / "noise.wav", 3.0)
+    metadata = read_metadata(path)
+    assert metadata.duration == pytest.approx(3.0)
+    assert metadata.sample_rate == PCM_SAMPLE_RATE
+    assert metadata.frame_count == 0
+
+
+def test_wav_duration_uses_header_sample_rate(tmp_path):
+    path = write_wav(tmp_path / "espeak.wav", 2.0, sample_rate=22050)
+    assert read_metadata(path).duration == pytest.approx(2.0)
+
+
+def test_non_mp3_extension_skips_frame_scan(tmp_path):
+    pytest.importorskip("mutagen")
+    path = tmp_path / "chunk.opus"
+    path.write_bytes(noise(256 * 1024))
+    metadata = read_metadata(str(path))
+    # mutagen không nhận ra file: không có thời lượng, không có frame index
+    assert metadata.duration == 0.0
+    assert metadata.frame_count == 0
+
+
+def test_mp3_duration_and_frame_index(tmp_path):
+    path = tmp_path / "chunk.mp3"
+    path.write_bytes(silent_frames(1.0))
+    metadata = read_metadata(str(path))
+    assert metadata.duration == pytest.approx(1.0, abs=metadata.frame_duration)
+    assert metadata.frame_count > 0
+    seconds, offset = metadata.seek_point(0.5)
+    assert seconds <= 0.5 and offset == metadata.frame_offsets[metadata.frame_at(0.5)]
+
+
+def test_cache_reparses_changed_file(tmp_path):
+    cache = MetadataCache()
+    path = write_wav(tmp_path / "a.wav", 1.0)
+    assert cache.get(path).duration == pytest.approx(1.0)
+    assert cache.get(path).duration == pytest.approx(1.0)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    write_wav(tmp_path / "a.wav", 2.0)
+    assert cache.get(path).duration == pytest.approx(2.0)
+    assert cache.misses == 2
+
+
+def mapped_paths():
+    with open("/proc/self/maps") as f:
+        return f.read()
+
+
+def test_in_memory_wav_buffer_uses_wav_header(tmp_path):
+    pcm = noise(3 * PCM_SAMPLE_RATE * 2)
+    buffer = AudioBuffer(str(tmp_path / "chunk.wav"), wav_header(len(pcm)) + pcm)
+    metadata = buffer_metadata(buffer)
+    assert metadata.duration == pytest.approx(3.0)
+    assert buffer.in_memory
+
+
+def test_spilled_buffer_metadata_closes_mmap(tmp_path):
+    if not os.path.exists("/proc/self/maps"):
+        pytest.skip("needs /proc/self/maps")
+    buffer = AudioBuffer(str(tmp_path / "chunk.mp3"), silent_frames(1.0))
+    buffer.spill(str(tmp_path / "spill"))
+    spill_path = buffer.ensure_file()
+
+    assert buffer_metadata(buffer).frame_count > 0
+    assert spill_path not in mapped_paths()
+    buffer.release()
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from src.core.audio_formats import wav_header
+
+pygame = pytest.importorskip("pygame")
+
+
+@pytest.fixture
+def player(monkeypatch):
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    from src.core.audio_player import AudioPlayer
+
+    player = AudioPlayer()
+    yield player
+    player.stop()
+    player._decoder.shutdown(wait=True)
+    pygame.mixer.quit()
+
+
+def make_wav(tmp_path, name, seconds=1.0):
+    pcm = b"\1\0" * int(24000 * seconds)
+    path = tmp_path / name
+    path.write_bytes(wav_header(len(pcm)) + pcm)
+    return str(path)
+
+
+def slow_decoder(monkeypatch, player):
+    """Giải mã bị giữ lại cho tới khi test set event"""
+    release = threading.Event()
+    decode = player._decode_sound
+
+    def blocked(source, index):
+        release.wait(5)
+        return decode(source, index)
+
+    monkeypatch.setattr(player, "_decode_sound", blocked)
+    return release
+
+
+def wait_started(player, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while player._pending is not None and time.monotonic() < deadline:
+        player.update()
+        time.sleep(0.01)
+    assert player._pending is None
+
+
+def test_play_playlist_does_not_wait_for_decode(player, tmp_path, monkeypatch):
+    player.set_playlist([make_wav(tmp_path, "0.wav"), make_wav(tmp_path, "1.wav")])
+    release = slow_decoder(monkeypatch, player)
+
+    started = time.monotonic()
+    player.play_playlist(1.5)
+    assert time.monotonic() - started < 1.0
+    assert player.is_playing and player.segment_index == 1
+    assert player.get_global_pos() == pytest.approx(1.5)
+    assert not player.channel.get_busy()
+
+    player.update()  # Vẫn chưa giải mã xong: không chặn
+    release.set()
+    wait_started(player)
+    assert player.channel.get_busy()
+
+
+def test_pause_while_decoding_applies_after_start(player, tmp_path, monkeypatch):
+    player.set_playlist([make_wav(tmp_path, "0.wav")])
+    release = slow_decoder(monkeypatch, player)
+    player.play_playlist(0.5)
+    player.pause()
+    release.set()
+    wait_started(player)
+
+    assert not player.is_playing
+    assert player.paused_at is not None
+    assert player.get_global_pos() == pytest.approx(0.5, abs=0.05)
+
+
+def test_enqueue_takes_over_single_file_playback(player, tmp_path):
+    player.load(make_wav(tmp_path, "single.wav", seconds=5.0))
+    player.play()
+    assert player.is_playing and player.current_file is not None
+
+    player.enqueue(make_wav(tmp_path, "chunk.wav"))
+    wait_started(player)
+    assert player.current_file is None
+    assert player.segment_index == 0
+    assert not pygame.mixer.music.get_busy()
+    assert player.channel.get_busy()
@@ -0,0 +1,117 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.core.audio_metadata import mp3_metadata_from_data
+from src.tools import benchmark
+from src.tools.mock_tts_server import CHARS_PER_SECOND, MockConfig, MockTTSServer
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**options):
+        server = MockTTSServer(MockConfig(latency=0.0, latency_dist="fixed", **options))
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def post(server, payload, path="/audio/speech"):
+    request = urllib.request.Request(
+        server.base_url + path,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def duration(data):
+    return mp3_metadata_from_data(data, "speech.mp3", 0, len(data)).duration
+
+
+def test_audio_length_follows_input_and_speed(server):
+    mock = server(per_char_latency=0.0)
+    text = "x" * 150
+    status, headers, data = post(mock, {"input": text, "voice": "alloy"})
+    assert (status, headers["Content-Type"]) == (200, "audio/mpeg")
+    assert duration(data) == pytest.approx(len(text) / CHARS_PER_SECOND, abs=0.05)
+
+    _, _, fast = post(mock, {"input": text, "voice": "alloy", "speed": 2.0})
+    assert duration(fast) == pytest.approx(duration(data) / 2, abs=0.05)
+    assert (mock.requests, mock.chars) == (2, 300)
+
+
+def test_throttle_and_error_rates(server):
+    throttled = server(throttle_rate=1.0, retry_after=2.5)
+    status, headers, body = post(throttled, {"input": "xin chào"})
+    assert (status, headers["retry-after"]) == (429, "2.5")
+    assert json.loads(body)["error"]["type"] == "requests"
+
+    failing = server(error_rate=1.0)
+    assert post(failing, {"input": "xin chào"})[0] == 500
+
+
+def test_invalid_requests(server):
+    mock = server()
+    assert post(mock, {"voice": "alloy"})[0] == 400
+    assert post(mock, {"input": "x"}, path="/other")[0] == 404
+    assert mock.requests == 0
+
+
+def test_bandwidth_cap_slows_response(server):
+    mock = server(per_char_latency=0.0, bandwidth=40000)
+    start = time.perf_counter()
+    _, _, data = post(mock, {"input": "x" * 30})
+    elapsed = time.perf_counter() - start
+    assert len(data) > 10000
+    assert elapsed >= len(data) / 40000 * 0.8
+
+
+def test_generate_text_is_deterministic():
+    text = benchmark.generate_text(2000, seed=1)
+    assert len(text) == 2000
+    assert text == benchmark.generate_text(2000, seed=1)
+    assert text != benchmark.generate_text(2000, seed=2)
+
+
+def test_benchmark_end_to_end(offline_config, monkeypatch, tmp_path):
+    pytest.importorskip("openai")
+    monkeypatch.setattr(offline_config, "TTS_BACKEND", "openai")
+    monkeypatch.setattr(offline_config, "TTS_RESPONSE_FORMAT", "mp3")
+    monkeypatch.setattr(offline_config, "ADAPTIVE_CONCURRENCY", False)
+    monkeypatch.setattr(offline_config, "HEDGE_REQUESTS", False)
+    # main() ghi các giá trị này vào config và biến môi trường
+    for name in ("REQUESTS_PER_MINUTE", "CHARS_PER_MINUTE"):
+        monkeypatch.setattr(offline_config, name, getattr(offline_config, name))
+    monkeypatch.setenv("OPENAI_BASE_URL", "")
+    monkeypatch.setenv("OPENAI_API_KEY", "mock")
+
+    output = tmp_path / "bench.json"
+    argv = [
+        "--chars", "3000", "--concurrency", "2,4", "--chunk-size", "500",
+        "--latency", "0.01", "--latency-dist", "fixed", "--per-char-latency", "0",
+        "--json", str(output),
+    ]
+    assert benchmark.main(argv) == 0
+
+    report = json.loads(output.read_text())
+    assert report["chars"] == 3000
+    assert [run["concurrency"] for run in report["runs"]] == [2, 4]
+    for run in report["runs"]:
+        assert run["failed_chunks"] == 0
+        assert run["requests"] == run["chunks"] > 1
+        assert 0 < run["time_to_first_audio"] <= run["synth_time"]
+        assert run["latency_p50"] <= run["latency_p95"] <= run["latency_p99"]
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from src.core import chunk_cache
+from src.core.chunk_cache import ChunkCache
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_lru_evicts_least_recently_used(cache_dir, tmp_path):
+    cache = ChunkCache(cache_dir, max_bytes=250)
+    cache.store_bytes("a", b"a" * 100)
+    cache.store_bytes("b", b"b" * 100)
+    # Đọc "a" làm nó mới hơn "b"
+    assert cache.fetch("a", str(tmp_path / "a.mp3"))
+    cache.store_bytes("c", b"c" * 100)
+
+    assert cache.read("b") is None
+    assert cache.read("a") == b"a" * 100
+    assert cache.read("c") == b"c" * 100
+    stats = cache.get_stats()
+    assert (stats["evictions"], stats["entries"], stats["bytes"]) == (1, 2, 200)
+    assert entries(cache_dir) == ["a.mp3", "c.mp3"]
+
+
+def test_entry_larger_than_budget_is_kept_alone(cache_dir):
+    cache = ChunkCache(cache_dir, max_bytes=50)
+    cache.store_bytes("a", b"a" * 10)
+    cache.store_bytes("big", b"b" * 100)
+    assert cache.read("a") is None
+    assert cache.read("big") == b"b" * 100
+
+
+def test_failed_write_leaves_no_partial_entry(cache_dir, tmp_path):
+    cache = ChunkCache(cache_dir, max_bytes=1000)
+    cache.store_bytes("a", b"old")
+
+    def broken(dst):
+        dst.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        cache._write_entry("a", "mp3", broken)
+    with pytest.raises(OSError):
+        cache.store("b", str(tmp_path / "missing.mp3"))
+
+    assert cache.read("a") == b"old"
+    assert cache.read("b") is None
+    assert entries(cache_dir) == ["a.mp3"]
+
+
+def test_index_survives_restart_in_lru_order(cache_dir):
+    cache = ChunkCache(cache_dir, max_bytes=1000)
+    cache.store_bytes("a", b"a" * 100)
+    cache.store_bytes("b", b"b" * 100)
+    os.utime(os.path.join(cache_dir, "a.mp3"), (1, 1))
+    os.utime(os.path.join(cache_dir, "b.mp3"), (2, 2))
+    # File tạm của lần ghi bị gián đoạn bị bỏ qua
+    with open(os.path.join(cache_dir, ".tmp_crashed"), "wb") as f:
+        f.write(b"x" * 500)
+
+    reopened = ChunkCache(cache_dir, max_bytes=250)
+    assert reopened.get_stats()["bytes"] == 200
+    reopened.store_bytes("c", b"c" * 100)
+    assert reopened.read("a") is None
+    assert reopened.read("b") == b"b" * 100
+
+
+def test_externally_deleted_entry_is_a_miss(cache_dir, tmp_path):
+    cache = ChunkCache(cache_dir, max_bytes=1000)
+    cache.store_bytes("a", b"a" * 10)
+    os.remove(os.path.join(cache_dir, "a.mp3"))
+
+    assert not cache.fetch("a", str(tmp_path / "out.mp3"))
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (0, 1, 0)
+
+
+def test_key_covers_every_audio_parameter():
+    base = ("text", "alloy", "openai/tts-1", 1.0, "mp3")
+    key = ChunkCache.make_key(*base)
+    assert ChunkCache.make_key("text", "alloy", "openai/tts-1", 1, "mp3") == key
+    for i, value in enumerate(("other", "echo", "openai/tts-1-hd", 1.25, "wav")):
+        changed = list(base)
+        changed[i] = value
+        assert ChunkCache.make_key(*changed) != key
+
+
+def test_miss_keeps_entry_stored_again_meanwhile(cache_dir, tmp_path, monkeypatch):
+    cache = ChunkCache(cache_dir, max_bytes=1000)
+    cache.store_bytes("a", b"old")
+    os.remove(os.path.join(cache_dir, "a.mp3"))
+
+    def link_fails_after_restore(src, dst):
+        # Thread khác tổng hợp lại và store "a" trong lúc fetch đang link
+        cache.store_bytes("a", b"new")
+        raise OSError("missing")
+
+    monkeypatch.setattr(chunk_cache, "_link_or_copy", link_fails_after_restore)
+    assert not cache.fetch("a", str(tmp_path / "out.mp3"))
+
+    assert cache.read("a") == b"new"
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["bytes"]) == (1, 3)
+
+
+def test_entry_being_linked_is_not_evicted(cache_dir, tmp_path, monkeypatch):
+    cache = ChunkCache(cache_dir, max_bytes=150)
+    cache.store_bytes("a", b"a" * 100)
+    link = chunk_cache._link_or_copy
+
+    def store_while_linking(src, dst):
+        cache.store_bytes("b", b"b" * 100)
+        link(src, dst)
+
+    monkeypatch.setattr(chunk_cache, "_link_or_copy", store_while_linking)
+    dest = tmp_path / "out.mp3"
+    assert cache.fetch("a", str(dest))
+
+    assert dest.read_bytes() == b"a" * 100
+    assert entries(cache_dir) == ["a.mp3"]
+    assert cache.get_stats()["bytes"] == 100
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from src.gui.components.chunk_list import (
+    FAILED,
+    PENDING,
+    READY,
+    ChunkListModel,
+    VirtualChunkList,
+)
+
+
+def pending_rows(job_id, count, chars=100):
+    return (((job_id, index), None, chars, PENDING) for index in range(count))
+
+
+def test_bulk_add_of_10k_rows_is_fast():
+    model = ChunkListModel()
+    start = time.perf_counter()
+    first = model.add_rows(pending_rows(1, 10000))
+    assert time.perf_counter() - start < 0.5
+
+    assert (first, len(model)) == (0, 10000)
+    assert model.add_rows(pending_rows(2, 5)) == 10000
+    assert model.row_of((2, 3)) == 10003
+    assert model.row_of((3, 0)) is None
+
+
+def test_update_marks_ready_and_resets_duration():
+    model = ChunkListModel()
+    model.add_rows(pending_rows(1, 3))
+    model.durations[1] = 2.5
+
+    assert model.update((1, 1), path="out/segment_1.wav", status=READY) == 1
+    assert model.paths[1] == "out/segment_1.wav"
+    assert (model.statuses[1], model.durations[1]) == (READY, None)
+
+    assert model.update((1, 2), status=FAILED) == 2
+    assert (model.paths[2], model.statuses[2]) == (None, FAILED)
+    assert model.update((9, 9), status=READY) is None
+
+
+def test_clear_drops_rows_and_keys():
+    model = ChunkListModel()
+    model.add_rows(pending_rows(1, 3))
+    model.clear()
+
+    assert len(model) == 0
+    assert model.row_of((1, 0)) is None
+    assert model.add_rows(pending_rows(2, 1)) == 0
+
+
+@pytest.fixture
+def root():
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("cần display để tạo widget")
+    yield root
+    root.destroy()
+
+
+def test_canvas_items_do_not_grow_with_rows(root):
+    loaded = []
+
+    def loader(path):
+        loaded.append(path)
+        return 1.0
+
+    chunk_list = VirtualChunkList(root, metadata_loader=loader)
+    chunk_list.pack()
+    root.update()
+    chunk_list.add_rows(
+        ((1, i), f"segment_{i}.wav", 10, READY) for i in range(10000)
+    )
+    root.update()
+    root.after(20)  # Metadata được tải trong after(1)
+    root.update()
+    items = len(chunk_list.canvas.find_all())
+    visible = chunk_list.visible_rows()
+
+    assert items <= (visible + 1) * (len(VirtualChunkList.columns) + 1)
+    # Chỉ các hàng đang hiển thị được tải metadata
+    assert 0 < len(loaded) <= visible
+
+    chunk_list.scroll_to(5000)
+    root.update()
+    assert len(chunk_list.canvas.find_all()) == items
+    assert chunk_list.top == 5000
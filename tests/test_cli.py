@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from src.cli import load_jobs, main, parse_args
+
+
+def write_jobs(tmp_path, *jobs):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join(json.dumps(job) for job in jobs), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "job, message",
+    [
+        ({"text": "Xin chào", "format": "ogg"}, "unknown format 'ogg'"),
+        ({"text": "Xin chào", "output_format": "m4a"}, "unknown output_format"),
+        ({"text": "Xin chào", "voice": "bob"}, "unknown voice 'bob'"),
+        ({"text": "Xin chào", "speed": "fast"}, "invalid speed"),
+        ({"name": "empty"}, "needs 'input' or 'text'"),
+    ],
+)
+def test_invalid_job_names_line(tmp_path, job, message):
+    path = write_jobs(tmp_path, {"text": "ok"}, job)
+    with pytest.raises(SystemExit) as exc:
+        load_jobs(parse_args(["--jobs", path]))
+    assert f"{path}:2:" in str(exc.value)
+    assert message in str(exc.value)
+
+
+def test_duplicate_output_is_rejected(tmp_path):
+    path = write_jobs(
+        tmp_path, {"text": "a", "output": "x.mp3"}, {"text": "b", "output": "x.mp3"}
+    )
+    with pytest.raises(SystemExit, match="already used"):
+        load_jobs(parse_args(["--jobs", path]))
+
+
+def test_postprocess_can_be_switched_off(monkeypatch):
+    from src.config import settings as config
+
+    monkeypatch.setattr(config, "POSTPROCESS", True)
+    assert parse_args([]).postprocess is True
+    assert parse_args(["--no-postprocess"]).postprocess is False
+
+
+def test_identical_jobs_run_concurrently(offline_config, tmp_path):
+    text = "Một câu giống hệt nhau. " * 40
+    path = write_jobs(
+        tmp_path,
+        {"text": text, "name": "first"},
+        {"text": text, "name": "second"},
+    )
+    summary_path = str(tmp_path / "summary.json")
+    code = main(
+        [
+            "--jobs",
+            path,
+            "--parallel-jobs",
+            "2",
+            "--output-dir",
+            str(tmp_path / "out"),
+            "--summary",
+            summary_path,
+        ]
+    )
+    with open(summary_path, encoding="utf-8") as f:
+        summary = json.load(f)
+
+    assert code == 0, summary
+    for result in summary["jobs"]:
+        assert result["status"] == "ok"
+        assert os.path.getsize(result["output"]) > 0
+
+
+def test_job_key_separates_identical_jobs(engine):
+    text = "Một câu giống hệt nhau. " * 40
+    first = engine.generate_speech_parallel(
+        text, "echo", {"job_key": "first.wav"}, prefix="job000_first"
+    )
+    first_job = engine.last_job_id
+
+    # Job thứ hai không được dùng lại segment của job đầu (sẽ bị xóa khi ghép)
+    plan = engine.plan_chunks(text, "echo", {"job_key": "second.wav"}, "job001")
+    assert engine.last_job_id != first_job
+    assert not any(task.done for task in plan)
+    assert {task.output_path for task in plan}.isdisjoint(map(str, first))
+
+
+def test_adaptive_workers_flags(monkeypatch):
+    from src.config import settings as config
+
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", False)
+    assert parse_args([]).adaptive_workers is False
+    assert parse_args(["--adaptive-workers"]).adaptive_workers is True
+    monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY", True)
+    assert parse_args(["--no-adaptive-workers"]).adaptive_workers is False
+    assert parse_args(["--fixed-workers"]).adaptive_workers is False
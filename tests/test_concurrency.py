@@ -0,0 +1,129 @@
+import pytest
+
+from src.core.concurrency import AimdController, is_overload
+from src.core.hedging import RequestCancelled
+from src.core.scheduler import RateLimitScheduler
+
+
+class ApiError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = RateLimitScheduler(max_in_flight=10)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def run_window(controller, latency, cost=1000):
+    for _ in range(controller.limit):
+        controller.on_success(latency, cost)
+
+
+def test_additive_increase_up_to_max(scheduler):
+    controller = AimdController(scheduler, min_limit=2, max_limit=7)
+    assert controller.limit == 3
+    for expected in (4, 5, 6, 7, 7):
+        run_window(controller, 1.0)
+        assert controller.limit == expected
+    assert scheduler.max_in_flight == 7
+
+
+def test_overload_halves_once_per_burst(scheduler):
+    controller = AimdController(scheduler, min_limit=2, max_limit=10, initial=8)
+    controller.on_error(ApiError(429))
+    assert controller.limit == 4
+    # Các lỗi cùng đợt quá tải (trong cooldown) không giảm thêm
+    controller.on_error(ApiError(429))
+    controller.on_error(TimeoutError())
+    assert controller.limit == 4
+    assert controller.decreases == {"overload:429": 1}
+
+
+def test_limit_never_below_min(scheduler):
+    controller = AimdController(scheduler, min_limit=3, max_limit=10, initial=4)
+    controller._cooldown = 0.0
+    for _ in range(5):
+        controller.on_error(ApiError(503))
+    assert controller.limit == 3
+
+
+def test_latency_rise_backs_off(scheduler):
+    controller = AimdController(scheduler, min_limit=1, max_limit=10, initial=4)
+    run_window(controller, 1.0)
+    assert controller.limit == 5
+    run_window(controller, 3.0)
+    assert controller.limit == 2
+    assert controller.decreases == {"latency_rise": 1}
+
+
+def test_latency_is_normalized_by_chunk_size(scheduler):
+    controller = AimdController(scheduler, min_limit=1, max_limit=10, initial=4)
+    run_window(controller, 1.0, cost=1000)
+    # Chunk dài gấp 3 thì lâu gấp 3: không phải dấu hiệu quá tải
+    run_window(controller, 3.0, cost=3000)
+    assert controller.limit == 6
+
+
+def test_target_latency(scheduler):
+    controller = AimdController(
+        scheduler, min_limit=1, max_limit=10, initial=4, target_latency=2.0
+    )
+    run_window(controller, 2.5)
+    assert controller.limit == 2
+    assert controller.decreases == {"latency_target": 1}
+
+
+def test_mostly_failing_window_holds_limit(scheduler):
+    controller = AimdController(scheduler, min_limit=1, max_limit=10, initial=4)
+    for _ in range(3):
+        controller.on_error(ApiError(500))
+    controller.on_success(1.0, 1000)
+    assert controller.limit == 4
+
+
+def test_overload_classification():
+    assert is_overload(ApiError(429)) and is_overload(ApiError(504))
+    assert not is_overload(ApiError(500)) and not is_overload(ValueError())
+    try:
+        try:
+            raise TimeoutError()
+        except TimeoutError as e:
+            raise Exception("Error generating speech") from e
+    except Exception as wrapped:
+        assert is_overload(wrapped)
+
+
+def test_cancelled_requests_do_not_reach_controller(scheduler):
+    calls = []
+
+    class Recorder:
+        def on_success(self, latency, cost=0):
+            calls.append("success")
+
+        def on_error(self, error, latency=None):
+            calls.append("error")
+
+    scheduler.controller = Recorder()
+
+    def cancelled():
+        raise Exception("Error generating speech") from RequestCancelled()
+
+    with pytest.raises(Exception):
+        scheduler.call(cancelled)
+    assert calls == []
+
+
+def test_engine_keeps_configured_limit_by_default(offline_config):
+    from src.core.tts_engine import TTSEngine
+
+    engine = TTSEngine(max_workers=15)
+    try:
+        assert engine.concurrency is None
+        assert engine.scheduler.max_in_flight == 15
+    finally:
+        engine.scheduler.shutdown()
+        engine.journal.close()
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from src.core.conversion_service import ConversionService
+
+
+TEXT = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(6))
+
+
+@pytest.fixture
+def service(engine):
+    engine.chunk_size = 30
+    service = ConversionService(engine)
+    yield service
+    service.shutdown()
+    service._thread.join(timeout=10)
+
+
+def collect(service, job_ids, timeout=10.0):
+    """Poll như root.after cho tới khi mọi job kết thúc"""
+    events = []
+    finished = set()
+    deadline = time.monotonic() + timeout
+    while finished != set(job_ids) and time.monotonic() < deadline:
+        for event in service.poll():
+            events.append(event)
+            if event.kind in ("done", "error"):
+                finished.add(event.job_id)
+        time.sleep(0.01)
+    assert finished == set(job_ids)
+    return events
+
+
+def kinds(events, job_id):
+    return [event.kind for event in events if event.job_id == job_id]
+
+
+def test_job_events_arrive_in_order(service, engine):
+    job_id = service.submit(TEXT, "alloy")
+    events = collect(service, [job_id])
+    chunks = len(engine.optimize_chunk_size(TEXT))
+
+    sequence = kinds(events, job_id)
+    assert sequence[:3] == ["queued", "started", "planned"]
+    assert sequence[-1] == "done"
+    assert sequence.count("progress") == sequence.count("chunk") == chunks
+
+    chunk_events = [event.data for event in events if event.kind == "chunk"]
+    assert [data["index"] for data in chunk_events] == list(range(chunks))
+    done = events[-1].data
+    assert done["audio_files"] == [data["path"] for data in chunk_events]
+    assert done["chars"] == len(TEXT)
+
+
+def test_submit_and_poll_do_not_block(service, engine):
+    release = threading.Event()
+    synthesize = engine.backend.synthesize
+
+    def slow(*args, **kwargs):
+        release.wait(10)
+        return synthesize(*args, **kwargs)
+
+    engine.backend.synthesize = slow
+    start = time.monotonic()
+    first = service.submit(TEXT, "alloy")
+    second = service.submit("Một câu khác.", "echo")
+    service.poll()
+    assert time.monotonic() - start < 1.0
+
+    release.set()
+    events = collect(service, [first, second])
+    # Job thứ hai chỉ bắt đầu sau khi job đầu xong
+    order = [(event.kind, event.job_id) for event in events]
+    assert order.index(("done", first)) < order.index(("started", second))
+    assert kinds(events, second)[-1] == "done"
+
+
+def test_cancel_queued_and_running_jobs(service, engine):
+    started = threading.Event()
+    release = threading.Event()
+    synthesize = engine.backend.synthesize
+
+    def slow(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        return synthesize(*args, **kwargs)
+
+    engine.backend.synthesize = slow
+    running = service.submit(TEXT, "alloy")
+    queued = service.submit(TEXT, "alloy")
+    assert started.wait(10)
+    service.cancel(queued)
+    service.cancel(running)
+    release.set()
+
+    events = collect(service, [running, queued])
+    assert kinds(events, queued) == ["queued", "error"]
+    assert kinds(events, running)[-1] == "error"
+    # Dừng sau chunk đầu tiên được trả về
+    assert kinds(events, running).count("chunk") == 1
+
+
+def test_engine_error_becomes_error_event(service, engine):
+    def broken(text, voice, settings=None, prefix="segment", **callbacks):
+        raise RuntimeError("plan failed")
+        yield
+
+    engine.iter_speech_parallel = broken
+    job_id = service.submit(TEXT, "alloy")
+    events = collect(service, [job_id])
+    assert events[-1].kind == "error"
+    assert events[-1].data == {"error": "plan failed"}
+    assert service.active_job is None
+
+
+def test_poll_limits_events_per_call(service):
+    for index in range(5):
+        service._emit("progress", 1, {"completed": index})
+    assert len(service.poll(max_events=3)) == 3
+    assert len(service.poll()) == 2
+    assert service.poll() == []
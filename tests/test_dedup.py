@@ -0,0 +1,79 @@
+from collections import Counter
+
+from src.core.text_chunker import chunk_text, dedup_chunk_text, find_repeats
+
+INTRO = "Đây là lời dẫn chương trình được đọc lại ở đầu mỗi phần. " * 6
+
+
+def test_repeat_runs_have_identical_partners():
+    keys = list("abcxabcdyabcd")
+    repeats = find_repeats(keys, [100] * len(keys), min_chars=200)
+    runs = [tuple(keys[start:end]) for start, end in repeats]
+    assert all(runs.count(run) >= 2 for run in runs)
+    assert repeats == [(0, 3), (4, 7), (9, 12)]
+
+
+def test_runs_stop_at_differing_separator():
+    keys = ["a", "b", "c", "x", "a", "b", "c"]
+    separators = [" ", " ", " ", " ", " ", "\n", " "]
+    repeats = find_repeats(keys, [100] * 7, min_chars=200, separators=separators)
+    assert repeats == [(0, 2), (4, 6)]
+
+
+def test_short_runs_are_ignored():
+    keys = ["a", "b", "x", "a", "b"]
+    assert find_repeats(keys, [50] * 5, min_chars=200) == []
+
+
+def test_repeated_intro_becomes_identical_chunks():
+    text = (
+        "Phần một. "
+        + INTRO.strip()
+        + "\n\n"
+        + "Nội dung phần một. " * 20
+        + INTRO
+        + "Nội dung phần hai. " * 20
+        + INTRO.strip()
+    )
+    chunks = dedup_chunk_text(text, target_chars=3500)
+    assert Counter(chunks)[INTRO.strip()] == 3
+    assert "".join(" ".join(chunks).split()) == "".join(text.split())
+
+
+def test_whitespace_variant_is_not_a_repeat():
+    variant = INTRO.replace("lời dẫn", "lời  dẫn")
+    text = "Mở đầu. " + INTRO + "Giữa. " + variant + "Cuối. " + INTRO
+    chunks = dedup_chunk_text(text)
+    assert Counter(chunks)[INTRO.strip()] == 2
+    # Mọi chunk xuất hiện nhiều lần phải giống nhau từng ký tự
+    assert variant.strip() not in chunks
+
+
+def test_without_repeats_matches_chunk_text():
+    text = " ".join(f"Câu {i} không lặp lại." for i in range(2000))
+    assert dedup_chunk_text(text) == chunk_text(text)
+
+
+def test_engine_synthesizes_each_duplicate_once(engine):
+    engine.dedup_chunks = True
+    calls = []
+    synthesize = engine.backend.synthesize
+
+    def counting(text, *args, **kwargs):
+        calls.append(text)
+        return synthesize(text, *args, **kwargs)
+
+    engine.backend.synthesize = counting
+    text = "Một. " + INTRO + "Hai. " * 50 + INTRO + "Ba. " * 50 + INTRO
+
+    audio = engine.generate_speech_parallel(text, "alloy")
+    chunks = engine.optimize_chunk_size(text)
+
+    assert len(audio) == len(chunks)
+    assert len(calls) == len(set(chunks)) < len(chunks)
+    assert Counter(calls)[INTRO.strip()] == 1
+    job = engine.get_job_status()
+    assert (job["status"], job["done"]) == ("done", len(chunks))
+
+    savings = engine.get_dedup_savings(chunks, "alloy")
+    assert savings["saved_chars"] == 2 * len(INTRO.strip())
@@ -0,0 +1,145 @@
+import pytest
+
+from src.core.estimator import (
+    DEFAULT_LATENCY,
+    MIN_SAMPLES,
+    ThroughputEstimator,
+    fit_latency,
+    simulate_makespan,
+)
+from src.core.job_journal import JobJournal
+
+
+MODEL = "offline/tone"
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs.sqlite3"))
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def estimator(journal):
+    return ThroughputEstimator(journal)
+
+
+def latency(chars, in_flight, a=0.5, b=0.01, c=0.1):
+    return a + b * chars + c * (in_flight - 1)
+
+
+def observe(estimator, voice="alloy", scale=1.0, count=40):
+    for i in range(count):
+        chars, in_flight = 100 + 50 * (i % 8), 1 + i % 4
+        seconds = latency(chars, in_flight) * scale
+        estimator.observe_request(MODEL, voice, chars, seconds, in_flight)
+
+
+def test_fit_recovers_latency_model():
+    samples = [
+        (chars, latency(chars, in_flight), in_flight)
+        for chars in (100, 500, 1000, 3000)
+        for in_flight in (1, 2, 4)
+    ]
+    (a, b, c), ratios = fit_latency(samples)
+    assert (a, b, c) == pytest.approx((0.5, 0.01, 0.1))
+    assert all(ratio == pytest.approx(1.0) for ratio in ratios)
+
+
+def test_fit_needs_enough_samples():
+    samples = [(100, 1.5, 1)] * (MIN_SAMPLES - 1)
+    assert fit_latency(samples)[0] == DEFAULT_LATENCY
+
+
+def test_simulate_makespan():
+    assert simulate_makespan([3.0, 1.0, 1.0, 1.0], workers=2) == 3.0
+    assert simulate_makespan([1.0] * 4, workers=1) == 4.0
+    assert simulate_makespan([1.0] * 4, workers=10) == 1.0
+    assert simulate_makespan([], workers=4) == 0.0
+
+
+def test_estimate_bounds_workers_and_cost(estimator):
+    observe(estimator)
+    chunks = [1000] * 20
+    serial = estimator.estimate(chunks, MODEL, "alloy", workers=1, price_per_1k=15.0)
+    parallel = estimator.estimate(chunks, MODEL, "alloy", workers=10)
+
+    assert serial.low <= serial.seconds <= serial.high
+    assert parallel.seconds < serial.seconds / 4
+    assert serial.cost == pytest.approx(300.0)
+    assert (serial.chunks, serial.samples) == (20, 40)
+
+    # Rate limit 60 request/phút: 20 chunk không thể xong dưới ~15 giây
+    limited = estimator.estimate(
+        chunks, MODEL, "alloy", workers=10, requests_per_minute=60
+    )
+    assert limited.low >= 15.0
+
+
+def test_latency_is_learned_per_voice(estimator):
+    observe(estimator, voice="alloy")
+    observe(estimator, voice="onyx", scale=3.0)
+    fast = estimator.estimate([1000] * 4, MODEL, "alloy", workers=4)
+    slow = estimator.estimate([1000] * 4, MODEL, "onyx", workers=4)
+    assert slow.seconds == pytest.approx(3 * fast.seconds, rel=0.1)
+
+
+def test_history_survives_restart(journal, estimator):
+    observe(estimator)
+    before = estimator.estimate([500] * 8, MODEL, "alloy", workers=2)
+
+    reopened = ThroughputEstimator(journal)
+    assert reopened.sample_count(MODEL) == 40
+    after = reopened.estimate([500] * 8, MODEL, "alloy", workers=2)
+    assert after.seconds == pytest.approx(before.seconds)
+
+
+def test_calibration_from_finished_runs(estimator):
+    observe(estimator)
+    chunks = [1000] * 10
+    raw = estimator.estimate(chunks, MODEL, "alloy", workers=2, calibrated=False)
+    for _ in range(3):
+        estimator.observe_run(MODEL, chunks, 2, raw.seconds, 2 * raw.seconds)
+
+    assert estimator.get_calibration(MODEL) == pytest.approx(2.0)
+    calibrated = estimator.estimate(chunks, MODEL, "alloy", workers=2)
+    assert calibrated.seconds == pytest.approx(2 * raw.seconds)
+
+    # Hệ số bị chặn để vài job bất thường không làm hỏng dự đoán
+    for _ in range(4):
+        estimator.observe_run(MODEL, chunks, 2, 1.0, 100.0)
+    assert estimator.get_calibration(MODEL) == 4.0
+
+
+def test_estimate_remaining_follows_observed_speed(estimator):
+    observe(estimator)
+    chunks = [1000] * 10
+    full = estimator.estimate(chunks, MODEL, "alloy", workers=1)
+
+    # Nửa đầu chạy đúng dự đoán: tổng gần như không đổi
+    on_track = estimator.estimate_remaining(
+        chunks, 5, full.seconds / 2, MODEL, voice="alloy", workers=1
+    )
+    assert on_track.seconds == pytest.approx(full.seconds, rel=0.05)
+    assert on_track.chunks == 10
+
+    # Nửa đầu chậm gấp đôi: phần còn lại cũng bị kéo dài
+    slow = estimator.estimate_remaining(
+        chunks, 5, full.seconds, MODEL, voice="alloy", workers=1
+    )
+    assert slow.seconds > on_track.seconds * 1.2
+    assert slow.low <= slow.seconds <= slow.high
+
+
+def test_engine_feeds_estimator(engine):
+    engine.chunk_size = 30
+    text = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(4))
+    audio_files = engine.generate_speech_parallel(text, "alloy")
+
+    assert engine.estimator.sample_count(engine.model_id) == len(audio_files)
+    runs = engine.journal.get_run_history(engine.model_id)
+    assert len(runs) == 1 and runs[0][0] == len(audio_files)
+    estimate = engine.estimate_text(text, "alloy")
+    assert estimate.chunks == len(audio_files)
+    assert estimate.samples == len(audio_files)
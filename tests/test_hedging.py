@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from src.core.audio_formats import wav_header
+from src.core.backends import TTSBackend
+from src.core.hedging import RequestHedger
+from src.core.scheduler import RateLimitScheduler
+
+
+class SlowFirstBackend(TTSBackend):
+    """Request đầu tiên tải rất chậm, các request sau về ngay"""
+
+    name = "slow-first"
+    formats = ("wav",)
+
+    def __init__(self, blocks=100):
+        self.blocks = blocks
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def stream(self, text, voice, speed=1.0, response_format="wav", chunk_size=65536):
+        with self._lock:
+            self.calls += 1
+            slow = self.calls == 1
+        pcm = b"\0\0" * 2400
+        blocks = self.blocks if slow else 1
+        yield wav_header(len(pcm) * blocks)
+        for _ in range(blocks):
+            if slow:
+                time.sleep(0.05)
+            yield pcm
+
+
+@pytest.fixture
+def offline_config(offline_config, monkeypatch):
+    # Hedging và AIMD tắt mặc định; engine của các test này bật cả hai
+    monkeypatch.setattr(offline_config, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(offline_config, "ADAPTIVE_CONCURRENCY", True)
+    return offline_config
+
+
+def wait_idle(scheduler, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not scheduler.in_flight
+
+
+def test_cancelled_hedge_loser_is_not_a_failure(engine):
+    backend = SlowFirstBackend()
+    engine.backend = backend
+    engine.hedger.threshold = lambda cost: 0.2
+    engine.hedger.budget_ratio = 1.0
+    errors = []
+    engine.concurrency.on_error = lambda error, latency=None: errors.append(error)
+
+    task = engine.plan_chunks("Xin chào thế giới.", "alloy")[0]
+    audio = engine.submit_chunk(task, "alloy").result(timeout=10)
+    wait_idle(engine.scheduler)
+
+    assert audio.endswith("_hedge.wav")
+    assert backend.calls == 2
+    assert engine.get_hedge_stats()["won"] == 1
+
+    job = engine.get_job_status(task.job_id)
+    assert (job["status"], job["done"], job["failed"]) == ("done", 1, 0)
+    assert engine.metrics.get("tts_retries_total").total == 0
+    assert engine.metrics.get("tts_request_errors_total").total == 0
+    assert errors == []
+
+
+def test_hedge_budget_limits_extra_requests(engine):
+    engine.hedger.threshold = lambda cost: 0.0
+    engine.hedger.budget_ratio = 0.0
+    engine.backend = SlowFirstBackend(blocks=10)
+
+    task = engine.plan_chunks("Xin chào.", "alloy")[0]
+    engine.submit_chunk(task, "alloy").result(timeout=10)
+
+    assert engine.get_hedge_stats()["launched"] == 0
+    assert engine.backend.calls == 1
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = RateLimitScheduler(max_in_flight=4)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_no_hedge_after_primary_finished(scheduler):
+    release = threading.Event()
+    hedges = []
+
+    def threshold(cost):
+        # Request gốc xong ngay sau khi thread giám sát lấy danh sách
+        release.set()
+        result.result(timeout=5)
+        return 0.0
+
+    hedger = RequestHedger(scheduler, threshold, budget_ratio=1.0, interval=0.01)
+    result = hedger.submit(
+        lambda cancel: release.wait(5) and "primary",
+        lambda cancel: hedges.append(1),
+        cost=10,
+    )
+    assert result.result(timeout=5) == "primary"
+    time.sleep(0.1)
+
+    assert hedges == []
+    assert hedger.get_stats()["launched"] == 0
+
+
+def test_finalize_runs_outside_lock(scheduler):
+    hedger = None
+    finalized = []
+    primary_done = threading.Event()
+
+    def primary(cancel):
+        primary_done.wait(5)
+        return "slow"
+
+    def hedge(cancel):
+        return "fast"
+
+    def finalize(winner, loser):
+        acquired = hedger._lock.acquire(blocking=False)
+        if acquired:
+            hedger._lock.release()
+        finalized.append((winner, loser, acquired))
+
+    hedger = RequestHedger(
+        scheduler, lambda cost: 0.0, budget_ratio=1.0, interval=0.01
+    )
+    # Bên thua bỏ qua cờ hủy và vẫn trả về kết quả để finalize dọn
+    result = hedger.submit(primary, hedge, cost=10, finalize=finalize)
+    assert result.result(timeout=5) == "fast"
+    primary_done.set()
+
+    deadline = time.monotonic() + 5
+    while not finalized and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert finalized == [("fast", "slow", True)]
+    assert hedger.get_stats()["won"] == 1
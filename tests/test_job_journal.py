@@ -0,0 +1,104 @@
+import pytest
+
+from src.core.job_journal import JobJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(str(tmp_path / "jobs.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def make_output(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"audio")
+    return str(path)
+
+
+def counts(job):
+    return job["status"], job["done"], job["failed"], job["pending"]
+
+
+def test_status_transitions(journal, tmp_path):
+    chunks = ["một", "hai"]
+    job_id = journal.make_job_id("một hai", voice="alloy")
+    assert journal.start_job(job_id, chunks) == {}
+    assert counts(journal.get_job(job_id)) == ("pending", 0, 0, 2)
+
+    journal.mark_failed(job_id, 0, RuntimeError("boom"))
+    assert counts(journal.get_job(job_id)) == ("pending", 0, 1, 1)
+
+    # Thử lại chunk lỗi thành công
+    journal.mark_done(job_id, 0, make_output(tmp_path, "0.mp3"))
+    journal.mark_done(job_id, 1, make_output(tmp_path, "1.mp3"))
+    assert counts(journal.get_job(job_id)) == ("done", 2, 0, 0)
+
+
+def test_late_failure_does_not_overwrite_done(journal, tmp_path):
+    job_id = journal.make_job_id("text")
+    journal.start_job(job_id, ["text"])
+    journal.mark_done(job_id, 0, make_output(tmp_path, "0.mp3"))
+    journal.mark_failed(job_id, 0, RuntimeError("late"))
+
+    assert counts(journal.get_job(job_id)) == ("done", 1, 0, 0)
+
+
+def test_resume_returns_finished_chunks(journal, tmp_path):
+    chunks = ["a", "b", "c"]
+    job_id = journal.make_job_id("abc")
+    journal.start_job(job_id, chunks)
+    first = make_output(tmp_path, "0.mp3")
+    journal.mark_done(job_id, 0, first)
+    journal.mark_done(job_id, 2, str(tmp_path / "deleted.mp3"))
+    journal.mark_failed(job_id, 1, RuntimeError("boom"))
+
+    # File của chunk 2 không còn: phải tổng hợp lại
+    assert journal.start_job(job_id, chunks) == {0: first}
+    assert counts(journal.get_job(job_id)) == ("pending", 1, 1, 1)
+
+
+def test_resumed_chunk_failure_is_recorded(journal, tmp_path):
+    job_id = journal.make_job_id("ab")
+    journal.start_job(job_id, ["a", "b"])
+    journal.mark_done(job_id, 0, make_output(tmp_path, "0.mp3"))
+    journal.mark_done(job_id, 1, str(tmp_path / "deleted.mp3"))
+    assert journal.get_job(job_id)["status"] == "done"
+
+    journal.start_job(job_id, ["a", "b"])
+    journal.mark_failed(job_id, 1, RuntimeError("boom"))
+    assert counts(journal.get_job(job_id)) == ("pending", 1, 1, 0)
+
+
+def test_resume_survives_reopen(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    journal = JobJournal(path)
+    job_id = journal.make_job_id("xy")
+    journal.start_job(job_id, ["x", "y"])
+    output = make_output(tmp_path, "0.mp3")
+    journal.mark_done(job_id, 0, output)
+    journal.close()
+
+    reopened = JobJournal(path)
+    try:
+        assert reopened.start_job(job_id, ["x", "y"]) == {0: output}
+    finally:
+        reopened.close()
+
+
+def test_changed_chunks_reset_job(journal, tmp_path):
+    job_id = journal.make_job_id("abc")
+    journal.start_job(job_id, ["a", "b"])
+    journal.mark_done(job_id, 0, make_output(tmp_path, "0.mp3"))
+
+    assert journal.start_job(job_id, ["ab"]) == {}
+    assert counts(journal.get_job(job_id)) == ("pending", 0, 0, 1)
+
+
+def test_make_job_id_depends_on_params():
+    assert JobJournal.make_job_id("x", voice="a") == JobJournal.make_job_id(
+        "x", voice="a"
+    )
+    assert JobJournal.make_job_id("x", voice="a") != JobJournal.make_job_id(
+        "x", voice="b"
+    )
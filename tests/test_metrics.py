@@ -0,0 +1,127 @@
+import json
+import math
+import threading
+
+import pytest
+
+from src.core.metrics import Histogram, MetricsRegistry, create_tts_metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency", buckets=[0.1, 1.0, 10.0])
+    for value in (0.05, 0.1, 0.5, 5.0, 50.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [2, 3, 4]
+    assert (histogram.count, histogram.min, histogram.max) == (5, 0.05, 50.0)
+    assert histogram.mean == pytest.approx(55.65 / 5)
+
+
+def test_histogram_quantile_interpolates_within_bucket():
+    histogram = Histogram("latency", "Latency", buckets=[1.0, 2.0, 4.0])
+    assert histogram.quantile(0.5) == 0.0
+    for value in (1.5,) * 50 + (3.0,) * 50:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == pytest.approx(2.0)
+    assert 2.0 < histogram.quantile(0.95) <= 3.0
+    # Không vượt ra ngoài min/max đã quan sát
+    assert histogram.quantile(0.01) >= 1.5
+
+
+def test_prometheus_text_format():
+    metrics = MetricsRegistry()
+    metrics.histogram("tts_request_seconds", "Request time", buckets=[0.5, 1.0])
+    metrics.counter("tts_retries_total", "Retries")
+    metrics.observe("tts_request_seconds", 0.25)
+    metrics.observe("tts_request_seconds", 2.0)
+    metrics.inc("tts_retries_total", label_value="rate_limit")
+    metrics.inc("tts_retries_total", 2, label_value="server_error")
+
+    lines = metrics.to_prometheus().splitlines()
+    assert "# TYPE tts_request_seconds histogram" in lines
+    assert 'tts_request_seconds_bucket{le="0.5"} 1' in lines
+    assert 'tts_request_seconds_bucket{le="1"} 1' in lines
+    assert 'tts_request_seconds_bucket{le="+Inf"} 2' in lines
+    assert "tts_request_seconds_sum 2.25" in lines
+    assert "tts_request_seconds_count 2" in lines
+    assert "# TYPE tts_retries_total counter" in lines
+    assert 'tts_retries_total{reason="rate_limit"} 1' in lines
+    assert 'tts_retries_total{reason="server_error"} 2' in lines
+
+
+def test_observe_ignores_unknown_and_missing_values():
+    metrics = create_tts_metrics()
+    metrics.observe("not_declared", 1.0)
+    metrics.observe("tts_ttfb_seconds", None)
+    metrics.observe("tts_ttfb_seconds", math.nan)
+    metrics.inc("not_declared")
+
+    assert metrics.get("not_declared") is None
+    assert metrics.get("tts_ttfb_seconds").count == 0
+
+
+def test_concurrent_observations_are_not_lost():
+    metrics = create_tts_metrics()
+
+    def work():
+        for _ in range(1000):
+            metrics.observe("tts_request_seconds", 0.01)
+            metrics.inc("tts_chunks_total", label_value="synthesized")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.get("tts_request_seconds").count == 8000
+    assert metrics.get("tts_chunks_total").values == {"synthesized": 8000}
+
+
+def test_export_writes_json_and_prometheus(tmp_path):
+    metrics = create_tts_metrics()
+    metrics.observe("tts_merge_seconds", 0.3)
+    json_path, prom_path = metrics.export(str(tmp_path / "out"), name="run")
+
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["tts_merge_seconds"]["count"] == 1
+    assert data["tts_merge_seconds"]["p50"] == pytest.approx(0.3)
+    with open(prom_path, encoding="utf-8") as f:
+        assert "tts_merge_seconds_count 1" in f.read().splitlines()
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == [
+        "run.json",
+        "run.prom",
+    ]
+
+
+def test_reset_keeps_declared_metrics():
+    metrics = create_tts_metrics()
+    metrics.observe("tts_request_seconds", 1.0)
+    metrics.inc("tts_retries_total", label_value="timeout")
+    metrics.reset()
+
+    assert metrics.get("tts_request_seconds").count == 0
+    assert metrics.get("tts_retries_total").total == 0
+    metrics.observe("tts_request_seconds", 1.0)
+    assert metrics.get("tts_request_seconds").count == 1
+
+
+def test_engine_records_pipeline_metrics(engine, tmp_path):
+    engine.chunk_size = 30
+    text = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(4))
+    audio_files = engine.generate_speech_parallel(text, "alloy")
+    engine.combine_audio_files(audio_files, str(tmp_path / "merged.wav"))
+
+    metrics = engine.get_metrics()
+    chunks = len(audio_files)
+    assert metrics["tts_request_seconds"]["count"] == chunks
+    assert metrics["tts_queue_wait_seconds"]["count"] == chunks
+    assert metrics["tts_ttfb_seconds"]["count"] == chunks
+    assert metrics["tts_response_bytes"]["sum"] > 0
+    assert metrics["tts_merge_seconds"]["count"] == 1
+    assert metrics["tts_chunks_total"]["values"] == {"synthesized": chunks}
+
+    json_path, prom_path = engine.export_metrics(str(tmp_path / "metrics"))
+    assert json_path.endswith("metrics.json") and prom_path.endswith("metrics.prom")
@@ -0,0 +1,101 @@
+import errno
+import os
+import struct
+
+import pytest
+
+from src.core.audio_metadata import read_metadata
+from src.core.mp3_frames import Mp3FormatError, concat_mp3, scan_frames, silent_frames
+
+
+def id3_tag(size=32):
+    return b"ID3\x04\x00\x00" + bytes([0, 0, 0, size]) + bytes(size)
+
+
+def xing_frame_count(data):
+    offset = data.index(b"Xing") if b"Xing" in data[:1024] else data.index(b"Info")
+    return struct.unpack_from(">I", data, offset + 8)[0]
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_chunks(tmp_path, durations, tagged=False):
+    paths = []
+    for i, duration in enumerate(durations):
+        path = tmp_path / f"chunk_{i:04d}.mp3"
+        path.write_bytes((id3_tag() if tagged else b"") + silent_frames(duration))
+        paths.append(str(path))
+    return paths
+
+
+def test_concat_duration_is_sum_of_inputs(tmp_path):
+    paths = write_chunks(tmp_path, [1.0, 2.5, 0.5], tagged=True)
+    output = str(tmp_path / "merged.mp3")
+    concat_mp3(paths, output)
+
+    expected = sum(read_metadata(path).duration for path in paths)
+    assert read_metadata(output).duration == pytest.approx(expected)
+
+    data = read_bytes(output)
+    frames = sum(len(scan_frames(read_bytes(p)).offsets) for p in paths)
+    assert xing_frame_count(data) == frames
+    # Tag ID3 của chunk không lọt vào giữa file ghép
+    assert b"ID3" not in data
+
+
+def test_concat_more_inputs_than_fd_limit(tmp_path, fd_limit):
+    paths = write_chunks(tmp_path, [0.1] * 300)
+    output = str(tmp_path / "merged.mp3")
+
+    fd_limit(16)
+    concat_mp3(paths, output)
+
+    merged = read_metadata(output)
+    assert merged.frame_count == 300 * len(scan_frames(silent_frames(0.1)).offsets)
+
+
+def test_concat_rejects_mismatched_sample_rate(tmp_path):
+    first = tmp_path / "a.mp3"
+    second = tmp_path / "b.mp3"
+    first.write_bytes(silent_frames(0.5, sample_rate=24000))
+    second.write_bytes(silent_frames(0.5, sample_rate=22050))
+
+    with pytest.raises(Mp3FormatError):
+        concat_mp3([str(first), str(second)], str(tmp_path / "out.mp3"))
+    assert not (tmp_path / "out.mp3").exists()
+
+
+def test_concat_write_error_is_not_masked(tmp_path, monkeypatch):
+    paths = write_chunks(tmp_path, [0.5, 0.5])
+    output = tmp_path / "merged.mp3"
+    fdopen = os.fdopen
+
+    class FullDisk:
+        def __init__(self, f):
+            self.f = f
+            self.writes = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+        def write(self, data):
+            self.writes += 1
+            if self.writes > 1:  # Frame Xing ghi được, frame audio thì không
+                raise OSError(errno.ENOSPC, "No space left on device")
+            return self.f.write(data)
+
+    monkeypatch.setattr(
+        "src.core.mp3_frames.os.fdopen", lambda *a, **kw: FullDisk(fdopen(*a, **kw))
+    )
+    with pytest.raises(OSError) as error:
+        concat_mp3(paths, str(output))
+
+    assert error.value.errno == errno.ENOSPC
+    assert not output.exists()
+    assert not list(tmp_path.glob(".merge_*"))
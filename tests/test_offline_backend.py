@@ -0,0 +1,85 @@
+import json
+import math
+import stat
+import sys
+import wave
+from array import array
+
+from src.core.backends.offline_backend import SAMPLE_RATE, OfflineBackend, resample_pcm
+
+
+FAKE_ESPEAK = """#!{python}
+import json, math, sys, wave
+from array import array
+
+text = sys.stdin.buffer.read().decode("utf-8")
+with open({log!r}, "w") as log:
+    json.dump({{"argv": sys.argv[1:], "stdin": text}}, log)
+rate = 22050
+samples = array("h", (int(8000 * math.sin(i / 10)) for i in range(rate)))
+with wave.open(sys.stdout.buffer, "wb") as out:
+    out.setnchannels(1)
+    out.setsampwidth(2)
+    out.setframerate(rate)
+    out.writeframes(samples.tobytes())
+"""
+
+
+def make_backend(tmp_path):
+    log = tmp_path / "espeak.json"
+    script = tmp_path / "espeak"
+    script.write_text(FAKE_ESPEAK.format(python=sys.executable, log=str(log)))
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    backend = OfflineBackend(engine="espeak")
+    backend.espeak = str(script)
+    backend.ffmpeg = None
+    return backend, log
+
+
+def test_espeak_text_goes_through_stdin(tmp_path):
+    backend, log = make_backend(tmp_path)
+    pcm = backend.synthesize("--help me", "alloy", response_format="pcm")
+
+    call = json.loads(log.read_text())
+    assert call["stdin"] == "--help me"
+    assert "--help me" not in call["argv"]
+    assert "--stdin" in call["argv"]
+    # 1 giây 22050Hz được đổi sang 24kHz
+    assert abs(len(pcm) - 2 * SAMPLE_RATE) <= 4
+
+
+def test_espeak_wav_header_matches_output(tmp_path):
+    backend, _ = make_backend(tmp_path)
+    path = tmp_path / "out.wav"
+    path.write_bytes(backend.synthesize("xin chào", "alloy", response_format="wav"))
+
+    with wave.open(str(path)) as audio:
+        assert audio.getframerate() == SAMPLE_RATE
+        assert abs(audio.getnframes() - SAMPLE_RATE) <= 2
+
+
+def test_espeak_invalid_output_falls_back_to_tone(tmp_path):
+    backend = OfflineBackend(engine="espeak")
+    backend.espeak = "/bin/echo"
+    backend.ffmpeg = None
+    pcm = backend.synthesize("x" * 15, "alloy", response_format="pcm")
+    assert len(pcm) == 2 * SAMPLE_RATE
+
+
+def sine(i, rate):
+    return int(8000 * math.sin(2 * math.pi * 440 * i / rate))
+
+
+def test_resample_pcm_keeps_duration_and_shape():
+    src = array("h", (sine(i, 22050) for i in range(22050)))
+    if sys.byteorder == "big":
+        src.byteswap()
+    out = array("h")
+    out.frombytes(resample_pcm(src.tobytes(), 22050))
+    if sys.byteorder == "big":
+        out.byteswap()
+
+    assert len(out) == SAMPLE_RATE
+    expected = (sine(i, SAMPLE_RATE) for i in range(SAMPLE_RATE))
+    assert max(abs(a - b) for a, b in zip(out, expected)) < 100
+    assert resample_pcm(b"\1\2", SAMPLE_RATE) == b"\1\2"
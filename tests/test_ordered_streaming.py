@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def chunks(engine):
+    engine.chunk_size = 30
+    text = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(6))
+    chunks = engine.optimize_chunk_size(text)
+    assert len(chunks) >= 4
+    return text, chunks
+
+
+def gate_backend(engine, gated, fail=()):
+    """Chunk trong gated chờ event, chunk trong fail ném lỗi"""
+    release = threading.Event()
+    synthesize = engine.backend.synthesize
+
+    def gated_synthesize(text, *args, **kwargs):
+        if text in fail:
+            raise ValueError("bad chunk")
+        if text in gated:
+            assert release.wait(10)
+        return synthesize(text, *args, **kwargs)
+
+    engine.backend.synthesize = gated_synthesize
+    return release
+
+
+def test_first_chunk_is_yielded_before_later_chunks_finish(engine, chunks):
+    text, parts = chunks
+    release = gate_backend(engine, gated={parts[1]})
+    streamed = []
+    engine.set_chunk_callback(lambda index, audio: streamed.append(index))
+
+    results = engine.iter_speech_parallel(text, "alloy")
+    first = next(results)
+    # Chunk 1 vẫn đang bị giữ: chunk 0 đã phát được, các chunk sau thì chưa
+    assert first[0] == 0
+    assert streamed == [0]
+    release.set()
+
+    rest = list(results)
+    assert [index for index, _ in [first] + rest] == list(range(len(parts)))
+    assert streamed == list(range(len(parts)))
+
+
+def test_failed_chunk_is_skipped_in_order(engine, chunks):
+    text, parts = chunks
+    gate_backend(engine, gated=(), fail={parts[2]})
+
+    indices = [index for index, _ in engine.iter_speech_parallel(text, "alloy")]
+    assert indices == [i for i in range(len(parts)) if i != 2]
+
+
+def test_stopping_early_cancels_queued_chunks(engine, chunks):
+    text, parts = chunks
+    engine.scheduler.max_in_flight = 1
+    release = gate_backend(engine, gated=set(parts[1:]))
+    calls = []
+    synthesize = engine.backend.synthesize
+    engine.backend.synthesize = lambda text, *a, **kw: (
+        calls.append(text) or synthesize(text, *a, **kw)
+    )
+
+    results = engine.iter_speech_parallel(text, "alloy")
+    assert next(results)[0] == 0
+    results.close()
+    release.set()
+    engine.scheduler.shutdown()
+
+    # Chunk còn trong hàng đợi của executor không bao giờ được gửi
+    assert len(calls) < len(parts)
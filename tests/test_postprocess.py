@@ -0,0 +1,138 @@
+import math
+import threading
+
+import pytest
+
+from src.core.audio_formats import PCM_SAMPLE_RATE, parse_wav, wav_header
+from src.core.postprocess import (
+    PostProcessor,
+    crossfade_join,
+    integrated_loudness,
+    normalize_loudness,
+    trim_silence,
+)
+from src.core.transcoder import Transcoder
+
+np = pytest.importorskip("numpy")
+
+
+def sine(seconds, amplitude=1.0, freq=1000.0, sample_rate=PCM_SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * math.pi * freq * t)).astype(np.float32)
+
+
+def test_full_scale_1khz_sine_is_minus_3_lufs():
+    assert integrated_loudness(sine(3.0)) == pytest.approx(-3.01, abs=0.05)
+
+
+def test_loudness_tracks_gain():
+    # -20 dB biên độ là -20 LU
+    assert integrated_loudness(sine(3.0, 0.1)) == pytest.approx(-23.01, abs=0.05)
+
+
+def test_silence_has_no_loudness():
+    assert integrated_loudness(np.zeros(PCM_SAMPLE_RATE, np.float32)) == -math.inf
+
+
+def test_normalize_reaches_target():
+    samples = normalize_loudness(sine(3.0, 0.05), target_lufs=-16.0)
+    assert integrated_loudness(samples) == pytest.approx(-16.0, abs=0.05)
+
+
+def test_normalize_respects_peak_limit():
+    samples = normalize_loudness(sine(3.0, 0.05), target_lufs=0.0, peak_db=-1.0)
+    assert float(np.max(np.abs(samples))) == pytest.approx(10 ** (-1 / 20), rel=1e-3)
+
+
+def test_trim_silence_keeps_padding():
+    silence = np.zeros(PCM_SAMPLE_RATE, np.float32)
+    samples = np.concatenate([silence, sine(0.5, 0.5), silence])
+    trimmed = trim_silence(samples, pad=0.15)
+    # 0.5 s có tiếng + 0.15 s mỗi bên, sai số một block 10 ms
+    assert len(trimmed) == pytest.approx(0.8 * PCM_SAMPLE_RATE, abs=240)
+    assert np.shares_memory(trimmed, samples)
+
+
+def test_trim_silence_of_silent_chunk_is_empty():
+    assert len(trim_silence(np.zeros(PCM_SAMPLE_RATE, np.float32))) == 0
+
+
+def join(chunks, fade):
+    out = bytearray()
+    written = crossfade_join(iter(chunks), out.extend, fade)
+    samples = np.frombuffer(bytes(out), dtype="<i2")
+    assert written == len(samples)
+    return samples
+
+
+def test_crossfade_sample_count_and_curve():
+    fade = 480
+    first = np.full(4800, 10000, dtype="<i2")
+    second = np.full(2400, 10000, dtype="<i2")
+    samples = join([first, second], fade)
+
+    assert len(samples) == len(first) + len(second) - fade
+    mixed = samples[len(first) - fade:len(first)]
+    t = np.linspace(0.0, math.pi / 2, fade)
+    # Equal-power: cos + sin, tín hiệu giống nhau đạt đỉnh √2 ở giữa
+    np.testing.assert_allclose(mixed, 10000 * (np.cos(t) + np.sin(t)), atol=1.5)
+    assert samples[0] == samples[-1] == 10000
+
+
+def test_crossfade_limited_to_half_of_short_chunks():
+    samples = join(
+        [np.ones(100, "<i2"), np.ones(40, "<i2"), np.ones(1000, "<i2")], 480
+    )
+    # Chỗ nối 1: nửa chunk ngắn (20); chỗ nối 2: nửa phần còn lại của nó (10)
+    assert len(samples) == 100 + 40 + 1000 - 20 - 10
+
+
+def test_crossfade_skips_empty_chunks():
+    samples = join([np.ones(100, "<i2"), np.zeros(0, "<i2"), np.ones(100, "<i2")], 10)
+    assert len(samples) == 190
+
+
+def test_transcoder_map_window_is_bounded():
+    transcoder = Transcoder(workers=2)
+    submitted = []
+    lock = threading.Lock()
+
+    def inputs():
+        for i in range(40):
+            with lock:
+                submitted.append(i)
+            yield i
+
+    try:
+        for done, value in enumerate(transcoder.map(lambda x: x * 2, inputs())):
+            assert value == done * 2
+            assert len(submitted) - done <= 4
+    finally:
+        transcoder.shutdown()
+    assert len(submitted) == 40
+
+
+def test_combine_writes_crossfaded_wav(tmp_path):
+    paths = []
+    for i in range(5):
+        pcm = (sine(1.0, 0.3) * 32767).astype("<i2").tobytes()
+        path = tmp_path / f"chunk_{i}.wav"
+        path.write_bytes(wav_header(len(pcm)) + pcm)
+        paths.append(str(path))
+
+    transcoder = Transcoder(workers=2)
+    try:
+        processor = PostProcessor(transcoder, trim=False, crossfade=0.02)
+        output = processor.combine(paths, str(tmp_path / "out.wav"))
+    finally:
+        transcoder.shutdown()
+
+    with open(output, "rb") as f:
+        data = f.read()
+    info = parse_wav(data)
+    fade = int(PCM_SAMPLE_RATE * 0.02)
+    assert info.data_size // 2 == 5 * PCM_SAMPLE_RATE - 4 * fade
+    samples = np.frombuffer(data[info.data_offset:], dtype="<i2") / 32768.0
+    assert integrated_loudness(samples.astype(np.float32)) == pytest.approx(
+        -16.0, abs=0.2
+    )
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import scheduler as scheduler_module
+from src.core.hedging import RequestCancelled
+from src.core.metrics import create_tts_metrics
+from src.core.scheduler import (
+    RateLimitScheduler,
+    TokenBucket,
+    get_retry_after,
+    is_retryable,
+)
+
+
+class ApiError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Ghi lại các lần time.sleep của scheduler thay vì ngủ thật"""
+    calls = []
+    monkeypatch.setattr(scheduler_module.time, "sleep", calls.append)
+    return calls
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = RateLimitScheduler(max_in_flight=2)
+    scheduler.metrics = create_tts_metrics()
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(60, burst_seconds=5)  # 1 token/giây, burst 5
+    waits = [bucket.reserve() for _ in range(8)]
+    assert waits[:5] == [0.0] * 5
+    assert waits[5:] == pytest.approx([1.0, 2.0, 3.0], abs=0.05)
+
+
+def test_token_bucket_charges_characters():
+    bucket = TokenBucket(6000, burst_seconds=1)  # 100 ký tự/giây
+    assert bucket.reserve(100) == 0.0
+    assert bucket.reserve(50) == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"retry-after": "3"}, 3.0),
+        ({"retry-after-ms": "250", "retry-after": "9"}, 0.25),
+        ({}, None),
+    ],
+)
+def test_retry_after_headers(headers, expected):
+    assert get_retry_after(ApiError(429, headers)) == expected
+
+
+def test_retry_after_http_date_and_wrapped_error():
+    date = formatdate(time.time() + 30, usegmt=True)
+    try:
+        try:
+            raise ApiError(429, {"retry-after": date})
+        except ApiError as e:
+            raise Exception("Error generating speech") from e
+    except Exception as wrapped:
+        assert get_retry_after(wrapped) == pytest.approx(30, abs=1.5)
+
+
+def test_call_honours_retry_after_and_pauses_pool(scheduler, sleeps):
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ApiError(429, {"retry-after": "2"})
+        return "ok"
+
+    assert scheduler.call(flaky, cost=10) == "ok"
+    assert len(attempts) == 2
+    assert 2 in sleeps
+    assert scheduler.throttled == 1
+    # Request mới cũng phải chờ hết thời gian tạm dừng
+    assert scheduler.reserve() == pytest.approx(2.0, abs=0.1)
+    assert scheduler.metrics.get("tts_retries_total").values == {"429": 1}
+
+
+def test_backoff_without_retry_after(scheduler, sleeps):
+    def failing():
+        raise ApiError(503)
+
+    with pytest.raises(ApiError):
+        scheduler.call(failing, max_retries=3)
+    assert len(sleeps) == 2
+    assert 0.4 <= sleeps[0] <= 0.6 and 0.8 <= sleeps[1] <= 1.2
+    assert scheduler.metrics.get("tts_request_errors_total").values == {"503": 1}
+
+
+def test_client_errors_are_not_retried(scheduler, sleeps):
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise ApiError(400)
+
+    assert not is_retryable(ApiError(400))
+    with pytest.raises(ApiError):
+        scheduler.call(bad_request)
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_in_flight_limit(scheduler):
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def work():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+
+    futures = [scheduler.submit(work) for _ in range(10)]
+    for future in futures:
+        future.result(timeout=5)
+    assert max(peak) == 2
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_cancelled_request_is_not_an_error(scheduler, use_async):
+    def cancelled():
+        raise RequestCancelled()
+
+    async def acancelled():
+        raise RequestCancelled()
+
+    with pytest.raises(RequestCancelled):
+        if use_async:
+            asyncio.run(scheduler.acall(acancelled))
+        else:
+            scheduler.call(cancelled)
+    assert scheduler.metrics.get("tts_request_errors_total").total == 0
+
+
+def test_async_client_closed_after_each_run(engine, monkeypatch):
+    closed = []
+
+    async def aclose():
+        closed.append(asyncio.get_running_loop())
+
+    monkeypatch.setattr(engine.backend, "aclose", aclose)
+    engine.use_asyncio = True
+    for _ in range(2):
+        assert engine.generate_speech_parallel("Xin chào.", "echo")
+    # Mỗi asyncio.run đóng client của loop của nó
+    assert len(closed) == 2 and closed[0] is not closed[1]
+
+
+def test_openai_async_client_is_closed():
+    pytest.importorskip("openai")
+    from src.core.backends.openai_backend import OpenAIBackend
+
+    backend = OpenAIBackend(api_key="test")
+
+    async def run():
+        client = backend.get_async_client()
+        assert backend.get_async_client() is client
+        await backend.aclose()
+        return client
+
+    first = asyncio.run(run())
+    second = asyncio.run(run())
+    assert first is not second
+    assert first.is_closed() and second.is_closed()
+    backend.close()
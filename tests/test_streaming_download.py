@@ -0,0 +1,131 @@
+import glob
+import os
+import threading
+import time
+
+import pytest
+
+from src.core.audio_buffers import GrowingBuffer
+from src.core.audio_formats import wav_header
+from src.core.backends import TTSBackend
+from src.core.hedging import RequestCancelled
+from src.core.mp3_frames import iter_frames, playable_prefix, silent_frames
+
+
+BLOCK = 65536
+
+
+class BlockBackend(TTSBackend):
+    """Trả về audio theo từng khối lớn, có thể chờ trước mỗi khối"""
+
+    name = "blocks"
+    formats = ("wav",)
+
+    def __init__(self, blocks=3, first_delay=0.0, delay=0.0, on_block=None):
+        self.blocks = blocks
+        self.first_delay = first_delay
+        self.delay = delay
+        self.on_block = on_block
+        self.closed = False
+
+    def stream(self, text, voice, speed=1.0, response_format="wav", chunk_size=65536):
+        try:
+            time.sleep(self.first_delay)
+            yield wav_header(BLOCK * self.blocks) + b"\0" * (BLOCK - 44)
+            for index in range(1, self.blocks):
+                if self.on_block:
+                    self.on_block(index)
+                time.sleep(self.delay)
+                yield b"\1" * BLOCK
+        finally:
+            self.closed = True
+
+
+def test_bytes_are_written_and_forwarded_as_they_arrive(engine, tmp_path):
+    forwarded = []
+    seen = []
+
+    def on_block(index):
+        # Trước khi khối index tới: phần đã nhận đã nằm trong file tạm
+        sizes = [os.path.getsize(p) for p in glob.glob(str(tmp_path / ".synth_*"))]
+        seen.append((index, len(forwarded), sizes))
+
+    engine.backend = BlockBackend(on_block=on_block)
+    output = tmp_path / "out.wav"
+    engine.convert_to_speech("xin chào", str(output), on_chunk=forwarded.append)
+
+    assert seen == [(1, 1, [BLOCK]), (2, 2, [2 * BLOCK])]
+    assert output.stat().st_size == 3 * BLOCK
+    assert not glob.glob(str(tmp_path / ".synth_*"))
+
+
+def test_ttfb_and_transfer_time_are_recorded(engine):
+    engine.backend = BlockBackend(blocks=3, first_delay=0.2, delay=0.1)
+    data = b"".join(engine.stream_speech("xin chào", "alloy"))
+
+    stats = engine.get_transfer_stats()
+    assert (stats["requests"], stats["bytes"]) == (1, len(data))
+    assert 0.2 <= stats["ttfb_p50"] < 0.6
+    assert 0.2 <= stats["transfer_p50"] < 0.6
+    assert engine.metrics.get("tts_ttfb_seconds").count == 1
+    assert engine.metrics.get("tts_response_bytes").sum == len(data)
+
+
+def test_cancel_stops_download_and_closes_stream(engine):
+    cancel = threading.Event()
+    backend = BlockBackend(blocks=5, on_block=lambda index: cancel.set())
+    engine.backend = backend
+
+    received = []
+    with pytest.raises(RequestCancelled):
+        for data in engine.stream_speech("xin chào", "alloy", cancel=cancel):
+            received.append(data)
+
+    assert len(received) == 1
+    assert backend.closed
+    assert engine.get_transfer_stats()["requests"] == 0
+
+
+def test_first_chunk_is_forwarded_into_growing_buffer(engine):
+    engine.backend = BlockBackend(blocks=2)
+    task = engine.plan_chunks("Xin chào.", "alloy")[0]
+    stream = GrowingBuffer(task.output_path)
+
+    audio = engine.synthesize_chunk_streaming(task, stream, "alloy")
+    data, complete = stream.read_from(0)
+    with open(audio, "rb") as f:
+        assert data == f.read()
+    assert complete and not stream.abandoned
+
+
+def test_retry_abandons_progressive_stream(engine):
+    engine.backend = BlockBackend(blocks=2)
+    task = engine.plan_chunks("Xin chào.", "alloy")[0]
+    stream = GrowingBuffer(task.output_path)
+    stream.write(b"partial download")  # Lần thử trước đã chuyển tiếp một phần
+
+    engine.synthesize_chunk_streaming(task, stream, "alloy")
+    assert stream.abandoned
+    assert stream.read_from(0) == (b"", True)
+
+
+def test_growing_buffer_reads_what_has_arrived():
+    stream = GrowingBuffer("chunk.mp3")
+    stream.write(b"abc")
+    assert stream.read_from(1) == (b"bc", False)
+    stream.write(b"def")
+    stream.close()
+    stream.write(b"late")
+    assert stream.read_from(3) == (b"def", True)
+    assert stream.size == 6
+
+
+def test_playable_prefix_cuts_at_frame_boundary():
+    data = silent_frames(3.0)
+    frames = {offset for offset, _ in iter_frames(data, start=None, end=len(data))}
+
+    assert playable_prefix(data[:100], min_duration=0.5) == 0
+    cut = playable_prefix(data[: len(data) // 2], min_duration=0.5)
+    assert 0 < cut < len(data) // 2
+    assert cut in frames
+    assert playable_prefix(data, min_duration=10.0, final=True) == len(data)
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from src.core.text_chunker import MAX_INPUT_CHARS, chunk_text, split_units
+
+
+def words(text):
+    return text.split()
+
+
+def sentences(count, length=60):
+    return " ".join(
+        f"Câu số {i} " + "nội dung " * (length // 9) + "kết thúc." for i in range(count)
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        sentences(400),
+        sentences(3, 5000),  # câu dài hơn giới hạn: tách theo mệnh đề/từ
+        "x" * 10000,  # không có khoảng trắng: cắt cứng
+        "Một, hai; ba: " * 2000,
+        "Dòng\n" * 3000,
+    ],
+)
+def test_chunks_respect_limit_and_preserve_content(text):
+    chunks = chunk_text(text, target_chars=3500)
+    assert all(0 < len(chunk) <= MAX_INPUT_CHARS for chunk in chunks)
+    # Chỉ khoảng trắng ở ranh giới chunk có thể mất
+    assert "".join(words(" ".join(chunks))) == "".join(words(text))
+    assert len(chunks) == max(1, -(-len(text.strip()) // 3500))
+
+
+def test_chunks_are_balanced():
+    chunks = chunk_text(sentences(500), target_chars=3500)
+    sizes = [len(chunk) for chunk in chunks]
+    assert max(sizes) - min(sizes) <= 200
+
+
+def test_hard_cuts_are_balanced():
+    sizes = [len(chunk) for chunk in chunk_text("x" * 10000, target_chars=3500)]
+    assert sizes == [3333, 3333, 3334]
+
+
+def test_cuts_prefer_sentence_boundaries():
+    chunks = chunk_text(sentences(200), target_chars=1000)
+    assert all(chunk.endswith("kết thúc.") for chunk in chunks)
+
+
+def test_units_cover_text_without_gaps():
+    text = "Xin chào!  Đây là câu hai… Và câu ba?\n\nĐoạn mới: " + "y" * 9000
+    units = list(split_units(text))
+    assert units[0][0] == 0 and units[-1][1] == len(text)
+    assert all(a[1] == b[0] for a, b in zip(units, units[1:]))
+    assert all(end - start <= MAX_INPUT_CHARS for start, end in units)
+
+
+def test_chunking_is_linear():
+    small = sentences(2000)
+    large = small * 10
+    start = time.perf_counter()
+    chunk_text(small)
+    small_time = time.perf_counter() - start
+    start = time.perf_counter()
+    chunk_text(large)
+    large_time = time.perf_counter() - start
+    assert large_time < small_time * 30
+
+
+def test_empty_text():
+    assert chunk_text("") == []
+    assert chunk_text("   \n  ") == []
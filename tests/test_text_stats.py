@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from src.gui.components.text_stats import TextStatistics, TextStatsTracker
+
+
+def recount(text):
+    stats = TextStatistics()
+    stats.reset(text)
+    return stats.char_count, stats.word_count, stats.line_count
+
+
+def counts(stats):
+    return stats.char_count, stats.word_count, stats.line_count
+
+
+def apply_edit(stats, text, start, end, new):
+    """Giống tracker: đoạn [start-1, end+1] trước và sau khi thay [start, end)"""
+    left = max(0, start - 1)
+    right = min(len(text), end + 1)
+    edited = text[:start] + new + text[end:]
+    stats.replace(text[left:right], edited[left:right + len(new) - (end - start)])
+    return edited
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_window_updates_match_full_count(seed):
+    rng = random.Random(seed)
+    text = "Xin chào thế giới.\nMột hai  ba\n"
+    stats = TextStatistics()
+    stats.reset(text)
+    for _ in range(200):
+        start = rng.randint(0, len(text))
+        end = min(len(text), start + rng.choice([0, 0, 1, 3, 10]))
+        new = "".join(rng.choice("ab \n") for _ in range(rng.randint(0, 5)))
+        text = apply_edit(stats, text, start, end, new)
+        assert counts(stats) == recount(text)
+
+
+def test_joining_and_splitting_words():
+    stats = TextStatistics()
+    text = "abc def"
+    stats.reset(text)
+    text = apply_edit(stats, text, 3, 4, "")
+    assert (text, stats.word_count) == ("abcdef", 1)
+    text = apply_edit(stats, text, 3, 3, "\n")
+    assert (text, stats.word_count, stats.line_count) == ("abc\ndef", 2, 2)
+
+
+@pytest.fixture
+def text_widget():
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("cần display để tạo tk.Text")
+    root.withdraw()
+    widget = tk.Text(root)
+    yield widget
+    root.destroy()
+
+
+def test_tracker_reads_only_window_of_long_line(text_widget):
+    text_widget.insert("1.0", "từ " * 100000)
+    tracker = TextStatsTracker(text_widget)
+    reads = []
+    call = tracker._call
+
+    def recording(*args):
+        result = call(*args)
+        if args[0] == "get":
+            reads.append(len(str(result)))
+        return result
+
+    tracker._call = recording
+    text_widget.insert("1.150000", "x")
+    text_widget.insert("end", " cuối")
+    text_widget.delete("1.0")
+    text_widget.delete("1.10", "1.20")
+    text_widget.replace("1.0", "1.2", "a b")
+
+    full = text_widget.get("1.0", "end-1c")
+    assert counts(tracker.stats) == recount(full)
+    assert reads and max(reads) < 20
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import threading
+
+import pytest
+
+from src.utils.logger import Tracer, tracer as global_tracer
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    tracer.enable()
+    return tracer
+
+
+def spans(events, ph="X"):
+    return [event for event in events if event["ph"] == ph]
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("merge") as span:
+        span.set(files=3)
+    tracer.instant("retry")
+    tracer.counter("in_flight", requests=1)
+    assert tracer.get_events() == []
+
+
+def test_span_records_duration_args_and_error(tracer):
+    with tracer.span("merge", cat="io", files=2) as span:
+        span.set(bytes=10)
+    with pytest.raises(ValueError):
+        with tracer.span("download"):
+            raise ValueError("boom")
+
+    merge, download = spans(tracer.get_events())
+    assert (merge["name"], merge["cat"]) == ("merge", "io")
+    assert merge["args"] == {"files": 2, "bytes": 10}
+    assert merge["dur"] >= 0 and merge["ts"] >= 0
+    assert download["args"] == {"error": "ValueError"}
+
+
+def test_instant_and_counter_events(tracer):
+    tracer.instant("retry", cat="scheduler", reason="rate_limit")
+    tracer.counter("in_flight", requests=3)
+    events = tracer.get_events()
+
+    (retry,) = spans(events, "i")
+    assert retry["args"] == {"reason": "rate_limit"}
+    (counter,) = spans(events, "C")
+    assert (counter["name"], counter["args"]) == ("in_flight", {"requests": 3})
+
+
+def test_threads_and_tasks_get_their_own_track(tracer):
+    def work():
+        tracer.complete("request", 0.0, 0.1)
+
+    thread = threading.Thread(target=work, name="tts-worker_0")
+    thread.start()
+    thread.join()
+
+    async def task_span():
+        with tracer.span("astream"):
+            await asyncio.sleep(0)
+
+    async def main():
+        await asyncio.gather(
+            asyncio.create_task(task_span(), name="chunk-0"),
+            asyncio.create_task(task_span(), name="chunk-1"),
+        )
+
+    asyncio.run(main())
+    events = tracer.get_events()
+    names = {event["tid"]: event["args"]["name"] for event in spans(events, "M")}
+    request = next(e for e in spans(events) if e["name"] == "request")
+    assert names[request["tid"]] == "tts-worker_0"
+    task_tids = {e["tid"] for e in spans(events) if e["name"] == "astream"}
+    assert len(task_tids) == 2 and all(tid < 0 for tid in task_tids)
+    assert {names[tid] for tid in task_tids} == {"chunk-0", "chunk-1"}
+
+
+def test_event_buffer_is_bounded():
+    tracer = Tracer(max_events=10)
+    tracer.enable()
+    for i in range(25):
+        tracer.instant("tick", i=i)
+    events = spans(tracer.get_events(), "i")
+    assert [event["args"]["i"] for event in events] == list(range(15, 25))
+
+
+def test_chrome_trace_export(tracer, tmp_path):
+    with tracer.span("chunking", chars=100):
+        pass
+    path = tracer.export_chrome_trace(str(tmp_path / "traces" / "run.json"))
+
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+    assert trace["displayTimeUnit"] == "ms"
+    assert [e["name"] for e in spans(trace["traceEvents"])] == ["chunking"]
+    assert not list((tmp_path / "traces").glob(".trace_*"))
+
+
+@pytest.fixture
+def traced_engine(engine):
+    global_tracer.clear()
+    global_tracer.enable()
+    yield engine
+    global_tracer.disable()
+    global_tracer.clear()
+
+
+def test_engine_pipeline_spans(traced_engine, tmp_path):
+    engine = traced_engine
+    engine.chunk_size = 30
+    text = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(4))
+    audio_files = engine.generate_speech_parallel(text, "alloy")
+    engine.combine_audio_files(audio_files, str(tmp_path / "merged.wav"))
+
+    path = engine.export_trace(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as f:
+        events = spans(json.load(f)["traceEvents"])
+    counts = {}
+    for event in events:
+        counts[event["name"]] = counts.get(event["name"], 0) + 1
+    chunks = len(audio_files)
+    assert counts["chunking"] == 1
+    assert counts["merge"] == 1
+    for name in ("cache_lookup", "queue_wait", "request", "download"):
+        assert counts[name] == chunks
+
+
+def test_failed_chunk_is_logged_with_document_index(engine):
+    engine.chunk_size = 30
+    text = " ".join(f"Đây là câu thứ {i} của văn bản." for i in range(4))
+    bad = engine.optimize_chunk_size(text)[2]
+    synthesize = engine.backend.synthesize
+
+    def failing(chunk, *args, **kwargs):
+        if chunk == bad:
+            raise ValueError("bad chunk")
+        return synthesize(chunk, *args, **kwargs)
+
+    engine.backend.synthesize = failing
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger("tts.tts_engine")
+    logger.addHandler(handler)
+    try:
+        engine.generate_speech_parallel(text, "alloy")
+    finally:
+        logger.removeHandler(handler)
+
+    messages = [record.getMessage() for record in records]
+    assert len(messages) == 1
+    assert messages[0].startswith("Error processing chunk 2:")
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from src.core.audio_formats import parse_wav, wav_header
+from src.core.transcoder import Transcoder, transcode_bytes
+
+
+def test_wav_pcm_round_trip_without_ffmpeg():
+    pcm = bytes(range(256)) * 10
+    wav = transcode_bytes(pcm, "pcm", "wav")
+    assert parse_wav(wav).data_size == len(pcm)
+    assert transcode_bytes(wav, "wav", "pcm") == pcm
+
+
+def test_submit_records_new_audio_before_releasing_source(tmp_path):
+    source = tmp_path / "chunk.wav"
+    source.write_bytes(wav_header(4800) + bytes(4800))
+    recorded = []
+
+    def on_done(audio):
+        # File gốc chỉ bị xóa sau khi on_done ghi nhận file mới
+        recorded.append((audio, os.path.exists(source), os.path.exists(audio)))
+
+    transcoder = Transcoder(workers=2)
+    try:
+        audio = transcoder.submit(str(source), "pcm", on_done=on_done).result(5)
+    finally:
+        transcoder.shutdown()
+
+    assert audio == str(tmp_path / "chunk.pcm")
+    assert recorded == [(audio, True, True)]
+    assert not source.exists()
+    assert os.path.getsize(audio) == 4800
+
+
+@pytest.mark.parametrize("use_asyncio", [False, True])
+def test_resumed_transcoded_job_is_not_synthesized_again(engine, use_asyncio):
+    engine.use_asyncio = use_asyncio
+    settings = {"output_format": "pcm"}
+    text = "Câu thứ nhất của văn bản. " * 300
+    first = engine.generate_speech_parallel(text, "echo", settings)
+    assert len(first) > 1
+    assert all(path.endswith(".pcm") and os.path.exists(path) for path in first)
+
+    calls = []
+    synthesize = engine.backend.synthesize
+    engine.backend.synthesize = lambda *args, **kwargs: (
+        calls.append(args) or synthesize(*args, **kwargs)
+    )
+    plan = engine.plan_chunks(text, "echo", settings)
+    assert all(task.done for task in plan)
+    assert engine.generate_speech_parallel(text, "echo", settings) == first
+    assert calls == []